@@ -273,6 +273,73 @@ if [[ ${RNK_CRR} != "TRUE" && ${RNK_CRR} != "FALSE" ]]; then
   exit 1
 fi
 
+# write / parse only the combined .stat file, FALSE by default
+STAT_ONLY=${STAT_ONLY:-FALSE}
+if [[ ${STAT_ONLY} =~ ${TRUE} ]]; then
+  printf "GridStat writes only the combined .stat file output.\n"
+  out_flg="STAT"
+  stat_flg=" --stat"
+elif [[ ${STAT_ONLY} =~ ${FALSE} ]]; then
+  printf "GridStat writes the .stat file and _TYPE.txt file outputs.\n"
+  out_flg="BOTH"
+  stat_flg=""
+else
+  msg="ERROR: \${STAT_ONLY} must be set to 'TRUE' or 'FALSE' to decide "
+  msg+="if writing only the combined .stat file output.\n"
+  printf "${msg}"
+  exit 1
+fi
+
+# parse only new or changed ASCII outputs into the existing store, FALSE by
+# default
+INC_PRS=${INC_PRS:-FALSE}
+if [[ ${INC_PRS} =~ ${TRUE} ]]; then
+  printf "Parsing only new or changed ASCII outputs into existing stores.\n"
+  inc_flg=" --incremental"
+elif [[ ${INC_PRS} =~ ${FALSE} ]]; then
+  printf "Parsing all ASCII outputs into new stores.\n"
+  inc_flg=""
+else
+  msg="ERROR: \${INC_PRS} must be set to 'TRUE' or 'FALSE' to decide "
+  msg+="if parsing ASCII outputs incrementally.\n"
+  printf "${msg}"
+  exit 1
+fi
+
+# fold the partial sums of the cycle into the season state, FALSE by default
+FOLD_STATE=${FOLD_STATE:-FALSE}
+if [[ ${FOLD_STATE} =~ ${TRUE} ]]; then
+  if [ -z ${STATE_DIR} ]; then
+    printf "ERROR: season state directory \${STATE_DIR} is not defined.\n"
+    exit 1
+  fi
+  # member and grid labels of the folded partial sums, empty if not defined
+  MEM_ID=${MEM_ID:-}
+  GRD=${GRD:-}
+  msg="Folding cycle partial sums of member '${MEM_ID}' and grid '${GRD}'"
+  msg+=" into the season state\n ${STATE_DIR}\n"
+  printf "${msg}"
+  cmd="mkdir -p ${STATE_DIR}"
+  printf "${cmd}\n"; eval "${cmd}"
+elif [[ ! ${FOLD_STATE} =~ ${FALSE} ]]; then
+  msg="ERROR: \${FOLD_STATE} must be set to 'TRUE' or 'FALSE' to decide "
+  msg+="if folding cycle partial sums into the season state.\n"
+  printf "${msg}"
+  exit 1
+fi
+
+# catalog of the verification tree updated with the parsed stores, optional
+if [ -n "${STAT_CATALOG}" ]; then
+  if [ ! -f ${STAT_CATALOG} ]; then
+    msg="Stat catalog\n ${STAT_CATALOG}\n does not exist, parsed stores "
+    msg+="are indexed at the next build_catalog.py run.\n"
+    printf "${msg}"
+    STAT_CATALOG=""
+  else
+    printf "Updating the stat catalog\n ${STAT_CATALOG}\n with parsed stores.\n"
+  fi
+fi
+
 # control flow to be processed
 if [ -z ${CTR_FLW} ]; then
   printf "ERROR: control flow name \${CTR_FLW} is not defined.\n"
@@ -443,9 +510,11 @@ met_tools_py="singularity exec -B "
 met_tools_py+="${WRK_DIR}:/wrk_dir:rw,${WRK_DIR}:/in_dir:ro,${SRC}:/src_dir:ro "
 met_tools_py+="${MET_TOOLS_PY} python"
 
-# clean old data
-rm -f ${WRK_DIR}/grid_stat_${VRF_FLD}*.txt
-rm -f ${WRK_DIR}/grid_stat_${VRF_FLD}*.stat
+# clean old data, outputs of a previous run are kept for incremental parsing
+if [[ ${INC_PRS} =~ ${FALSE} ]]; then
+  rm -f ${WRK_DIR}/grid_stat_${VRF_FLD}*.txt
+  rm -f ${WRK_DIR}/grid_stat_${VRF_FLD}*.stat
+fi
 rm -f ${WRK_DIR}/grid_stat_${VRF_FLD}*.nc
 rm -f ${WRK_DIR}/GridStatConfig_${VRF_FLD}*
 rm -f ${WRK_DIR}/PLY_MSK.txt
@@ -473,6 +542,10 @@ for (( anl_hr = ${ANL_MIN}; anl_hr <= ${anl_max}; anl_hr += ${ANL_INC} )); do
   anl_dt=`date +%Y%m%d%H -d "${cyc_dt} ${anl_hr} hours"`
   pdd_hr=`printf %03d $(( 10#${anl_hr} ))`
 
+  # lead and valid time stamps of the grid_stat output names
+  out_ld=`printf %02d0000 $(( 10#${anl_hr} ))`
+  out_vl=`date +%Y%m%d_%H%M%S -d "${cyc_dt} ${anl_hr} hours"`
+
   for acc_hr in ${acc_hrs[@]}; do
     if [[ ${CMP_ACC} =~ ${TRUE} && ${acc_hr} -le ${anl_hr} ]]; then
       for_in=${CTR_FLW}_${acc_hr}${VRF_FLD}_${CYC_DT}_F${pdd_hr}${pstfx}.nc
@@ -487,7 +560,13 @@ for (( anl_hr = ${ANL_MIN}; anl_hr <= ${anl_max}; anl_hr += ${ANL_INC} )); do
         obs_in=StageIV/StageIV_QPE_${anl_dt}.nc
       fi
 
-      if [ -r ${IN_DIR}/${for_in} ]; then
+      # skip verification already produced by a previous run
+      stat_out=${WRK_DIR}/grid_stat_${VRF_FLD}_${acc_hr}hr_${out_ld}L_${out_vl}V.stat
+      if [[ ${INC_PRS} =~ ${TRUE} && -r ${stat_out} ]]; then
+        msg="Found existing grid_stat output\n ${stat_out}\n skipping grid_stat"
+        msg+=" for forecast initialization ${CYC_DT}, forecast hour ${anl_hr}.\n"
+        printf "${msg}"
+      elif [ -r ${IN_DIR}/${for_in} ]; then
         if [ -r ${STC_ROOT}/${obs_in} ]; then
           # update GridStatConfigTemplate archiving file in working directory
           # this remains unchanged on inner loop
@@ -504,6 +583,7 @@ for (( anl_hr = ${ANL_MIN}; anl_hr <= ${anl_max}; anl_hr += ${ANL_INC} )); do
               | sed "s/NBRHD_WDTH/width = [ ${NBRHD_WDTH} ]/" \
               | sed "s/PRFX/output_prefix    = \"${VRF_FLD}_${acc_hr}hr\"/" \
               | sed "s/MET_VER/version           = \"V${MET_VER}\"/" \
+              | sed "s/OUT_FLG/${out_flg}/" \
               > ${WRK_DIR}/GridStatConfig_${VRF_FLD}_${acc_hr}hr
           fi
 
@@ -564,7 +644,13 @@ for (( anl_hr = ${ANL_MIN}; anl_hr <= ${anl_max}; anl_hr += ${ANL_INC} )); do
       # obs file defined in terms of valid time
       obs_in=${VRF_REF}_${VRF_FLD}_${CYC_DT}_F${pdd_hr}.nc
       
-      if [ -r ${IN_DIR}/${for_in} ]; then
+      # skip verification already produced by a previous run
+      stat_out=${WRK_DIR}/grid_stat_${VRF_FLD}_${out_ld}L_${out_vl}V.stat
+      if [[ ${INC_PRS} =~ ${TRUE} && -r ${stat_out} ]]; then
+        msg="Found existing grid_stat output\n ${stat_out}\n skipping grid_stat"
+        msg+=" for forecast initialization ${CYC_DT}, forecast hour ${anl_hr}.\n"
+        printf "${msg}"
+      elif [ -r ${IN_DIR}/${for_in} ]; then
         if [ -r ${STC_ROOT}/${obs_in} ]; then
           # update GridStatConfigTemplate archiving file in working directory
           # this remains unchanged on inner loop
@@ -581,6 +667,7 @@ for (( anl_hr = ${ANL_MIN}; anl_hr <= ${anl_max}; anl_hr += ${ANL_INC} )); do
               | sed "s/NBRHD_WDTH/width = [ ${NBRHD_WDTH} ]/" \
               | sed "s/PRFX/output_prefix    = \"${VRF_FLD}\"/" \
               | sed "s/MET_VER/version           = \"V${MET_VER}\"/" \
+              | sed "s/OUT_FLG/${out_flg}/" \
               > ${WRK_DIR}/GridStatConfig_${VRF_FLD}
           fi
 
@@ -639,27 +726,58 @@ printf "${cmd}\n"; eval "${cmd}"
 cmd="rm -f ${WRK_DIR}/PLY_MSK.txt"
 printf "${cmd}\n"; eval "${cmd}"
 
+# parse the ASCII outputs of all prefixes in a single container launch
 if [[ ${CMP_ACC} =~ ${TRUE} ]]; then
+  prfxs=""
   for acc_hr in ${acc_hrs[@]}; do 
-    # run makeDataFrames to parse the ASCII outputs
-    cmd="${met_tools_py} /src_dir/utilities/ASCII_to_DataFrames.py"
-    cmd+=" '${VRF_FLD}_${acc_hr}hr' '/in_dir' '/wrk_dir'; error=\$?"
-    printf "${cmd}\n"; eval "${cmd}"
-    printf "ASCII_to_DataFrames.py exited with status ${error}.\n"
-    if [ ${error} -ne 0 ]; then
-      msg="ERROR: ASCII_to_DataFrames.py failed to produce parsed binaries.\n"
-      printf "${msg}"
-      error_check=1
-    fi
+    prfxs+="${VRF_FLD}_${acc_hr}hr,"
   done
+  prfxs=${prfxs%,}
 else
-  # run makeDataFrames to parse the ASCII outputs
-  cmd="${met_tools_py} /src_dir/utilities/ASCII_to_DataFrames.py"
-  cmd+=" '${VRF_FLD}' '/in_dir' '/wrk_dir'; error=\$?"
+  prfxs=${VRF_FLD}
+fi
+
+# run makeDataFrames to parse the ASCII outputs
+cmd="${met_tools_py} /src_dir/utilities/ASCII_to_DataFrames.py"
+cmd+="${stat_flg}${inc_flg}"
+cmd+=" '${prfxs}' '/in_dir' '/wrk_dir'; error=\$?"
+printf "${cmd}\n"; eval "${cmd}"
+printf "ASCII_to_DataFrames.py exited with status ${error}.\n"
+if [ ${error} -ne 0 ]; then
+  msg="ERROR: ASCII_to_DataFrames.py failed to produce parsed binaries.\n"
+  printf "${msg}"
+  error_check=1
+fi
+
+# index the parsed stores in the catalog of the verification tree
+if [[ -n "${STAT_CATALOG}" && ${error} -eq 0 ]]; then
+  cat_root=$(dirname ${STAT_CATALOG})
+  cmd="singularity exec -B ${cat_root}:/vrf_root:rw,${SRC}:/src_dir:ro "
+  cmd+="${MET_TOOLS_PY} python /src_dir/utilities/build_catalog.py /vrf_root"
+  cmd+=" --catalog /vrf_root/$(basename ${STAT_CATALOG})"
+  cmd+=" --in-dir /vrf_root/${WRK_DIR#${cat_root}/} --fields '${prfxs}'"
+  cmd+="; error=\$?"
+  printf "${cmd}\n"; eval "${cmd}"
+  printf "build_catalog.py exited with status ${error}.\n"
+  if [ ${error} -ne 0 ]; then
+    msg="ERROR: build_catalog.py failed to index the parsed stores.\n"
+    printf "${msg}"
+    error_check=1
+  fi
+fi
+
+# fold the partial sums of the parsed stores into the season state
+if [[ ${FOLD_STATE} =~ ${TRUE} && ${error} -eq 0 ]]; then
+  cmd="singularity exec -B ${WRK_DIR}:/in_dir:ro,${SRC}:/src_dir:ro,"
+  cmd+="${STATE_DIR}:/state_dir:rw ${MET_TOOLS_PY} python"
+  cmd+=" /src_dir/utilities/fold_cycle.py '${prfxs}' '/in_dir' '/state_dir'"
+  cmd+=" --ctr-flw '${CTR_FLW}' --cycle '${CYC_DT}'"
+  cmd+=" --mem '${MEM_ID}' --grid '${GRD}'"
+  cmd+="; error=\$?"
   printf "${cmd}\n"; eval "${cmd}"
-  printf "ASCII_to_DataFrames.py exited with status ${error}.\n"
+  printf "fold_cycle.py exited with status ${error}.\n"
   if [ ${error} -ne 0 ]; then
-    msg="ERROR: ASCII_to_DataFrames.py failed to produce parsed binaries.\n"
+    msg="ERROR: fold_cycle.py failed to fold the cycle into the season state.\n"
     printf "${msg}"
     error_check=1
   fi
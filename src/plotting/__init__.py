@@ -41,24 +41,44 @@
 ##################################################################################
 # Imports
 ##################################################################################
-import matplotlib
 from datetime import datetime as dt
 from datetime import timedelta as td
-import matplotlib.pyplot as plt
-import seaborn as sns
-import numpy as np
-import pandas as pd
 import re
 import pickle
 import os
-from attrs import define, field, validators
+import sys
+from attrs import define, field, validators, converters
+from functools import lru_cache
+from attrs import asdict
+import hashlib
+import importlib
+import json
+
+class lazy_module:
+    # a module imported on the first access of its attributes, so that the
+    # plotting modules and templates import without loading the heavy
+    # numerical, plotting and stat store modules until a figure is rendered
+    def __init__(self, name):
+        self.__dict__['_name'] = name
+
+    def __getattr__(self, attr):
+        return getattr(importlib.import_module(self._name), attr)
+
+plt = lazy_module('matplotlib.pyplot')
+sns = lazy_module('seaborn')
+np = lazy_module('numpy')
+pd = lazy_module('pandas')
+LineTypes = lazy_module('utilities.LineTypes')
+StatStore = lazy_module('utilities.StatStore')
+StatCatalog = lazy_module('utilities.StatCatalog')
+StatCube = lazy_module('utilities.StatCube')
 
 ##################################################################################
 # Load workflow constants and Utility Methods 
 ##################################################################################
 INDT = '    '
-VRF_ROOT = os.environ['VRF_ROOT']
-IF_CNTR_PLT = os.environ['IF_CNTR_PLT']
+VRF_ROOT = os.environ.get('VRF_ROOT')
+IF_CNTR_PLT = os.environ.get('IF_CNTR_PLT', 'False')
 
 # Supported MET tools and their stat information
 MET_TOOLS = {
@@ -103,6 +123,182 @@ VRF_REFS = {
                 }
             }
 
+# Maximum number of projected stat tables held in memory
+CACHE_SIZE = 256
+
+# Maximum number of whole legacy binaries held in memory, which are unpickled
+# in full before they are projected, and of statistics cubes
+BIN_CACHE_SIZE = 4
+CUBE_CACHE_SIZE = 2
+
+def freeze_filters(filters):
+    # hashable form of Parquet style filters, for keying the caches
+    if filters is None:
+        return None
+
+    frozen = []
+    for col, op, val in filters:
+        if isinstance(val, (list, tuple, set)):
+            val = tuple(val)
+
+        frozen.append((col, op, val))
+
+    return tuple(frozen)
+
+@lru_cache(maxsize=CACHE_SIZE)
+def read_stats(path, mtime, stat_type, columns, filters):
+    # load the requested columns and rows of a stat type once per modification
+    # time of its store file or binary, reading only the projected columns and
+    # matching row groups of stores
+    if not columns is None:
+        columns = list(columns)
+
+    if not filters is None:
+        filters = [(col, op, list(val) if isinstance(val, tuple) else val)
+                   for col, op, val in filters]
+
+    if path.endswith(StatStore.STORE_EXT):
+        return pd.read_parquet(path, engine='pyarrow', columns=columns,
+                filters=filters)
+
+    data = read_bin(path, mtime)[stat_type]
+    if not columns is None:
+        data = data[columns]
+
+    if not filters is None:
+        data = StatStore.filterStats(data, filters)
+
+    return data.reset_index(drop=True)
+
+@lru_cache(maxsize=BIN_CACHE_SIZE)
+def read_bin(path, mtime):
+    # unpickle and type a legacy binary once per modification time
+    with open(path, 'rb') as f:
+        data_dict = pickle.load(f)
+
+    for stat_type, data in data_dict.items():
+        data_dict[stat_type] = LineTypes.applySchema(data, stat_type)
+
+    return data_dict
+
+@lru_cache(maxsize=CUBE_CACHE_SIZE)
+def read_cube(path, mtime):
+    # load a statistics cube once per modification time
+    return StatCube.loadCube(path)
+
+def load_stats(in_dir, field, stat_type, columns=None, filters=None):
+    # load a stat type as in loadStats, reading each projection of a file at
+    # most once per process while it is unchanged
+    store_path = in_dir + '/' + field + '/' + stat_type + StatStore.STORE_EXT
+    bin_path = in_dir + '/' + field + '.bin'
+
+    if os.path.isfile(store_path):
+        path = store_path
+    elif os.path.isfile(bin_path):
+        path = bin_path
+    else:
+        raise FileNotFoundError('No stat store ' + store_path +\
+                ' or binary ' + bin_path + ' exists.')
+
+    mtime = os.path.getmtime(path)
+    INPUT_MTIMES[path] = mtime
+    if not columns is None:
+        columns = tuple(columns)
+
+    data = read_stats(path, mtime, stat_type, columns,
+            freeze_filters(filters))
+
+    return data.copy()
+
+# Attributes of plot classes that do not change the assembled plot data
+COSMETIC_ATTRS = [
+                  'STAT0_LIM',
+                  'STAT1_LIM',
+                  'FIG_LAB',
+                  'FIG_CSE',
+                  'COLORBAR',
+                  'IF_SHOW',
+                  'FORCE',
+                 ]
+
+# Version of the assembled plot data, increment to invalidate disk caches
+DATA_VERSION = 2
+
+# Modification times of the input files of the plot data being assembled, and
+# digests of the catalog rows of its queries
+INPUT_MTIMES = {}
+
+# Prefix of the input keys of catalog queries
+CATALOG_KEY = 'catalog:'
+
+# Extension of the fingerprint written next to each figure
+FIG_STAMP = '.json'
+
+def get_mtime(path):
+    # modification time of a file or directory, None if it does not exist
+    if os.path.exists(path):
+        return os.path.getmtime(path)
+
+    return None
+
+def get_stamp(key):
+    # stamp of an input of the plot data, the modification time of a path or
+    # the digest of the catalog rows of a query, None if it does not exist
+    if not key.startswith(CATALOG_KEY):
+        return get_mtime(key)
+
+    cat_path, criteria = json.loads(key[len(CATALOG_KEY):])
+    if not os.path.isfile(cat_path):
+        return None
+
+    rows = StatCatalog.findStats(cat_path, **criteria)
+    rows = rows[['path', 'field', 'stat_type', 'mtime']].to_csv(index=False)
+    return hashlib.sha256(rows.encode()).hexdigest()
+
+def cache_info():
+    # hit / miss counters of the stat caches for tuning CACHE_SIZE
+    return {'stats': read_stats.cache_info(), 'bin': read_bin.cache_info(),
+            'cube': read_cube.cache_info()}
+
+# Index columns of the normalized frames of plot data
+DATA_COLS = ['VX_MASK', 'FCST_LEAD', 'FCST_VALID_END', 'FCST_THRESH']
+
+def select_stat(data, stat_name, ci=None):
+    # the rows of a stat in a normalized frame with its values, and its ci
+    # bounds if any are defined, in columns named by the stat
+    data = data.loc[data['STAT'] == stat_name]
+    vals = DATA_COLS + ['VALUE']
+    names = {'VALUE': stat_name}
+    if not ci is None and data['VALUE_L'].notna().any():
+        vals += ['VALUE_L', 'VALUE_U']
+        names['VALUE_L'] = stat_name + '_' + ci + 'L'
+        names['VALUE_U'] = stat_name + '_' + ci + 'U'
+
+    return data[vals].rename(columns=names)
+
+def get_vrf_root():
+    # the root of the verification tree, read from the environment at import
+    if VRF_ROOT is None:
+        raise OSError('ERROR: VRF_ROOT is not set in the environment.')
+
+    return VRF_ROOT
+
+def set_backend(if_show):
+    # render with the non-interactive Agg backend unless the figure is shown,
+    # choosing it before pyplot is first imported, and otherwise restore the
+    # original backend for interactive figures
+    import matplotlib
+    if not if_show:
+        if not 'matplotlib.pyplot' in sys.modules:
+            matplotlib.use('Agg')
+
+        elif plt.get_backend().lower() != 'agg':
+            plt.switch_backend('Agg')
+
+    elif 'matplotlib.pyplot' in sys.modules and\
+            plt.get_backend().lower() == 'agg':
+        plt.switch_backend(matplotlib.rcParamsOrig['backend'])
+
 def convert_dt(iso_str):
     return dt.strptime(iso_str, '%Y%m%d%H')
 
@@ -176,20 +372,221 @@ class plot:
     IF_SHOW:bool = field(
             validator=validators.instance_of(bool),
             )
+    FORCE:bool = field(
+            default=False,
+            kw_only=True,
+            validator=validators.instance_of(bool),
+            )
+    CUBE:str = field(
+            default=None,
+            kw_only=True,
+            validator=validators.optional(validators.instance_of(str)),
+            )
 
     def gen_io_paths(self):
         if self.IF_CNTR_PLT:
             in_root = '/in_root/' + self.CSE
             out_root = '/out_root/' + self.CSE + '/figures/'
         else:
-            in_root = VRF_ROOT + '/' + self.CSE
-            out_root = VRF_ROOT + '/' + self.CSE + '/figures/'
+            in_root = get_vrf_root() + '/' + self.CSE
+            out_root = get_vrf_root() + '/' + self.CSE + '/figures/'
     
         if self.FIG_CSE:
                 out_root += '/' + self.FIG_CSE
 
         return in_root, out_root
 
+    def gen_cache_path(self):
+        # the disk cache of the assembled plot data, named by the hash of the
+        # class and the data relevant attributes of the plot
+        attrs = asdict(self, filter=lambda att, val: not att.name in
+                COSMETIC_ATTRS)
+        key = repr([DATA_VERSION, type(self).__name__, attrs])
+        key = hashlib.sha256(key.encode()).hexdigest()
+
+        if self.IF_CNTR_PLT:
+            cache_dir = '/out_root/' + self.CSE + '/figures/.cache'
+        else:
+            cache_dir = get_vrf_root() + '/' + self.CSE + '/figures/.cache'
+
+        return cache_dir + '/' + key + '.bin'
+
+    def track_inputs(self, flw_nme, idx, grd, cycs):
+        # record the store / binary paths of the queried cycles, so that new
+        # or removed inputs invalidate the disk cache
+        in_root, out_root = self.gen_io_paths()
+        catalog = self.gen_catalog()
+        if not catalog is None:
+            # the catalog rows of the queried cycles, so that indexing other
+            # cycles or flows leaves the plot data current
+            criteria = {'cse': self.CSE, 'ctr_flw': flw_nme,
+                    'met_tool': self.MET_TOOL, 'vrf_ref': self.VRF_REF,
+                    'field': self.VRF_FLD, 'mem': idx, 'grid': grd,
+                    'cycle': [cyc.strftime('%Y%m%d%H') for cyc in cycs]}
+            key = CATALOG_KEY + json.dumps([catalog, criteria])
+            INPUT_MTIMES[key] = get_stamp(key)
+
+        for cyc in cycs:
+            in_path = in_root + '/' + flw_nme + '/' + self.MET_TOOL + '/' +\
+                    self.VRF_REF + '/' + cyc.strftime('%Y%m%d%H') + '/' +\
+                    idx + '/' + grd + '/' + self.VRF_FLD
+            INPUT_MTIMES[in_path] = get_mtime(in_path)
+            INPUT_MTIMES[in_path + '.bin'] = get_mtime(in_path + '.bin')
+
+    def load_data_range(self):
+        # load the assembled plot data from the disk cache if its inputs are
+        # unchanged, otherwise assemble it with gen_data_range and cache it
+        cache_path = self.gen_cache_path()
+        if os.path.isfile(cache_path):
+            try:
+                with open(cache_path, 'rb') as f:
+                    cache = pickle.load(f)
+
+                inputs = cache['inputs']
+                data = cache['data']
+
+            except (pickle.UnpicklingError, EOFError, ValueError,
+                    KeyError) as err:
+                print('Data cache ' + cache_path + ' is not readable,' +\
+                        ' rebuilding it: ' + repr(err))
+                inputs = None
+
+            if not inputs is None and all([get_stamp(key) == stamp
+                    for key, stamp in inputs.items()]):
+                INPUT_MTIMES.clear()
+                INPUT_MTIMES.update(inputs)
+                return data
+
+        INPUT_MTIMES.clear()
+        data = self.gen_data_range()
+        cache = {'inputs': dict(INPUT_MTIMES), 'data': data}
+
+        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+        tmp_path = cache_path + '.' + str(os.getpid())
+        with open(tmp_path, 'wb') as f:
+            pickle.dump(cache, f)
+
+        os.replace(tmp_path, cache_path)
+        return data
+
+    def gen_fig_key(self):
+        # hash of the class and all attributes of the plot defining the figure,
+        # with the addresses of palette functions removed from their repr
+        attrs = asdict(self, filter=lambda att, val: not att.name in
+                ['IF_SHOW', 'FORCE'])
+
+        # the range of colorbars with an ALPHA is set from the data in gen_fig
+        colorbar = attrs.get('COLORBAR')
+        if isinstance(colorbar, dict) and not colorbar.get('ALPHA') is None:
+            colorbar.pop('MIN', None)
+            colorbar.pop('MAX', None)
+
+        key = re.sub(r' at 0x[0-9a-f]+', '', repr([DATA_VERSION,
+            type(self).__name__, attrs]))
+        return hashlib.sha256(key.encode()).hexdigest()
+
+    def check_fig(self, out_path):
+        # check if the figure exists with the fingerprint of the plot and the
+        # current stamps of its inputs, to skip rendering it again
+        if self.FORCE or self.IF_SHOW or not os.path.isfile(out_path) or\
+                not os.path.isfile(out_path + FIG_STAMP):
+            return False
+
+        try:
+            with open(out_path + FIG_STAMP, 'r') as f:
+                stamp = json.load(f)
+
+            key = stamp['key']
+            inputs = stamp['inputs']
+
+        except (json.JSONDecodeError, KeyError) as err:
+            print('Figure stamp ' + out_path + FIG_STAMP + ' is not' +\
+                    ' readable, rendering the figure again: ' + repr(err))
+            return False
+
+        return key == self.gen_fig_key() and all([get_stamp(in_key) == val
+            for in_key, val in inputs.items()])
+
+    def write_fig_stamp(self, out_path):
+        # write the fingerprint of the plot and the stamps of the inputs of
+        # its data next to the figure
+        stamp = {'key': self.gen_fig_key(), 'inputs': dict(INPUT_MTIMES)}
+        tmp_path = out_path + FIG_STAMP + '.' + str(os.getpid())
+        with open(tmp_path, 'w') as f:
+            json.dump(stamp, f, indent=1)
+
+        os.replace(tmp_path, out_path + FIG_STAMP)
+
+    def gen_catalog(self):
+        # the stat catalog at the root of the verification tree, if indexed
+        in_root, out_root = self.gen_io_paths()
+        catalog = os.path.dirname(in_root) + '/' + StatCatalog.CATALOG
+        if os.path.isfile(catalog):
+            return catalog
+
+        return None
+
+    def gen_cube_path(self):
+        # the statistics cube of the plot, relative paths are in the case
+        if self.CUBE is None or os.path.isabs(self.CUBE):
+            return self.CUBE
+
+        in_root, out_root = self.gen_io_paths()
+        return in_root + '/' + self.CUBE
+
+    def query_stats(self, flw_nme, idx, grd, stats, **kwargs):
+        # query stats in the plotting region as a slice of the statistics
+        # cube if given, otherwise with the filters pushed down to the stores
+        cube_path = self.gen_cube_path()
+        if not cube_path is None:
+            mtime = get_mtime(cube_path)
+            if mtime is None:
+                raise FileNotFoundError('No statistics cube ' + cube_path +\
+                        ' exists.')
+
+            INPUT_MTIMES[cube_path] = mtime
+            return StatCube.queryCube(read_cube(cube_path, mtime), flw_nme, stats,
+                    grd=grd, mem=idx, masks=[self.MSK], **kwargs)
+
+        in_root, out_root = self.gen_io_paths()
+        self.track_inputs(flw_nme, idx, grd, kwargs['cycs'])
+        return StatStore.queryStats(in_root, flw_nme, self.MET_TOOL, self.VRF_REF,
+                self.VRF_FLD, stats, grd=grd, mem=idx, masks=[self.MSK],
+                catalog=self.gen_catalog(), loader=load_stats, **kwargs)
+
+    def load_data(self, request):
+        # load the stats of a data request in the plotting region as a
+        # normalized frame of the index columns with the STAT and VALUE
+        # columns, and VALUE_L / VALUE_U if the request has a CI
+        stats = {}
+        for stat_name in request.STATS:
+            stats[stat_name] = MET_TOOLS[self.MET_TOOL][stat_name]['type']
+
+        kwargs = {'cycs': request.CYCS, 'leads': request.LEADS,
+                  'thresholds': request.LEVS, 'ci': request.CI}
+        if not request.VALID_DTS is None:
+            kwargs['valid_range'] = [min(request.VALID_DTS),
+                    max(request.VALID_DTS)]
+
+        mem = '' if request.MEM_KEY is None else request.MEM_KEY
+        grd = '' if request.GRD_KEY is None else request.GRD_KEY
+        data = self.query_stats(request.FLW_NME, mem, grd, stats, **kwargs)
+
+        if not request.VALID_DTS is None:
+            data = data.loc[data['FCST_VALID_END'].isin(request.VALID_DTS)]
+
+        for stat_name in request.STATS:
+            if not (data['STAT'] == stat_name).any():
+                print('WARNING: no data exists for ' + request.FLW_NME +\
+                        ' ' + mem + ' ' + grd + ' ' + stat_name)
+                print('corresponding to plotting configuration.')
+
+        vals = DATA_COLS + ['STAT', 'VALUE']
+        if not request.CI is None:
+            vals += ['VALUE_L', 'VALUE_U']
+
+        return data[vals].reset_index(drop=True)
+
 @define
 class control_flow:
     NAME:str = field(
@@ -216,4 +613,43 @@ class control_flow:
             )
         )
 
+@define
+class data_request:
+    FLW_NME:str = field(
+        validator=[validators.instance_of(str),
+        validators.min_len(1)]
+        )
+    STATS:list = field(
+        validator=validators.deep_iterable(
+            member_validator=validators.instance_of(str),
+            iterable_validator=validators.instance_of(list))
+        )
+    CYCS:list = field(
+        converter=list,
+        )
+    MEM_KEY:str = field(
+        default=None,
+        validator=validators.optional(validators.instance_of(str)),
+        )
+    GRD_KEY:str = field(
+        default=None,
+        validator=validators.optional(validators.instance_of(str)),
+        )
+    VALID_DTS:list = field(
+        default=None,
+        converter=converters.optional(list),
+        )
+    LEADS:list = field(
+        default=None,
+        converter=converters.optional(list),
+        )
+    LEVS:list = field(
+        default=None,
+        converter=converters.optional(list),
+        )
+    CI:str = field(
+        default=None,
+        validator=validators.optional(validators.instance_of(str)),
+        )
+
 ##################################################################################
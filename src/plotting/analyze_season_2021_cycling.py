@@ -48,7 +48,8 @@ from plotting import *
 from heatplots import *
 from lineplots import *
 from colorbars import *
-import ipdb
+from batch import *
+import argparse
 
 ##################################################################################
 # Define script definitions to be used later
@@ -338,6 +339,15 @@ heatplot_multilevel_multilead_fss_relative_diff = {
 # Run plotting if called as script
 ##################################################################################
 if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Render the season figures.')
+    parser.add_argument('--workers', type=int, default=1,
+            help='number of processes rendering figures, 1 by default')
+    parser.add_argument('--force', action='store_true',
+            help='render figures that are current with their inputs')
+    args = parser.parse_args()
+
+    # collect the plot specifications of the sweep
+    specs = []
     for MSK in MSKS:
         # lineplots
         for DT in DTS:
@@ -355,10 +365,10 @@ if __name__ == '__main__':
             lineplot_fss_afss['VALID_DT'] = VALID_DT
             lineplot_fss_afss['MSK'] = MSK 
 
-            dual_lineplot(**lineplot_rmse_corr).gen_fig()
+            specs.append((dual_lineplot, dict(lineplot_rmse_corr)))
             for LEV in LEVS:
                 lineplot_fss_afss['LEV'] = LEV
-                dual_lineplot(**lineplot_fss_afss).gen_fig()
+                specs.append((dual_lineplot, dict(lineplot_fss_afss)))
 
         # raw stat heat plots
         for CTR_FLW in CTR_FLWS:
@@ -366,10 +376,10 @@ if __name__ == '__main__':
             heatplot_multidate_rmse['MSK'] = MSK 
             heatplot_multidate_fss['CTR_FLW'] = CTR_FLW
             heatplot_multidate_fss['MSK'] = MSK 
-            multidate_multilead(**heatplot_multidate_rmse).gen_fig()
+            specs.append((multidate_multilead, dict(heatplot_multidate_rmse)))
             for LEV in LEVS:
                 heatplot_multidate_fss['LEV'] = LEV
-                multidate_multilead(**heatplot_multidate_fss).gen_fig()
+                specs.append((multidate_multilead, dict(heatplot_multidate_fss)))
 
             for DT in DTS:
                 STRT_DT = DT[0]
@@ -381,7 +391,7 @@ if __name__ == '__main__':
                 heatplot_multilevel_multilead_fss['STOP_DT'] = STOP_DT
                 heatplot_multilevel_multilead_fss['VALID_DT'] = VALID_DT
                 heatplot_multilevel_multilead_fss['MSK'] = MSK 
-                multilevel_multilead(**heatplot_multilevel_multilead_fss).gen_fig()
+                specs.append((multilevel_multilead, dict(heatplot_multilevel_multilead_fss)))
 
         # relative diff heat plots
         for DIFF in DIFFS:
@@ -391,19 +401,19 @@ if __name__ == '__main__':
             heatplot_multidate_rmse_relative_diff['ANL_CTR_FLW'] = ANL
             heatplot_multidate_rmse_relative_diff['REF_CTR_FLW'] = REF
             heatplot_multidate_rmse_relative_diff['MSK'] = MSK 
-            multidate_multilead_relative_diff(**heatplot_multidate_rmse_relative_diff).gen_fig()
+            specs.append((multidate_multilead_relative_diff, dict(heatplot_multidate_rmse_relative_diff)))
 
             heatplot_fixedlead_fss_relative_diff['ANL_CTR_FLW'] = ANL
             heatplot_fixedlead_fss_relative_diff['REF_CTR_FLW'] = REF
             heatplot_fixedlead_fss_relative_diff['MSK'] = MSK 
-            multidate_fixedlead_relative_diff(**heatplot_fixedlead_fss_relative_diff).gen_fig()
+            specs.append((multidate_fixedlead_relative_diff, dict(heatplot_fixedlead_fss_relative_diff)))
 
             heatplot_multidate_fss_relative_diff['ANL_CTR_FLW'] = ANL
             heatplot_multidate_fss_relative_diff['REF_CTR_FLW'] = REF
             heatplot_multidate_fss_relative_diff['MSK'] = MSK 
             for LEV in LEVS:
                 heatplot_multidate_fss_relative_diff['LEV'] = LEV
-                multidate_multilead_relative_diff(**heatplot_multidate_fss_relative_diff).gen_fig()
+                specs.append((multidate_multilead_relative_diff, dict(heatplot_multidate_fss_relative_diff)))
 
             heatplot_multilevel_multilead_fss_relative_diff['ANL_CTR_FLW'] = ANL
             heatplot_multilevel_multilead_fss_relative_diff['REF_CTR_FLW'] = REF
@@ -418,4 +428,10 @@ if __name__ == '__main__':
                 heatplot_multilevel_multilead_fss_relative_diff['STOP_DT'] = STOP_DT
                 heatplot_multilevel_multilead_fss_relative_diff['VALID_DT'] = VALID_DT
                 
-                multilevel_multilead_relative_diff(**heatplot_multilevel_multilead_fss_relative_diff).gen_fig()
+                specs.append((multilevel_multilead_relative_diff, dict(heatplot_multilevel_multilead_fss_relative_diff)))
+
+    timings = render_specs(specs, workers=args.workers, force=args.force)
+
+    # exit with error if any figure of the sweep failed to render
+    if len(failed_specs(timings)) > 0:
+        sys.exit(1)
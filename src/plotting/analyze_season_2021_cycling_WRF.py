@@ -48,7 +48,8 @@ from plotting import *
 from heatplots import *
 from lineplots import *
 from colorbars import *
-import ipdb
+from batch import *
+import argparse
 
 ##################################################################################
 # Define script definitions to be used later
@@ -181,6 +182,15 @@ lineplot_fss_afss = {
 # Run plotting if called as script
 ##################################################################################
 if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Render the season figures.')
+    parser.add_argument('--workers', type=int, default=1,
+            help='number of processes rendering figures, 1 by default')
+    parser.add_argument('--force', action='store_true',
+            help='render figures that are current with their inputs')
+    args = parser.parse_args()
+
+    # collect the plot specifications of the sweep
+    specs = []
     for MSK in MSKS:
         # lineplots
         for DT in DTS:
@@ -198,8 +208,13 @@ if __name__ == '__main__':
             lineplot_fss_afss['VALID_DT'] = VALID_DT
             lineplot_fss_afss['MSK'] = MSK 
 
-            dual_lineplot(**lineplot_rmse_corr).gen_fig()
+            specs.append((dual_lineplot, dict(lineplot_rmse_corr)))
             for LEV in LEVS:
                 lineplot_fss_afss['LEV'] = LEV
-                dual_lineplot(**lineplot_fss_afss).gen_fig()
+                specs.append((dual_lineplot, dict(lineplot_fss_afss)))
 
+    timings = render_specs(specs, workers=args.workers, force=args.force)
+
+    # exit with error if any figure of the sweep failed to render
+    if len(failed_specs(timings)) > 0:
+        sys.exit(1)
@@ -0,0 +1,212 @@
+##################################################################################
+# Description
+##################################################################################
+# This module renders sweeps of figures from the plot classes in parallel with
+# the non-interactive Agg backend.  A sweep is a list of plot specifications
+# (plot class, template dictionary) that are grouped by their input data, so
+# that each group is rendered by one worker process reusing the stat stores
+# loaded by the first figure of the group, with large groups split evenly over
+# the workers, e.g.,
+#
+#     specs = [(dual_lineplot, dict(lineplot_rmse_corr)), ...]
+#     render_specs(specs, workers=8)
+#
+# The render time of every figure is reported and a failed figure is logged
+# without stopping the sweep.  Figures whose sidecar fingerprint matches their
+# plot attributes and inputs are skipped unless force is set, see check_fig.
+#
+##################################################################################
+# License Statement:
+##################################################################################
+# This software is Copyright © 2024 The Regents of the University of California.
+# All Rights Reserved. Permission to copy, modify, and distribute this software
+# and its documentation for educational, research and non-profit purposes,
+# without fee, and without a written agreement is hereby granted, provided that
+# the above copyright notice, this paragraph and the following three paragraphs
+# appear in all copies. Permission to make commercial use of this software may
+# be obtained by contacting:
+#
+#     Office of Innovation and Commercialization
+#     9500 Gilman Drive, Mail Code 0910
+#     University of California
+#     La Jolla, CA 92093-0910
+#     innovation@ucsd.edu
+#
+# This software program and documentation are copyrighted by The Regents of the
+# University of California. The software program and documentation are supplied
+# "as is", without any accompanying services from The Regents. The Regents does
+# not warrant that the operation of the program will be uninterrupted or
+# error-free. The end-user understands that the program was developed for
+# research purposes and is advised not to rely exclusively on the program for
+# any reason.
+#
+# IN NO EVENT SHALL THE UNIVERSITY OF CALIFORNIA BE LIABLE TO ANY PARTY FOR
+# DIRECT, INDIRECT, SPECIAL, INCIDENTAL, OR CONSEQUENTIAL DAMAGES, INCLUDING
+# LOST PROFITS, ARISING OUT OF THE USE OF THIS SOFTWARE AND ITS DOCUMENTATION,
+# EVEN IF THE UNIVERSITY OF CALIFORNIA HAS BEEN ADVISED OF THE POSSIBILITY OF
+# SUCH DAMAGE. THE UNIVERSITY OF CALIFORNIA SPECIFICALLY DISCLAIMS ANY
+# WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF
+# MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE. THE SOFTWARE PROVIDED
+# HEREUNDER IS ON AN “AS IS” BASIS, AND THE UNIVERSITY OF CALIFORNIA HAS NO
+# OBLIGATIONS TO PROVIDE MAINTENANCE, SUPPORT, UPDATES, ENHANCEMENTS, OR
+# MODIFICATIONS.
+# 
+##################################################################################
+# Imports
+##################################################################################
+from plotting import *
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing
+import contextlib
+import io
+import sys
+import time
+import traceback
+
+##################################################################################
+# Batch rendering routines
+##################################################################################
+def gen_spec_key(spec):
+    # the input data of a plot specification, the case, field and flows
+    plt_cls, kwargs = spec
+    flws = []
+    for attr in ['CTR_FLWS', 'CTR_FLW', 'ANL_CTR_FLW', 'REF_CTR_FLW']:
+        if attr in kwargs:
+            ctr_flws = kwargs[attr]
+            if not isinstance(ctr_flws, list):
+                ctr_flws = [ctr_flws]
+
+            flws += [ctr_flw.NAME for ctr_flw in ctr_flws]
+
+    return (kwargs['CSE'], kwargs['MET_TOOL'], kwargs['VRF_REF'],
+            kwargs['VRF_FLD'], tuple(sorted(set(flws))))
+
+def gen_spec_label(spec):
+    # a short label of a plot specification for the timing report
+    plt_cls, kwargs = spec
+    label = plt_cls.__name__ + ' ' + kwargs['MSK']
+    for attr in ['STAT_KEY', 'LEV', 'VALID_DT']:
+        if not kwargs.get(attr) is None:
+            label += ' ' + str(kwargs[attr])
+
+    flws = gen_spec_key(spec)[-1]
+    return label + ' ' + ','.join(flws)
+
+def group_specs(specs, workers=1):
+    # group plot specifications sharing input data in the sweep order, where
+    # groups are split in runs of at most an even share of the sweep per worker
+    groups = {}
+    for spec in specs:
+        groups.setdefault(gen_spec_key(spec), []).append(spec)
+
+    size = max(1, -(-len(specs) // workers))
+    chunks = []
+    for group in groups.values():
+        for i_s in range(0, len(group), size):
+            chunks.append(group[i_s:i_s + size])
+
+    return chunks
+
+# Groups of plot specifications of the sweep being rendered, inherited by the
+# forked workers since colorbars hold unpicklable palettes
+SPEC_GROUPS = []
+
+def init_worker():
+    # render without a display in the worker processes
+    plt.switch_backend('Agg')
+
+def render_group(specs, force=False):
+    # render a group of plot specifications, returning the timing and status
+    # of each figure and the log text so that groups can be rendered by workers
+    log_f = io.StringIO()
+    timings = []
+    for spec in specs:
+        plt_cls, kwargs = spec
+        kwargs = dict(kwargs, IF_SHOW=False, FORCE=force)
+        label = gen_spec_label(spec)
+        t0 = time.perf_counter()
+        try:
+            with contextlib.redirect_stdout(log_f):
+                fig = plt_cls(**kwargs)
+                if fig.check_fig(fig.gen_out_path()):
+                    status = 'current'
+
+                else:
+                    fig.gen_fig()
+                    status = 'done'
+
+        except Exception:
+            print('ERROR: failed to render ' + label, file=log_f)
+            print(traceback.format_exc(), file=log_f)
+            plt.close('all')
+            status = 'FAILED'
+
+        timings.append((label, time.perf_counter() - t0, status))
+
+    return timings, log_f.getvalue()
+
+def render_index(i_g, force=False):
+    # render a group of the sweep in a forked worker by its index
+    return render_group(SPEC_GROUPS[i_g], force=force)
+
+def render_specs(specs, workers=1, force=False, log_f=None):
+    # render the figures of a list of (plot class, template dictionary)
+    # specifications over a pool of worker processes, reporting the render
+    # time of each figure, where figures current with their fingerprint are
+    # skipped unless forced, returns the list of (label, seconds, status)
+    if workers < 1:
+        raise ValueError('workers must be a positive integer.')
+
+    if log_f is None:
+        log_f = sys.stdout
+
+    groups = group_specs(specs, workers=workers)
+    t0 = time.perf_counter()
+    if workers > 1 and len(groups) > 1:
+        SPEC_GROUPS[:] = groups
+        try:
+            with ProcessPoolExecutor(max_workers=min(workers, len(groups)),
+                    mp_context=multiprocessing.get_context('fork'),
+                    initializer=init_worker) as pool:
+                results = list(pool.map(render_index, range(len(groups)),
+                    [force] * len(groups)))
+
+        finally:
+            SPEC_GROUPS.clear()
+
+    else:
+        init_worker()
+        results = [render_group(group, force=force) for group in groups]
+
+    timings = []
+    for group_timings, log_text in results:
+        print(log_text, end='', file=log_f)
+        timings += group_timings
+
+    for label, seconds, status in timings:
+        print(INDT + '%8.2fs %s %s' % (seconds, status, label), file=log_f)
+
+    statuses = [timing[2] for timing in timings]
+    print('Rendered ' + str(statuses.count('done')) + ', skipped ' +\
+            str(statuses.count('current')) + ' current and failed ' +\
+            str(statuses.count('FAILED')) + ' of ' + str(len(timings)) +\
+            ' figures in ' + str(len(groups)) + ' groups in %.1fs' %\
+            (time.perf_counter() - t0), file=log_f)
+
+    return timings
+
+def failed_specs(timings, log_f=None):
+    # log each figure that failed to render in the timings of render_specs,
+    # returning their labels so that a sweep with failures exits with error
+    if log_f is None:
+        log_f = sys.stdout
+
+    failed = [label for label, seconds, status in timings
+              if status == 'FAILED']
+    for label in failed:
+        print('ERROR: figure ' + label + ' failed to render.', file=log_f)
+
+    return failed
+
+##################################################################################
+# end
@@ -43,13 +43,14 @@
 # Imports
 ##################################################################################
 from plotting import *
-from matplotlib.colors import BoundaryNorm, ListedColormap
 import math
 from functools import partial
 
 ##################################################################################
 # Load workflow constants and Utility Methods
 ##################################################################################
+mcolors = lazy_module('matplotlib.colors')
+
 def check_length(instance, attribute, value):
     if not len(instance.LABELS) == len(instance.THRESHOLDS): 
         raise ValueError('Thresholds and labels must have equal length.')
@@ -91,12 +92,12 @@ class explicit_discrete(colorbars):
                     ' integer argument for the number of color bins.')
 
     def get_norm(self):
-        return BoundaryNorm(self.THRESHOLDS,
+        return mcolors.BoundaryNorm(self.THRESHOLDS,
                 ncolors=(len(self.THRESHOLDS) - 1),
                 clip=True)
 
     def get_colormap(self):
-        return ListedColormap(self.PALLETE(len(self.THRESHOLDS) - 1))
+        return mcolors.ListedColormap(self.PALLETE(len(self.THRESHOLDS) - 1))
 
     def get_ticks_labels(self):
         return self.THRESHOLDS, self.LABELS
@@ -159,7 +160,7 @@ class implicit_discrete(colorbars):
         step_order = math.floor(math.log(step_size, 10))
         round_order = abs(min(0, step_order))
         norm = np.around(norm, decimals=round_order)
-        return BoundaryNorm(norm, ncolors=self.NCOL)
+        return mcolors.BoundaryNorm(norm, ncolors=self.NCOL)
 
     def get_ticks_labels(self):
         if self.MIN is None:
@@ -179,7 +180,7 @@ class implicit_discrete(colorbars):
         return ticks, labels
 
     def get_colormap(self):
-        return ListedColormap(self.PALLETE(self.NCOL))
+        return mcolors.ListedColormap(self.PALLETE(self.NCOL))
 
 ##################################################################################
 # Dictionaries for colorbar defs
@@ -96,6 +96,34 @@ def check_ref_mem_key(instance, attribute, value):
         raise ValueError('ERROR: ' + value + ' is not a member' +\
                 ' of ' + instance.REF_CTR_FLW.NAME)
 
+def gen_grid(data, stat_key, row_key, row_vals, col_key, col_vals):
+    # pivot the stat onto the row / column axes with a single reindex, taking
+    # the first row of each cell, missing cells are filled with NaN
+    grid = data.drop_duplicates(subset=[row_key, col_key])
+    grid = grid.set_index([row_key, col_key])[stat_key].astype('float64')
+    cells = pd.MultiIndex.from_product([row_vals, col_vals])
+    grid = grid.reindex(cells).to_numpy()
+
+    return grid.reshape(len(row_vals), len(col_vals))
+
+def gen_relative_diff(anl_grid, ref_grid, stat_key, if_loss=True):
+    # compute percent relative differences of the analyzed versus reference
+    # grids, masking cells where either value is missing or nearly zero, where
+    # the sign is flipped for RMSE so that positive is an improvement
+    with np.errstate(invalid='ignore', divide='ignore'):
+        valid = (np.abs(ref_grid) > 0.1) & (np.abs(anl_grid) > 0.1)
+
+        if if_loss and stat_key == 'RMSE':
+            diff = ref_grid - anl_grid
+        else:
+            diff = anl_grid - ref_grid
+
+        plt_data = np.where(valid, 100 * diff / ref_grid, np.nan)
+
+    cell_data = np.where(valid, ref_grid, np.nan)
+
+    return plt_data, cell_data
+
 ##################################################################################
 # Plots lead time vertically versus valid date horizontally
 
@@ -181,7 +209,7 @@ class multidate_multilead(plot):
         for i_nd in range(num_dts):
             # generate the tick label
             anl_dt = anl_dts[i_nd]
-            date_keys.append(anl_dt.strftime('%Y%m%d_%H%M%S'))
+            date_keys.append(anl_dt)
 
             if ( i_nd % 2 ) == 0 or num_dts < 10:
                 # if 10 or more dates, only use every other as a label
@@ -210,7 +238,7 @@ class multidate_multilead(plot):
             seconds = str(int(lead % 60)).zfill(2)
             minutes = str(int(lead % 3600)).zfill(2)
             hours = str(int(lead / 3600 ))
-            fcst_lds.append(hours + minutes + seconds)
+            fcst_lds.append(int(lead))
 
             tick_label = hours
             if not seconds == '00':
@@ -256,74 +284,21 @@ class multidate_multilead(plot):
         # generate sequence of forecast leads for data
         fcst_lds, ld_labs = self.gen_fcst_lds_labs()
 
-        # check for valid IO parameters for plotting
-        in_root, out_root = self.gen_io_paths()
-
-        flw_nme = self.CTR_FLW.NAME
-        if self.MEM_KEY is None:
-            idx = ''
-        else:
-            idx = self.MEM_KEY
-
-        if self.GRD_KEY is None:
-            grd = ''
+        if self.LEV is None:
+            levs = None
         else:
-            grd = self.GRD_KEY
-
-        data_root = in_root + '/' + flw_nme + '/' + self.MET_TOOL + '/' +\
-                self.VRF_REF
-
-        stat_name = self.STAT_KEY
-        stat_type = MET_TOOLS[self.MET_TOOL][stat_name]['type']
-
-        for fcst_zh in fcst_zhs:
-            # define the input name
-            in_path = data_root + '/' + fcst_zh.strftime('%Y%m%d%H') +\
-                    '/' + idx + '/' + grd + '/' + self.VRF_FLD + '.bin'
-
-            try:
-                with open(in_path, 'rb') as f:
-                    stat_data = pickle.load(f)
-                    stat_data = stat_data[stat_type]
-            except:
-                print('WARNING: input data ' + in_path + ' statistics ' +\
-                       stat_type + ' does not exist, skipping this' +\
-                       ' configuration.')
-                continue
-
-            # load the values to be plotted along with landmask and lead
-            vals = [
-                    'VX_MASK',
-                    'FCST_LEAD',
-                    'FCST_VALID_END',
-                    stat_name,
-                   ]
-
-            if not self.LEV is None:
-                vals += ['FCST_THRESH']
-
-            # cut down df to specified valid dates /leads / region / stat
-            stat_data = stat_data[vals]
-            stat_data = stat_data.loc[(stat_data['VX_MASK'] == self.MSK)]
-            stat_data = stat_data.loc[(stat_data['FCST_VALID_END'].isin(date_keys))]
-            stat_data = stat_data.loc[(stat_data['FCST_LEAD'].isin(fcst_lds))]
-            if not self.LEV is None:
-                stat_data = \
-                stat_data.loc[(stat_data['FCST_THRESH'] == self.LEV)]
+            levs = [self.LEV]
 
-            # check if there is data for this configuration and these fields
-            if not stat_data.empty:
-                if 'data' in data_range:
-                    # if there is existing data, merge dataframes
-                    data_range['data'] = \
-                             pd.concat([data_range['data'], stat_data], axis=0)
-                else:
-                    # if this is a first instance, create fields
-                    data_range['data'] = stat_data
+        # load the values to be plotted with region / date / lead filters
+        request = data_request(FLW_NME=self.CTR_FLW.NAME,
+                MEM_KEY=self.MEM_KEY, GRD_KEY=self.GRD_KEY,
+                STATS=[self.STAT_KEY], CYCS=fcst_zhs, VALID_DTS=date_keys,
+                LEADS=fcst_lds, LEVS=levs)
+        stat_data = select_stat(self.load_data(request), self.STAT_KEY)
 
-            else:
-                print('WARNING: no data exists in:\n' + INDT + in_path)
-                print('corresponding to plotting configuration.')
+        # check if there is data for this configuration and these fields
+        if not stat_data.empty:
+            data_range['data'] = stat_data
 
         data_range['date_keys'] = date_keys
         data_range['date_labs'] = date_labs
@@ -332,9 +307,49 @@ class multidate_multilead(plot):
 
         return data_range
 
+    def gen_out_path(self):
+        # the path of the figure
+        in_root, out_root = self.gen_io_paths()
+        out_path = out_root + '/' +\
+                self.VRF_STRT.strftime('%Y%m%d%H') + '-to-'+\
+                self.VRF_STOP.strftime('%Y%m%d%H') + '_FCST-'+\
+                str(self.MIN_LD) + 'hrs-' + str(self.MAX_LD) + 'hrs_'+\
+                self.MSK + '_' + self.STAT_KEY + '_'
+
+
+        if not self.LEV is None:
+            out_path += '_lev'
+            lev_split = re.split(r'\D+', self.LEV)
+            for split in lev_split:
+                if split:
+                    out_path += '_' + split
+
+        out_path += '_' + self.CTR_FLW.NAME
+
+        if not self.MEM_KEY is None:
+            out_path += '_' + self.MEM_KEY
+
+        if not self.GRD_KEY is None:
+            out_path += '_' + self.GRD_KEY
+
+        if not self.FIG_LAB is None:
+            out_path += '_' + self.FIG_LAB
+
+        out_path += '_heatplot.png'
+
+        return out_path
+
     def gen_fig(self):
+        # skip rendering if the figure is current with its inputs
+        out_path = self.gen_out_path()
+        if self.check_fig(out_path):
+            return
+
+        # render headless unless the figure is shown
+        set_backend(self.IF_SHOW)
+
         # generate the plot data
-        data_range = self.gen_data_range()
+        data_range = self.load_data_range()
         data = data_range['data']
         date_keys = data_range['date_keys']
         date_labs = data_range['date_labs']
@@ -348,23 +363,9 @@ class multidate_multilead(plot):
         ax0 = fig.add_axes([.92, .18, .03, .72])
         ax1 = fig.add_axes([.07, .18, .84, .72])
 
-        # create array storage for stats
-        num_lds = len(fcst_lds)
-        num_dts = len(date_keys)
-        plt_data = np.full([num_lds, num_dts], np.nan)
-
-        for i_nd in range(num_dts):
-            for i_nl in range(num_lds):
-                try:
-                    # try to load data for the date / lead combination
-                    val = data.loc[(data['FCST_LEAD'] == fcst_lds[i_nl]) &\
-                            (data['FCST_VALID_END'] == date_keys[i_nd])]
-
-                    if not val.empty:
-                        plt_data[i_nl, i_nd] = val[self.STAT_KEY].iloc[0]
-
-                except:
-                    continue
+        # assemble the stats on the plot axes
+        plt_data = gen_grid(data, self.STAT_KEY, 'FCST_LEAD', fcst_lds,
+                'FCST_VALID_END', date_keys)
 
         colorbar = self.COLORBAR
         if hasattr(colorbar, 'ALPHA'):
@@ -410,36 +411,9 @@ class multidate_multilead(plot):
         plt.figtext(.91, .90, obs_title, horizontalalignment='right',
                 verticalalignment='bottom', fontsize = 16)
 
-        in_root, out_root = self.gen_io_paths()
-        out_path = out_root + '/' +\
-                self.VRF_STRT.strftime('%Y%m%d%H') + '-to-'+\
-                self.VRF_STOP.strftime('%Y%m%d%H') + '_FCST-'+\
-                str(self.MIN_LD) + 'hrs-' + str(self.MAX_LD) + 'hrs_'+\
-                self.MSK + '_' + self.STAT_KEY + '_'
-
-
-        if not self.LEV is None:
-            out_path += '_lev'
-            lev_split = re.split(r'\D+', self.LEV)
-            for split in lev_split:
-                if split:
-                    out_path += '_' + split
-
-        out_path += '_' + self.CTR_FLW.NAME
-
-        if not self.MEM_KEY is None:
-            out_path += '_' + self.MEM_KEY
-
-        if not self.GRD_KEY is None:
-            out_path += '_' + self.GRD_KEY
-
-        if not self.FIG_LAB is None:
-            out_path += '_' + self.FIG_LAB
-
-        out_path += '_heatplot.png'
-
         # save figure and display
         plt.savefig(out_path)
+        self.write_fig_stamp(out_path)
         if self.IF_SHOW:
             plt.show()
         plt.close()
@@ -502,7 +476,7 @@ class multilevel_multilead(plot):
             seconds = str(int(lead % 60)).zfill(2)
             minutes = str(int(lead % 3600)).zfill(2)
             hours = str(int(lead / 3600 ))
-            fcst_lds.append(hours + minutes + seconds)
+            fcst_lds.append(int(lead))
 
             tick_label = hours
             if not seconds == '00':
@@ -549,75 +523,19 @@ class multilevel_multilead(plot):
         # generate storage for the forecast thresholds
         fcst_lvs = []
 
-        # check for valid IO parameters for plotting
-        in_root, out_root = self.gen_io_paths()
-
-        flw_nme = self.CTR_FLW.NAME
-        if self.MEM_KEY is None:
-            idx = ''
-        else:
-            idx = self.MEM_KEY
-
-        if self.GRD_KEY is None:
-            grd = ''
-        else:
-            grd = self.GRD_KEY
-
-        data_root = in_root + '/' + flw_nme + '/' + self.MET_TOOL + '/' +\
-                self.VRF_REF
-
-        stat_name = self.STAT_KEY
-        stat_type = MET_TOOLS[self.MET_TOOL][stat_name]['type']
-
-        for fcst_zh in fcst_zhs:
-            # define the input name
-            in_path = data_root + '/' + fcst_zh.strftime('%Y%m%d%H') +\
-                    '/' + idx + '/' + grd + '/' + self.VRF_FLD + '.bin'
-
-            try:
-                with open(in_path, 'rb') as f:
-                    data = pickle.load(f)
-                    data = data[stat_type]
-            except:
-                print('WARNING: input data ' + in_path + ' statistics ' +\
-                       stat_type + ' does not exist, skipping this' +\
-                       ' configuration.')
-                continue
-
-            # load the values to be plotted along with landmask and lead
-            vals = [
-                    'VX_MASK',
-                    'FCST_LEAD',
-                    'FCST_VALID_END',
-                    'FCST_THRESH',
-                    stat_name,
-                   ]
-
-            # cut down df to specified valid dates /leads / region / stat
-            stat_data = data[vals]
-            stat_data = stat_data.loc[(stat_data['VX_MASK'] == self.MSK)]
-            stat_data = stat_data.loc[(stat_data['FCST_VALID_END'] ==
-                self.VALID_DT.strftime('%Y%m%d_%H%M%S'))]
-            stat_data = stat_data.loc[(stat_data['FCST_LEAD'].isin(fcst_lds))]
+        # load the values to be plotted with region / date / lead filters
+        request = data_request(FLW_NME=self.CTR_FLW.NAME,
+                MEM_KEY=self.MEM_KEY, GRD_KEY=self.GRD_KEY,
+                STATS=[self.STAT_KEY], CYCS=fcst_zhs,
+                VALID_DTS=[self.VALID_DT], LEADS=fcst_lds)
+        stat_data = select_stat(self.load_data(request), self.STAT_KEY)
 
-            # check if there is data for this configuration and these fields
-            if not stat_data.empty:
-                # obtain the sorted thresholds
-                lvs = sorted(list(set(stat_data['FCST_THRESH'].values)),
-                        key=lambda x:(len(x.split('.')[0]), x), reverse=True)
-                fcst_lvs += lvs
-
-                if data_range:
-                    # if there is existing data, merge dataframes
-                    data_range['data'] = \
-                             pd.concat([data_range['data'], stat_data], axis=0)
-                else:
-                    # if this is a first instance, create fields
-                    data_range['data'] = stat_data
+        # check if there is data for this configuration and these fields
+        if not stat_data.empty:
+            # obtain the thresholds
+            fcst_lvs += list(set(stat_data['FCST_THRESH'].values))
 
-            else:
-                print('WARNING: no data exists in:\n' + INDT + in_path)
-                print('corresponding to plotting configuration.')
+            data_range['data'] = stat_data
 
         # Unique levels are inferred from the data over all forecast start dates
         fcst_lvs = sorted(list(set(fcst_lvs)),
@@ -629,9 +547,36 @@ class multilevel_multilead(plot):
 
         return data_range
 
+    def gen_out_path(self):
+        # the path of the figure
+        in_root, out_root = self.gen_io_paths()
+        out_path = out_root + '/' + self.VALID_DT.strftime('%Y%m%d%H') + '_' +\
+                self.MSK  + '_' + self.STAT_KEY + '_' + self.CTR_FLW.NAME
+
+        if not self.MEM_KEY is None:
+            out_path += '_' + self.MEM_KEY
+
+        if not self.GRD_KEY is None:
+            out_path += '_' + self.GRD_KEY
+
+        if not self.FIG_LAB is None:
+            out_path += '_' + self.FIG_LAB
+
+        out_path += '_all-level_heatplot.png'
+
+        return out_path
+
     def gen_fig(self):
+        # skip rendering if the figure is current with its inputs
+        out_path = self.gen_out_path()
+        if self.check_fig(out_path):
+            return
+
+        # render headless unless the figure is shown
+        set_backend(self.IF_SHOW)
+
         # generate the plot data
-        data_range = self.gen_data_range()
+        data_range = self.load_data_range()
         data = data_range['data']
         fcst_lds = data_range['fcst_lds']
         ld_labs = data_range['ld_labs']
@@ -644,23 +589,9 @@ class multilevel_multilead(plot):
         ax0 = fig.add_axes([.92, .18, .03, .72])
         ax1 = fig.add_axes([.07, .18, .84, .72])
 
-        # create array storage for stats
-        num_lds = len(fcst_lds)
-        num_lvs = len(fcst_lvs)
-        plt_data = np.full([num_lvs, num_lds], np.nan)
-
-        for i_nv in range(num_lvs):
-            for i_nd in range(num_lds):
-                try:
-                    # try to load data for the date / lead combination
-                    val = data.loc[(data['FCST_LEAD'] == fcst_lds[i_nd]) &\
-                            (data['FCST_THRESH'] == fcst_lvs[i_nv])]
-
-                    if not val.empty:
-                        plt_data[i_nv, i_nd] = val[self.STAT_KEY].iloc[0]
-
-                except:
-                    continue
+        # assemble the stats on the plot axes
+        plt_data = gen_grid(data, self.STAT_KEY, 'FCST_THRESH', fcst_lvs,
+                'FCST_LEAD', fcst_lds)
 
         colorbar = self.COLORBAR
         if hasattr(colorbar, 'ALPHA'):
@@ -706,23 +637,9 @@ class multilevel_multilead(plot):
         plt.figtext(.91, .90, obs_title, horizontalalignment='right',
                 verticalalignment='bottom', fontsize = 16)
 
-        in_root, out_root = self.gen_io_paths()
-        out_path = out_root + '/' + self.VALID_DT.strftime('%Y%m%d%H') + '_' +\
-                self.MSK  + '_' + self.STAT_KEY + '_' + self.CTR_FLW.NAME
-
-        if not self.MEM_KEY is None:
-            out_path += '_' + self.MEM_KEY
-
-        if not self.GRD_KEY is None:
-            out_path += '_' + self.GRD_KEY
-
-        if not self.FIG_LAB is None:
-            out_path += '_' + self.FIG_LAB
-
-        out_path += '_all-level_heatplot.png'
-
         # save figure and display
         plt.savefig(out_path)
+        self.write_fig_stamp(out_path)
         if self.IF_SHOW:
             plt.show()
         plt.close()
@@ -828,7 +745,7 @@ class multidate_multilead_relative_diff(plot):
         for i_nd in range(num_dts):
             # generate the tick label
             anl_dt = anl_dts[i_nd]
-            date_keys.append(anl_dt.strftime('%Y%m%d_%H%M%S'))
+            date_keys.append(anl_dt)
 
             if ( i_nd % 2 ) == 0 or num_dts < 10:
                 # if 10 or more dates, only use every other as a label
@@ -857,7 +774,7 @@ class multidate_multilead_relative_diff(plot):
             seconds = str(int(lead % 60)).zfill(2)
             minutes = str(int(lead % 3600)).zfill(2)
             hours = str(int(lead / 3600 ))
-            fcst_lds.append(hours + minutes + seconds)
+            fcst_lds.append(int(lead))
 
             tick_label = hours
             if not seconds == '00':
@@ -908,14 +825,6 @@ class multidate_multilead_relative_diff(plot):
         # generate the date range and forecast leads for the analysis, parse binary files
         # for relevant fields
         data_range = {}
-        for cfg in ['ANL', 'REF']:
-            data_range[cfg] = {}
-            exec('data_range["%s"]["flw_nme"] = self.%s_CTR_FLW.NAME' \
-                    % (cfg,cfg))
-            exec('data_range["%s"]["mem_key"] = self.%s_MEM_KEY' \
-                    % (cfg,cfg))
-            exec('data_range["%s"]["grd_key"] = self.%s_GRD_KEY' \
-                    % (cfg,cfg))
 
         # generate sequence of forecast zero hours for sourcing data
         fcst_zhs, date_keys, date_labs = self.gen_fcst_dts_labs()
@@ -923,79 +832,26 @@ class multidate_multilead_relative_diff(plot):
         # generate sequence of forecast leads for data
         fcst_lds, ld_labs = self.gen_fcst_lds_labs()
 
-        # check for valid IO parameters for plotting
-        in_root, out_root = self.gen_io_paths()
+        if self.LEV is None:
+            levs = None
+        else:
+            levs = [self.LEV]
 
         for cfg in ['ANL', 'REF']:
+            data_range[cfg] = {}
             tmp_dict = data_range[cfg]
-            flw_nme = tmp_dict['flw_nme']
-            mem_key = tmp_dict['mem_key']
-            grd_key = tmp_dict['grd_key']
 
-            if mem_key is None:
-                idx = ''
-            else:
-                idx = mem_key
+            # load the values to be plotted with region / date / lead filters
+            request = data_request(FLW_NME=getattr(self, cfg + '_CTR_FLW').NAME,
+                    MEM_KEY=getattr(self, cfg + '_MEM_KEY'),
+                    GRD_KEY=getattr(self, cfg + '_GRD_KEY'),
+                    STATS=[self.STAT_KEY], CYCS=fcst_zhs,
+                    VALID_DTS=date_keys, LEADS=fcst_lds, LEVS=levs)
+            stat_data = select_stat(self.load_data(request), self.STAT_KEY)
 
-            if grd_key is None:
-                grd = ''
-            else:
-                grd = grd_key
-
-            data_root = in_root + '/' + flw_nme + '/' + self.MET_TOOL + '/' +\
-                    self.VRF_REF
-
-            stat_name = self.STAT_KEY
-            stat_type = MET_TOOLS[self.MET_TOOL][stat_name]['type']
-
-            for fcst_zh in fcst_zhs:
-                # define the input name
-                in_path = data_root + '/' + fcst_zh.strftime('%Y%m%d%H') +\
-                        '/' + idx + '/' + grd + '/' + self.VRF_FLD + '.bin'
-
-                try:
-                    with open(in_path, 'rb') as f:
-                        data = pickle.load(f)
-                        data = data[stat_type]
-                except:
-                    print('WARNING: input data ' + in_path + ' statistics ' +\
-                           stat_type + ' does not exist, skipping this' +\
-                           ' configuration.')
-                    continue
-
-                # load the values to be plotted along with landmask and lead
-                vals = [
-                        'VX_MASK',
-                        'FCST_LEAD',
-                        'FCST_VALID_END',
-                        stat_name,
-                       ]
-
-                if not self.LEV is None:
-                    vals += ['FCST_THRESH']
-
-                # cut down df to specified valid dates /leads / region / stat
-                stat_data = data[vals]
-                stat_data = stat_data.loc[(stat_data['VX_MASK'] == self.MSK)]
-                stat_data = stat_data.loc[(stat_data['FCST_VALID_END'].isin(date_keys))]
-                stat_data = stat_data.loc[(stat_data['FCST_LEAD'].isin(fcst_lds))]
-                if not self.LEV is None:
-                    stat_data = \
-                    stat_data.loc[(stat_data['FCST_THRESH'] == self.LEV)]
-
-                # check if there is data for this configuration and these fields
-                if not stat_data.empty:
-                    if 'data' in tmp_dict:
-                        # if there is existing data, merge dataframes
-                        tmp_dict['data'] = \
-                                 pd.concat([tmp_dict['data'], stat_data], axis=0)
-                    else:
-                        # if this is a first instance, create fields
-                        tmp_dict['data'] = stat_data
-
-                else:
-                    print('WARNING: no data exists in:\n' + INDT + in_path)
-                    print('corresponding to plotting configuration.')
+            # check if there is data for this configuration and these fields
+            if not stat_data.empty:
+                tmp_dict['data'] = stat_data
 
         data_range['date_keys'] = date_keys
         data_range['date_labs'] = date_labs
@@ -1004,9 +860,61 @@ class multidate_multilead_relative_diff(plot):
 
         return data_range
 
+    def gen_out_path(self):
+        # the path of the figure
+        in_root, out_root = self.gen_io_paths()
+        out_path = out_root + '/' +\
+                self.VRF_STRT.strftime('%Y%m%d%H') + '-to-'+\
+                self.VRF_STOP.strftime('%Y%m%d%H') + '_FCST-'+\
+                str(self.MIN_LD) + 'hrs-' + str(self.MAX_LD) + 'hrs_'+\
+                self.MSK + '_' + self.STAT_KEY + '_'
+
+
+        if not self.LEV is None:
+            out_path += '_lev'
+            lev_split = re.split(r'\D+', self.LEV)
+            for split in lev_split:
+                if split:
+                    out_path += '_' + split
+
+        out_path += '_relative_difference'
+        out_path += '_' + self.ANL_CTR_FLW.NAME
+
+        if not self.ANL_MEM_KEY is None:
+            out_path += '_' + self.ANL_MEM_KEY
+
+        if not self.ANL_GRD_KEY is None:
+            out_path += '_' + self.ANL_GRD_KEY
+
+        if not self.FIG_LAB is None:
+            out_path += '_' + self.FIG_LAB
+
+        out_path += '_' + self.REF_CTR_FLW.NAME
+
+        if not self.REF_MEM_KEY is None:
+            out_path += '_' + self.REF_MEM_KEY
+
+        if not self.REF_GRD_KEY is None:
+            out_path += '_' + self.REF_GRD_KEY
+
+        if not self.FIG_LAB is None:
+            out_path += '_' + self.FIG_LAB
+
+        out_path += '_heatplot.png'
+
+        return out_path
+
     def gen_fig(self):
+        # skip rendering if the figure is current with its inputs
+        out_path = self.gen_out_path()
+        if self.check_fig(out_path):
+            return
+
+        # render headless unless the figure is shown
+        set_backend(self.IF_SHOW)
+
         # generate the plot data
-        data_range = self.gen_data_range()
+        data_range = self.load_data_range()
         anl_data = data_range['ANL']['data']
         ref_data = data_range['REF']['data']
         date_keys = data_range['date_keys']
@@ -1021,44 +929,13 @@ class multidate_multilead_relative_diff(plot):
         ax0 = fig.add_axes([.86, .24, .05, .56])
         ax1 = fig.add_axes([.07, .16, .78, .72])
 
-        # create array storage for stats
-        num_lds = len(fcst_lds)
-        num_dts = len(date_keys)
-        plt_data = np.full([num_lds, num_dts], np.nan)
-        cell_data = np.full([num_lds, num_dts], np.nan)
-
-        for i_nd in range(num_dts):
-            for i_nl in range(num_lds):
-                try:
-                    # try to load data for the date / lead combination
-                    anl_val = anl_data.loc[(anl_data['FCST_LEAD'] == fcst_lds[i_nl]) &\
-                            (anl_data['FCST_VALID_END'] == date_keys[i_nd])]
-
-                    ref_val = ref_data.loc[(ref_data['FCST_LEAD'] == fcst_lds[i_nl]) &\
-                            (ref_data['FCST_VALID_END'] == date_keys[i_nd])]
-
-
-                    if not anl_val.empty and not ref_val.empty:
-                        anl_val = float(anl_val[self.STAT_KEY].iloc[0])
-                        ref_val = float(ref_val[self.STAT_KEY].iloc[0])
-
-                        if np.abs(ref_val) <= 0.1 or\
-                                np.abs(anl_val) <= 0.1 or\
-                                np.isnan(ref_val) or\
-                                np.isnan(anl_val):
-                            pass
-                        else:
-                            cell_data[i_nl, i_nd] = ref_val
-
-                            if self.STAT_KEY == 'RMSE':
-                                plt_data[i_nl, i_nd] =\
-                                        100 * (ref_val - anl_val) / ref_val
-                            else:
-                                plt_data[i_nl, i_nd] =\
-                                        100 * (anl_val - ref_val) / ref_val
-
-                except:
-                    continue
+        # assemble the stats on the plot axes
+        anl_grid = gen_grid(anl_data, self.STAT_KEY, 'FCST_LEAD', fcst_lds,
+                'FCST_VALID_END', date_keys)
+        ref_grid = gen_grid(ref_data, self.STAT_KEY, 'FCST_LEAD', fcst_lds,
+                'FCST_VALID_END', date_keys)
+        plt_data, cell_data = gen_relative_diff(anl_grid, ref_grid,
+                self.STAT_KEY)
 
         colorbar = self.COLORBAR
         if hasattr(colorbar, 'ALPHA'):
@@ -1112,48 +989,9 @@ class multidate_multilead_relative_diff(plot):
         plt.figtext(.86, .87, 'Skill\nGain', horizontalalignment='left',
                     verticalalignment='top', fontsize=20)
 
-        in_root, out_root = self.gen_io_paths()
-        out_path = out_root + '/' +\
-                self.VRF_STRT.strftime('%Y%m%d%H') + '-to-'+\
-                self.VRF_STOP.strftime('%Y%m%d%H') + '_FCST-'+\
-                str(self.MIN_LD) + 'hrs-' + str(self.MAX_LD) + 'hrs_'+\
-                self.MSK + '_' + self.STAT_KEY + '_'
-
-
-        if not self.LEV is None:
-            out_path += '_lev'
-            lev_split = re.split(r'\D+', self.LEV)
-            for split in lev_split:
-                if split:
-                    out_path += '_' + split
-
-        out_path += '_relative_difference'
-        out_path += '_' + self.ANL_CTR_FLW.NAME
-
-        if not self.ANL_MEM_KEY is None:
-            out_path += '_' + self.ANL_MEM_KEY
-
-        if not self.ANL_GRD_KEY is None:
-            out_path += '_' + self.ANL_GRD_KEY
-
-        if not self.FIG_LAB is None:
-            out_path += '_' + self.FIG_LAB
-
-        out_path += '_' + self.REF_CTR_FLW.NAME
-
-        if not self.REF_MEM_KEY is None:
-            out_path += '_' + self.REF_MEM_KEY
-
-        if not self.REF_GRD_KEY is None:
-            out_path += '_' + self.REF_GRD_KEY
-
-        if not self.FIG_LAB is None:
-            out_path += '_' + self.FIG_LAB
-
-        out_path += '_heatplot.png'
-
         # save figure and display
         plt.savefig(out_path)
+        self.write_fig_stamp(out_path)
         if self.IF_SHOW:
             plt.show()
         plt.close()
@@ -1243,7 +1081,7 @@ class multidate_fixedlead_relative_diff(plot):
         for i_nd in range(num_dts):
             # generate the tick label
             anl_dt = anl_dts[i_nd]
-            date_keys.append(anl_dt.strftime('%Y%m%d_%H%M%S'))
+            date_keys.append(anl_dt)
 
             if ( i_nd % 2 ) == 0 or num_dts < 10:
                 # if 10 or more dates, only use every other as a label
@@ -1264,7 +1102,7 @@ class multidate_fixedlead_relative_diff(plot):
         seconds = str(int(lead % 60)).zfill(2)
         minutes = str(int(lead % 3600)).zfill(2)
         hours = str(int(lead / 3600 ))
-        fcst_ld = hours + minutes + seconds
+        fcst_ld = int(lead)
 
         label = hours
         if not seconds == '00':
@@ -1311,14 +1149,6 @@ class multidate_fixedlead_relative_diff(plot):
         # generate the date range and forecast leads for the analysis, parse binary files
         # for relevant fields
         data_range = {}
-        for cfg in ['ANL', 'REF']:
-            data_range[cfg] = {}
-            exec('data_range["%s"]["flw_nme"] = self.%s_CTR_FLW.NAME' \
-                    % (cfg,cfg))
-            exec('data_range["%s"]["mem_key"] = self.%s_MEM_KEY' \
-                    % (cfg,cfg))
-            exec('data_range["%s"]["grd_key"] = self.%s_GRD_KEY' \
-                    % (cfg,cfg))
 
         # generate sequence of forecast zero hours for sourcing data
         fcst_zhs, date_keys, date_labs = self.gen_fcst_dts_labs()
@@ -1329,79 +1159,24 @@ class multidate_fixedlead_relative_diff(plot):
         # generate storage for the forecast thresholds
         fcst_lvs = []
 
-        # check for valid IO parameters for plotting
-        in_root, out_root = self.gen_io_paths()
-
         for cfg in ['ANL', 'REF']:
+            data_range[cfg] = {}
             tmp_dict = data_range[cfg]
-            flw_nme = tmp_dict['flw_nme']
-            mem_key = tmp_dict['mem_key']
-            grd_key = tmp_dict['grd_key']
 
-            if mem_key is None:
-                idx = ''
-            else:
-                idx = mem_key
+            # load the values to be plotted with region / date / lead filters
+            request = data_request(FLW_NME=getattr(self, cfg + '_CTR_FLW').NAME,
+                    MEM_KEY=getattr(self, cfg + '_MEM_KEY'),
+                    GRD_KEY=getattr(self, cfg + '_GRD_KEY'),
+                    STATS=[self.STAT_KEY], CYCS=fcst_zhs,
+                    VALID_DTS=date_keys, LEADS=fcst_lds)
+            stat_data = select_stat(self.load_data(request), self.STAT_KEY)
 
-            if grd_key is None:
-                grd = ''
-            else:
-                grd = grd_key
-
-            data_root = in_root + '/' + flw_nme + '/' + self.MET_TOOL + '/' +\
-                    self.VRF_REF
-
-            stat_name = self.STAT_KEY
-            stat_type = MET_TOOLS[self.MET_TOOL][stat_name]['type']
-
-            for fcst_zh in fcst_zhs:
-                # define the input name
-                in_path = data_root + '/' + fcst_zh.strftime('%Y%m%d%H') +\
-                        '/' + idx + '/' + grd + '/' + self.VRF_FLD + '.bin'
-
-                try:
-                    with open(in_path, 'rb') as f:
-                        data = pickle.load(f)
-                        data = data[stat_type]
-                except:
-                    print('WARNING: input data ' + in_path + ' statistics ' +\
-                           stat_type + ' does not exist, skipping this' +\
-                           ' configuration.')
-                    continue
-
-                # load the values to be plotted along with landmask and lead
-                vals = [
-                        'VX_MASK',
-                        'FCST_LEAD',
-                        'FCST_VALID_END',
-                        'FCST_THRESH',
-                        stat_name,
-                       ]
-
-                # cut down df to specified valid dates /leads / region / stat
-                stat_data = data[vals]
-                stat_data = stat_data.loc[(stat_data['VX_MASK'] == self.MSK)]
-                stat_data = stat_data.loc[(stat_data['FCST_VALID_END'].isin(date_keys))]
-                stat_data = stat_data.loc[(stat_data['FCST_LEAD'].isin(fcst_lds))]
-
-                # check if there is data for this configuration and these fields
-                if not stat_data.empty:
-                    # obtain the sorted thresholds
-                    lvs = sorted(list(set(stat_data['FCST_THRESH'].values)),
-                            key=lambda x:(len(x.split('.')[0]), x), reverse=True)
-                    fcst_lvs += lvs
-
-                    if 'data' in tmp_dict:
-                        # if there is existing data, merge dataframes
-                        tmp_dict['data'] = \
-                                 pd.concat([tmp_dict['data'], stat_data], axis=0)
-                    else:
-                        # if this is a first instance, create fields
-                        tmp_dict['data'] = stat_data
-
-                else:
-                    print('WARNING: no data exists in:\n' + INDT + in_path)
-                    print('corresponding to plotting configuration.')
+            # check if there is data for this configuration and these fields
+            if not stat_data.empty:
+                # obtain the thresholds
+                fcst_lvs += list(set(stat_data['FCST_THRESH'].values))
+
+                tmp_dict['data'] = stat_data
 
         # Unique levels are inferred from the data over all forecast start dates
         fcst_lvs = sorted(list(set(fcst_lvs)),
@@ -1415,9 +1190,53 @@ class multidate_fixedlead_relative_diff(plot):
 
         return data_range
 
+    def gen_out_path(self):
+        # the path of the figure
+        in_root, out_root = self.gen_io_paths()
+        out_path = out_root + '/' +\
+                self.VRF_STRT.strftime('%Y%m%d%H') + '-to-'+\
+                self.VRF_STOP.strftime('%Y%m%d%H') + '_FCST-'+\
+                str(self.FCST_LD) + 'hrs_'+\
+                self.MSK + '_' + self.STAT_KEY + '_all-levels'
+
+        out_path += '_relative_difference'
+        out_path += '_' + self.ANL_CTR_FLW.NAME
+
+        if not self.ANL_MEM_KEY is None:
+            out_path += '_' + self.ANL_MEM_KEY
+
+        if not self.ANL_GRD_KEY is None:
+            out_path += '_' + self.ANL_GRD_KEY
+
+        if not self.FIG_LAB is None:
+            out_path += '_' + self.FIG_LAB
+
+        out_path += '_' + self.REF_CTR_FLW.NAME
+
+        if not self.REF_MEM_KEY is None:
+            out_path += '_' + self.REF_MEM_KEY
+
+        if not self.REF_GRD_KEY is None:
+            out_path += '_' + self.REF_GRD_KEY
+
+        if not self.FIG_LAB is None:
+            out_path += '_' + self.FIG_LAB
+
+        out_path += '_heatplot.png'
+
+        return out_path
+
     def gen_fig(self):
+        # skip rendering if the figure is current with its inputs
+        out_path = self.gen_out_path()
+        if self.check_fig(out_path):
+            return
+
+        # render headless unless the figure is shown
+        set_backend(self.IF_SHOW)
+
         # generate the plot data
-        data_range = self.gen_data_range()
+        data_range = self.load_data_range()
         anl_data = data_range['ANL']['data']
         ref_data = data_range['REF']['data']
         date_keys = data_range['date_keys']
@@ -1433,43 +1252,13 @@ class multidate_fixedlead_relative_diff(plot):
         ax0 = fig.add_axes([.86, .24, .05, .56])
         ax1 = fig.add_axes([.07, .16, .78, .72])
 
-        # create array storage for stats
-        num_lvs = len(fcst_lvs)
-        num_dts = len(date_keys)
-        plt_data = np.full([num_lvs, num_dts], np.nan)
-        cell_data = np.full([num_lvs, num_dts], np.nan)
-
-        for i_nd in range(num_dts):
-            for i_nv in range(num_lvs):
-                try:
-                    # try to load data for the date / lead combination
-                    anl_val = anl_data.loc[(anl_data['FCST_THRESH'] == fcst_lvs[i_nv]) &\
-                            (anl_data['FCST_VALID_END'] == date_keys[i_nd])]
-
-                    ref_val = ref_data.loc[(ref_data['FCST_THRESH'] == fcst_lvs[i_nv]) &\
-                            (ref_data['FCST_VALID_END'] == date_keys[i_nd])]
-
-                    if not anl_val.empty and not ref_val.empty:
-                        anl_val = float(anl_val[self.STAT_KEY].iloc[0])
-                        ref_val = float(ref_val[self.STAT_KEY].iloc[0])
-
-                        if np.abs(ref_val) <= 0.1 or\
-                                np.abs(anl_val) <= 0.1 or\
-                                np.isnan(ref_val) or\
-                                np.isnan(anl_val):
-                            pass
-                        else:
-                            cell_data[i_nv, i_nd] = ref_val
-
-                            if self.STAT_KEY == 'RMSE':
-                                plt_data[i_nv, i_nd] =\
-                                        100 * (ref_val - anl_val) / ref_val
-                            else:
-                                plt_data[i_nv, i_nd] =\
-                                        100 * (anl_val - ref_val) / ref_val
-
-                except:
-                    continue
+        # assemble the stats on the plot axes
+        anl_grid = gen_grid(anl_data, self.STAT_KEY, 'FCST_THRESH', fcst_lvs,
+                'FCST_VALID_END', date_keys)
+        ref_grid = gen_grid(ref_data, self.STAT_KEY, 'FCST_THRESH', fcst_lvs,
+                'FCST_VALID_END', date_keys)
+        plt_data, cell_data = gen_relative_diff(anl_grid, ref_grid,
+                self.STAT_KEY)
 
         colorbar = self.COLORBAR
         if hasattr(colorbar, 'ALPHA'):
@@ -1523,40 +1312,9 @@ class multidate_fixedlead_relative_diff(plot):
         plt.figtext(.86, .87, 'Skill\nGain', horizontalalignment='left',
                     verticalalignment='top', fontsize=20)
 
-        in_root, out_root = self.gen_io_paths()
-        out_path = out_root + '/' +\
-                self.VRF_STRT.strftime('%Y%m%d%H') + '-to-'+\
-                self.VRF_STOP.strftime('%Y%m%d%H') + '_FCST-'+\
-                str(self.FCST_LD) + 'hrs_'+\
-                self.MSK + '_' + self.STAT_KEY + '_all-levels'
-
-        out_path += '_relative_difference'
-        out_path += '_' + self.ANL_CTR_FLW.NAME
-
-        if not self.ANL_MEM_KEY is None:
-            out_path += '_' + self.ANL_MEM_KEY
-
-        if not self.ANL_GRD_KEY is None:
-            out_path += '_' + self.ANL_GRD_KEY
-
-        if not self.FIG_LAB is None:
-            out_path += '_' + self.FIG_LAB
-
-        out_path += '_' + self.REF_CTR_FLW.NAME
-
-        if not self.REF_MEM_KEY is None:
-            out_path += '_' + self.REF_MEM_KEY
-
-        if not self.REF_GRD_KEY is None:
-            out_path += '_' + self.REF_GRD_KEY
-
-        if not self.FIG_LAB is None:
-            out_path += '_' + self.FIG_LAB
-
-        out_path += '_heatplot.png'
-
         # save figure and display
         plt.savefig(out_path)
+        self.write_fig_stamp(out_path)
         if self.IF_SHOW:
             plt.show()
         plt.close()
@@ -1634,7 +1392,7 @@ class multilevel_multilead_relative_diff(plot):
             seconds = str(int(lead % 60)).zfill(2)
             minutes = str(int(lead % 3600)).zfill(2)
             hours = str(int(lead / 3600 ))
-            fcst_lds.append(hours + minutes + seconds)
+            fcst_lds.append(int(lead))
 
             tick_label = hours
             if not seconds == '00':
@@ -1684,15 +1442,6 @@ class multilevel_multilead_relative_diff(plot):
         # for relevant fields
         data_range = {}
 
-        for cfg in ['ANL', 'REF']:
-            data_range[cfg] = {}
-            exec('data_range["%s"]["flw_nme"] = self.%s_CTR_FLW.NAME' \
-                    % (cfg,cfg))
-            exec('data_range["%s"]["mem_key"] = self.%s_MEM_KEY' \
-                    % (cfg,cfg))
-            exec('data_range["%s"]["grd_key"] = self.%s_GRD_KEY' \
-                    % (cfg,cfg))
-
         # generate sequence of forecast zero hours for sourcing data
         fcst_zhs = self.gen_cycs()
 
@@ -1702,80 +1451,24 @@ class multilevel_multilead_relative_diff(plot):
         # generate storage for the forecast thresholds
         fcst_lvs = []
 
-        # check for valid IO parameters for plotting
-        in_root, out_root = self.gen_io_paths()
-
         for cfg in ['ANL', 'REF']:
+            data_range[cfg] = {}
             tmp_dict = data_range[cfg]
-            flw_nme = tmp_dict['flw_nme']
-            mem_key = tmp_dict['mem_key']
-            grd_key = tmp_dict['grd_key']
 
-            if mem_key is None:
-                idx = ''
-            else:
-                idx = mem_key
+            # load the values to be plotted with region / date / lead filters
+            request = data_request(FLW_NME=getattr(self, cfg + '_CTR_FLW').NAME,
+                    MEM_KEY=getattr(self, cfg + '_MEM_KEY'),
+                    GRD_KEY=getattr(self, cfg + '_GRD_KEY'),
+                    STATS=[self.STAT_KEY], CYCS=fcst_zhs,
+                    VALID_DTS=[self.VALID_DT], LEADS=fcst_lds)
+            stat_data = select_stat(self.load_data(request), self.STAT_KEY)
 
-            if grd_key is None:
-                grd = ''
-            else:
-                grd = grd_key
-
-            data_root = in_root + '/' + flw_nme + '/' + self.MET_TOOL + '/' +\
-                    self.VRF_REF
-
-            stat_name = self.STAT_KEY
-            stat_type = MET_TOOLS[self.MET_TOOL][stat_name]['type']
-
-            for fcst_zh in fcst_zhs:
-                # define the input name
-                in_path = data_root + '/' + fcst_zh.strftime('%Y%m%d%H') +\
-                        '/' + idx + '/' + grd + '/' + self.VRF_FLD + '.bin'
-
-                try:
-                    with open(in_path, 'rb') as f:
-                        data = pickle.load(f)
-                        data = data[stat_type]
-                except:
-                    print('WARNING: input data ' + in_path + ' statistics ' +\
-                           stat_type + ' does not exist, skipping this' +\
-                           ' configuration.')
-                    continue
-
-                # load the values to be plotted along with landmask and lead
-                vals = [
-                        'VX_MASK',
-                        'FCST_LEAD',
-                        'FCST_VALID_END',
-                        'FCST_THRESH',
-                        stat_name,
-                       ]
-
-                # cut down df to specified valid dates /leads / region / stat
-                stat_data = data[vals]
-                stat_data = stat_data.loc[(stat_data['VX_MASK'] == self.MSK)]
-                stat_data = stat_data.loc[(stat_data['FCST_LEAD'].isin(fcst_lds))]
-                stat_data = stat_data.loc[(stat_data['FCST_VALID_END'] ==
-                    self.VALID_DT.strftime('%Y%m%d_%H%M%S'))]
-
-                # check if there is data for this configuration and these fields
-                if not stat_data.empty:
-                    # obtain the sorted thresholds
-                    lvs = sorted(list(set(stat_data['FCST_THRESH'].values)),
-                            key=lambda x:(len(x.split('.')[0]), x), reverse=True)
-                    fcst_lvs += lvs
-
-                    if 'data' in tmp_dict:
-                        # if there is existing data, merge dataframes
-                        tmp_dict['data'] = \
-                                 pd.concat([tmp_dict['data'], stat_data], axis=0)
-                    else:
-                        # if this is a first instance, create fields
-                        tmp_dict['data'] = stat_data
-
-                else:
-                    print('WARNING: no data exists in:\n' + INDT + in_path)
-                    print('corresponding to plotting configuration.')
+            # check if there is data for this configuration and these fields
+            if not stat_data.empty:
+                # obtain the thresholds
+                fcst_lvs += list(set(stat_data['FCST_THRESH'].values))
+
+                tmp_dict['data'] = stat_data
 
         # Unique levels are inferred from the data over all forecast start dates
         fcst_lvs = sorted(list(set(fcst_lvs)),
@@ -1787,9 +1480,50 @@ class multilevel_multilead_relative_diff(plot):
 
         return data_range
 
+    def gen_out_path(self):
+        # the path of the figure
+        in_root, out_root = self.gen_io_paths()
+        out_path = out_root + '/' + self.VALID_DT.strftime('%Y%m%d%H') + '_' +\
+                self.MSK  + '_' + self.STAT_KEY
+
+        out_path += '_relative_difference'
+        out_path += '_' + self.ANL_CTR_FLW.NAME
+
+        if not self.ANL_MEM_KEY is None:
+            out_path += '_' + self.ANL_MEM_KEY
+
+        if not self.ANL_GRD_KEY is None:
+            out_path += '_' + self.ANL_GRD_KEY
+
+        if not self.FIG_LAB is None:
+            out_path += '_' + self.FIG_LAB
+
+        out_path += '_' + self.REF_CTR_FLW.NAME
+
+        if not self.REF_MEM_KEY is None:
+            out_path += '_' + self.REF_MEM_KEY
+
+        if not self.REF_GRD_KEY is None:
+            out_path += '_' + self.REF_GRD_KEY
+
+        if not self.FIG_LAB is None:
+            out_path += '_' + self.FIG_LAB
+
+        out_path += '_all-level_heatplot.png'
+
+        return out_path
+
     def gen_fig(self):
+        # skip rendering if the figure is current with its inputs
+        out_path = self.gen_out_path()
+        if self.check_fig(out_path):
+            return
+
+        # render headless unless the figure is shown
+        set_backend(self.IF_SHOW)
+
         # generate the plot data
-        data_range = self.gen_data_range()
+        data_range = self.load_data_range()
         anl_data = data_range['ANL']['data']
         ref_data = data_range['REF']['data']
         fcst_lds = data_range['fcst_lds']
@@ -1803,38 +1537,13 @@ class multilevel_multilead_relative_diff(plot):
         ax0 = fig.add_axes([.86, .24, .05, .56])
         ax1 = fig.add_axes([.07, .16, .78, .72])
 
-        # create array storage for stats
-        num_lds = len(fcst_lds)
-        num_lvs = len(fcst_lvs)
-        plt_data = np.full([num_lvs, num_lds], np.nan)
-        cell_data = np.full([num_lvs, num_lds], np.nan)
-
-        for i_nv in range(num_lvs):
-            for i_nd in range(num_lds):
-                try:
-                    # try to load data for the level / lead combination
-                    anl_val = anl_data.loc[(anl_data['FCST_THRESH'] == fcst_lvs[i_nv]) &\
-                            (anl_data['FCST_LEAD'] == fcst_lds[i_nd])]
-
-                    ref_val = ref_data.loc[(ref_data['FCST_THRESH'] == fcst_lvs[i_nv]) &\
-                            (ref_data['FCST_LEAD'] == fcst_lds[i_nd])]
-
-                    if not anl_val.empty and not ref_val.empty:
-                        anl_val = float(anl_val[self.STAT_KEY].iloc[0])
-                        ref_val = float(ref_val[self.STAT_KEY].iloc[0])
-
-                        if np.abs(ref_val) <= 0.1 or\
-                                np.abs(anl_val) <= 0.1 or\
-                                np.isnan(ref_val) or\
-                                np.isnan(anl_val):
-                            pass
-                        else:
-                            cell_data[i_nv, i_nd] = ref_val
-                            plt_data[i_nv, i_nd] =\
-                                    100 * (anl_val - ref_val) / ref_val
-
-                except:
-                    continue
+        # assemble the stats on the plot axes
+        anl_grid = gen_grid(anl_data, self.STAT_KEY, 'FCST_THRESH', fcst_lvs,
+                'FCST_LEAD', fcst_lds)
+        ref_grid = gen_grid(ref_data, self.STAT_KEY, 'FCST_THRESH', fcst_lvs,
+                'FCST_LEAD', fcst_lds)
+        plt_data, cell_data = gen_relative_diff(anl_grid, ref_grid,
+                self.STAT_KEY, if_loss=False)
 
         colorbar = self.COLORBAR
         if hasattr(colorbar, 'ALPHA'):
@@ -1889,37 +1598,9 @@ class multilevel_multilead_relative_diff(plot):
         plt.figtext(.86, .87, 'Skill\nGain', horizontalalignment='left',
                     verticalalignment='top', fontsize=20)
 
-        in_root, out_root = self.gen_io_paths()
-        out_path = out_root + '/' + self.VALID_DT.strftime('%Y%m%d%H') + '_' +\
-                self.MSK  + '_' + self.STAT_KEY
-
-        out_path += '_relative_difference'
-        out_path += '_' + self.ANL_CTR_FLW.NAME
-
-        if not self.ANL_MEM_KEY is None:
-            out_path += '_' + self.ANL_MEM_KEY
-
-        if not self.ANL_GRD_KEY is None:
-            out_path += '_' + self.ANL_GRD_KEY
-
-        if not self.FIG_LAB is None:
-            out_path += '_' + self.FIG_LAB
-
-        out_path += '_' + self.REF_CTR_FLW.NAME
-
-        if not self.REF_MEM_KEY is None:
-            out_path += '_' + self.REF_MEM_KEY
-
-        if not self.REF_GRD_KEY is None:
-            out_path += '_' + self.REF_GRD_KEY
-
-        if not self.FIG_LAB is None:
-            out_path += '_' + self.FIG_LAB
-
-        out_path += '_all-level_heatplot.png'
-
         # save figure and display
         plt.savefig(out_path)
+        self.write_fig_stamp(out_path)
         if self.IF_SHOW:
             plt.show()
         plt.close()
@@ -0,0 +1,122 @@
+##################################################################################
+# Description
+##################################################################################
+# This script measures the import time of the plotting package and templates
+# in fresh interpreters, as paid by every containerized plotting call, against
+# a time budget, e.g.,
+#
+#     python import_budget.py --budget 0.5 --repeat 5
+#
+# The median import time of each module and its heaviest imports are printed,
+# and the script exits with status 1 if any module exceeds the budget.
+#
+##################################################################################
+# License Statement:
+##################################################################################
+# This software is Copyright © 2024 The Regents of the University of California.
+# All Rights Reserved. Permission to copy, modify, and distribute this software
+# and its documentation for educational, research and non-profit purposes,
+# without fee, and without a written agreement is hereby granted, provided that
+# the above copyright notice, this paragraph and the following three paragraphs
+# appear in all copies. Permission to make commercial use of this software may
+# be obtained by contacting:
+#
+#     Office of Innovation and Commercialization
+#     9500 Gilman Drive, Mail Code 0910
+#     University of California
+#     La Jolla, CA 92093-0910
+#     innovation@ucsd.edu
+#
+# This software program and documentation are copyrighted by The Regents of the
+# University of California. The software program and documentation are supplied
+# "as is", without any accompanying services from The Regents. The Regents does
+# not warrant that the operation of the program will be uninterrupted or
+# error-free. The end-user understands that the program was developed for
+# research purposes and is advised not to rely exclusively on the program for
+# any reason.
+#
+# IN NO EVENT SHALL THE UNIVERSITY OF CALIFORNIA BE LIABLE TO ANY PARTY FOR
+# DIRECT, INDIRECT, SPECIAL, INCIDENTAL, OR CONSEQUENTIAL DAMAGES, INCLUDING
+# LOST PROFITS, ARISING OUT OF THE USE OF THIS SOFTWARE AND ITS DOCUMENTATION,
+# EVEN IF THE UNIVERSITY OF CALIFORNIA HAS BEEN ADVISED OF THE POSSIBILITY OF
+# SUCH DAMAGE. THE UNIVERSITY OF CALIFORNIA SPECIFICALLY DISCLAIMS ANY
+# WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF
+# MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE. THE SOFTWARE PROVIDED
+# HEREUNDER IS ON AN “AS IS” BASIS, AND THE UNIVERSITY OF CALIFORNIA HAS NO
+# OBLIGATIONS TO PROVIDE MAINTENANCE, SUPPORT, UPDATES, ENHANCEMENTS, OR
+# MODIFICATIONS.
+# 
+##################################################################################
+# Imports
+##################################################################################
+import argparse
+import os
+import subprocess
+import statistics
+import sys
+
+##################################################################################
+# Measure import times
+##################################################################################
+parser = argparse.ArgumentParser(description='Measure the import time of' +\
+        ' the plotting modules against a budget.')
+parser.add_argument('modules', nargs='*', default=['plotting', 'templates'],
+        help='modules to import, plotting and templates by default')
+parser.add_argument('--budget', type=float, default=0.5,
+        help='maximum median import time in seconds, 0.5 by default')
+parser.add_argument('--repeat', type=int, default=5,
+        help='number of fresh interpreters per module, 5 by default')
+parser.add_argument('--top', type=int, default=5,
+        help='number of heaviest imports to list, 5 by default')
+args = parser.parse_args()
+
+# import from the source tree as the plotting scripts do
+plt_dir = os.path.dirname(os.path.abspath(__file__))
+src_dir = os.path.dirname(plt_dir)
+env = dict(os.environ)
+env['PYTHONPATH'] = os.pathsep.join([src_dir, plt_dir, src_dir +\
+        '/utilities'] + [path for path in
+            [os.environ.get('PYTHONPATH')] if path])
+
+over_budget = False
+for module in args.modules:
+    code = 'import time; t0 = time.perf_counter(); import ' + module +\
+            '; print(time.perf_counter() - t0)'
+    times = []
+    for i_r in range(args.repeat):
+        run = subprocess.run([sys.executable, '-c', code], env=env,
+                cwd=plt_dir, capture_output=True, text=True)
+        if run.returncode != 0:
+            print('ERROR: failed to import ' + module + ':')
+            print(run.stderr)
+            sys.exit(1)
+
+        times.append(float(run.stdout.split()[-1]))
+
+    median = statistics.median(times)
+    status = 'OK' if median <= args.budget else 'OVER BUDGET'
+    over_budget = over_budget or median > args.budget
+    print(module + ': median %.3fs of %d imports, budget %.3fs, %s' %
+            (median, args.repeat, args.budget, status))
+
+    # list the heaviest imports by cumulative time in microseconds
+    run = subprocess.run([sys.executable, '-X', 'importtime', '-c',
+        'import ' + module], env=env, cwd=plt_dir, capture_output=True,
+        text=True)
+    imports = []
+    for line in run.stderr.splitlines():
+        if line.startswith('import time:') and not 'cumulative' in line:
+            self_us, cumul_us, name = line[12:].split('|')
+            if name.startswith(' ' * 3) and not name.startswith(' ' * 5):
+                imports.append((int(cumul_us), name.strip()))
+
+    for cumul_us, name in sorted(imports, reverse=True)[:args.top]:
+        print('    %8.3fs %s' % (cumul_us / 1e6, name))
+
+if over_budget:
+    sys.exit(1)
+
+sys.exit(0)
+
+##################################################################################
+# end
@@ -137,7 +137,7 @@ class dual_lineplot(plot):
             seconds = str(int(lead % 60)).zfill(2)
             minutes = str(int(lead % 3600)).zfill(2)
             hours = str(int(lead / 3600 ))
-            fcst_lds.append(hours + minutes + seconds)
+            fcst_lds.append(int(lead))
 
             tick_label = hours
             if not seconds == '00':
@@ -212,96 +212,69 @@ class dual_lineplot(plot):
         # generate sequence of forecast zero hours for sourcing data
         fcst_zhs = self.gen_cycs()
 
-        # check for valid IO parameters for plotting
-        in_root, out_root = self.gen_io_paths()
-
         # generate all lines to be plotted
         lines_labs = self.gen_lines_labs()
 
+        if self.LEV is None:
+            levs = None
+        else:
+            levs = [self.LEV]
+
         for line_key, line in lines_labs.items():
-            # define derived data paths
-            flw_nme = line['flw_nme']
-            label = line['label']
-            grd = line['grd']
-            idx = line['idx']
-
-            data_root = in_root + '/' + flw_nme + '/' + self.MET_TOOL + '/' +\
-                    self.VRF_REF
-
-            for fcst_zh in fcst_zhs:
-                # define the input name
-                in_path = data_root + '/' + fcst_zh.strftime('%Y%m%d%H') +\
-                        '/' + idx + '/' + grd + '/' + self.VRF_FLD + '.bin'
-
-                for i_ns in range(2):
-                    stat_name = self.STAT_KEYS[i_ns]
-                    stat_type = MET_TOOLS[self.MET_TOOL][stat_name]['type']
-                    try:
-                        with open(in_path, 'rb') as f:
-                            data = pickle.load(f)
-                            data = data[stat_type]
-                    except:
-                        print('WARNING: input data ' + in_path + ' statistics ' +\
-                               stat_type + ' does not exist, skipping this' +\
-                               ' configuration.')
-                        continue
-
-                    # load the values to be plotted along with landmask and lead
-                    vals = [
-                            'VX_MASK',
-                            'FCST_LEAD',
-                            'FCST_VALID_END',
-                            stat_name,
-                           ]
-
-                    if not self.LEV is None:
-                        vals += ['FCST_THRESH']
-
-                    # optionally include confidence intervals
-                    CI = False
-                    if not self.CI is None:
-                        stat_CI = stat_name + '_' + self.CI
-                        if stat_CI + 'L' in data:
-                            vals.append(stat_CI + 'L')
-                            vals.append(stat_CI + 'U')
-                            CI = True
-
-                    # cut down df to specified valid date / region / relevant stats
-                    stat_data = data[vals]
-                    stat_data = stat_data.loc[(stat_data['VX_MASK'] == self.MSK)]
-                    stat_data = stat_data.loc[(stat_data['FCST_VALID_END'] ==
-                        self.VALID_DT.strftime('%Y%m%d_%H%M%S'))]
-                    if not self.LEV is None:
-                        stat_data = \
-                        stat_data.loc[(stat_data['FCST_THRESH'] == self.LEV)]
-
-                    # check if there is data for this configuration and these fields
-                    if not stat_data.empty:
-                        stat_key = line_key + '_' + stat_name
-
-                        if stat_key in plt_data.keys():
-                            # if there is existing data, merge dataframes
-                            plt_data[stat_key]['data'] = \
-                                     pd.concat([plt_data[stat_key]['data'],
-                                         stat_data], axis=0)
-                        else:
-                            # if this is a first instance, create fields
-                            plt_data[stat_key] = {
-                                    'data': stat_data,
-                                    'label': label,
-                                    'stat_name': stat_name,
-                                    'CI': CI,
-                                    }
-
-                    else:
-                        print('WARNING: no data exists in:\n' + INDT + in_path)
-                        print('corresponding to plotting configuration.')
+            # load the values to be plotted at the valid date / region / level
+            request = data_request(FLW_NME=line['flw_nme'],
+                    MEM_KEY=line['idx'], GRD_KEY=line['grd'],
+                    STATS=self.STAT_KEYS, CYCS=fcst_zhs,
+                    VALID_DTS=[self.VALID_DT], LEVS=levs, CI=self.CI)
+            data = self.load_data(request)
+
+            for stat_name in self.STAT_KEYS:
+                stat_data = select_stat(data, stat_name, ci=self.CI)
+
+                # check if there is data for this configuration and these fields
+                if not stat_data.empty:
+                    CI = not self.CI is None and\
+                            stat_name + '_' + self.CI + 'L' in stat_data
+                    plt_data[line_key + '_' + stat_name] = {
+                            'data': stat_data,
+                            'label': line['label'],
+                            'stat_name': stat_name,
+                            'CI': CI,
+                            }
 
         return plt_data
 
+    def gen_out_path(self):
+        # the path of the figure
+        in_root, out_root = self.gen_io_paths()
+        out_path = out_root + '/' + self.VALID_DT.strftime('%Y%m%d%H') + '_' +\
+                self.MSK + '_' + self.STAT_KEYS[0] + '_' + self.STAT_KEYS[1]
+
+        if not self.LEV is None:
+            out_path += '_lev'
+            lev_split = re.split(r'\D+', self.LEV)
+            for split in lev_split:
+                if split:
+                    out_path += '_' + split
+
+        if not self.FIG_LAB is None:
+            out_path += '_' + self.FIG_LAB
+
+        out_path += '_lineplot.png'
+
+        return out_path
+
     def gen_fig(self):
+        # skip rendering if the figure is current with its inputs
+        out_path = self.gen_out_path()
+        if self.check_fig(out_path):
+            return
+
+        # render headless unless the figure is shown
+        set_backend(self.IF_SHOW)
+
         # generate the plot data
-        plt_data = self.gen_data_range()
+        plt_data = self.load_data_range()
         fcst_lds, x_tick_labs = self.gen_fcst_lds_labs()
 
         # create a figure
@@ -438,24 +411,9 @@ class dual_lineplot(plot):
         fig.legend(line_list, line_labs, fontsize=18, ncol=ncols, loc='center',
                    bbox_to_anchor=[0.5, 0.83])
 
-        in_root, out_root = self.gen_io_paths()
-        out_path = out_root + '/' + self.VALID_DT.strftime('%Y%m%d%H') + '_' +\
-                self.MSK + '_' + self.STAT_KEYS[0] + '_' + self.STAT_KEYS[1]
-
-        if not self.LEV is None:
-            out_path += '_lev'
-            lev_split = re.split(r'\D+', self.LEV)
-            for split in lev_split:
-                if split:
-                    out_path += '_' + split
-
-        if not self.FIG_LAB is None:
-            out_path += '_' + self.FIG_LAB
-
-        out_path += '_lineplot.png'
-
         # save figure and display
         plt.savefig(out_path)
+        self.write_fig_stamp(out_path)
         if self.IF_SHOW:
             plt.show()
         plt.close()
@@ -42,15 +42,71 @@
 # Imports
 ##################################################################################
 from DataFrames import *
+import argparse
 
 ##################################################################################
 # arguments for makeDataFrames are taken from command line
-PRFX = sys.argv[1]
-IN_DIR = sys.argv[2]
-OUT_DIR = sys.argv[3]
+parser = argparse.ArgumentParser(description='Parse MET ASCII outputs into' +\
+        ' columnar stores of Pandas data frames.')
+parser.add_argument('prfx', nargs='?',
+        help='verification field prefix of MET outputs, or a comma separated' +\
+        ' list of prefixes parsed in the same directories')
+parser.add_argument('in_dir', nargs='?', help='directory of MET ASCII outputs')
+parser.add_argument('out_dir', nargs='?', help='directory of output binary')
+parser.add_argument('--manifest',
+        help='file of jobs, one "prfx in_dir out_dir" line per job, in place' +\
+        ' of the positional arguments')
+parser.add_argument('--stat', action='store_true',
+        help='parse the combined .stat files in place of _TYPE.txt files')
+parser.add_argument('--bin', action='store_true',
+        help='write the legacy pickled .bin dictionary in place of Parquet')
+parser.add_argument('--workers', type=int, default=1,
+        help='number of processes parsing files in parallel, default 1')
+parser.add_argument('--incremental', action='store_true',
+        help='parse only new or changed files into the existing store')
+args = parser.parse_args()
+
+if args.bin:
+    out_fmt = 'bin'
+else:
+    out_fmt = 'parquet'
+
+# define the list of prefix, input and output directory jobs
+jobs = []
+if args.manifest:
+    if not args.prfx is None:
+        parser.error('positional arguments are not used with --manifest')
+
+    with open(args.manifest) as f:
+        for line in f:
+            line = line.split('#')[0].split()
+            if len(line) == 0:
+                continue
+            elif len(line) == 3:
+                jobs.append(line)
+            else:
+                parser.error('manifest line ' + ' '.join(line) + ' is not' +\
+                        ' of the form "prfx in_dir out_dir"')
+
+elif args.out_dir is None:
+    parser.error('the arguments prfx, in_dir and out_dir are required')
+
+else:
+    for prfx in args.prfx.split(','):
+        jobs.append([prfx, args.in_dir, args.out_dir])
+
+# execute all jobs in a single interpreter and exit with the max status
+error = 0
+for prfx, in_dir, out_dir in jobs:
+    print('Parsing prefix ' + prfx + ' in ' + in_dir)
+    job_error = makeDataFrames(prfx, in_dir, out_dir, stat=args.stat,
+            out_fmt=out_fmt, workers=args.workers,
+            incremental=args.incremental)
+    if job_error:
+        print('ERROR: parsing prefix ' + prfx + ' in ' + in_dir + ' failed.')
+
+    error = max(error, job_error)
 
-# execute and exit with status
-error = makeDataFrames(PRFX, IN_DIR, OUT_DIR)
 sys.exit(error)
 
 ##################################################################################
@@ -0,0 +1,373 @@
+##################################################################################
+# Description
+##################################################################################
+# This module aggregates MET statistics over arbitrary groupings of rows, e.g.,
+# cycles, masks or members, from the partial sums of the SL1L2, CTC and NBRCTC
+# line types and the components of NBRCNT, in place of averaging summary
+# statistics.  Sufficient statistics are summed with a vectorized groupby and
+# continuous, categorical and neighborhood scores are derived from the totals,
+# following the aggregation of the MET stat_analysis tool.  The partial sums of
+# each finished cycle can be folded into a season state, from which seasonal
+# scores are derived without reprocessing previous cycles.
+#
+##################################################################################
+# License Statement:
+##################################################################################
+# This software is Copyright © 2024 The Regents of the University of California.
+# All Rights Reserved. Permission to copy, modify, and distribute this software
+# and its documentation for educational, research and non-profit purposes,
+# without fee, and without a written agreement is hereby granted, provided that
+# the above copyright notice, this paragraph and the following three paragraphs
+# appear in all copies. Permission to make commercial use of this software may
+# be obtained by contacting:
+#
+#     Office of Innovation and Commercialization
+#     9500 Gilman Drive, Mail Code 0910
+#     University of California
+#     La Jolla, CA 92093-0910
+#     innovation@ucsd.edu
+#
+# This software program and documentation are copyrighted by The Regents of the
+# University of California. The software program and documentation are supplied
+# "as is", without any accompanying services from The Regents. The Regents does
+# not warrant that the operation of the program will be uninterrupted or
+# error-free. The end-user understands that the program was developed for
+# research purposes and is advised not to rely exclusively on the program for
+# any reason.
+#
+# IN NO EVENT SHALL THE UNIVERSITY OF CALIFORNIA BE LIABLE TO ANY PARTY FOR
+# DIRECT, INDIRECT, SPECIAL, INCIDENTAL, OR CONSEQUENTIAL DAMAGES, INCLUDING
+# LOST PROFITS, ARISING OUT OF THE USE OF THIS SOFTWARE AND ITS DOCUMENTATION,
+# EVEN IF THE UNIVERSITY OF CALIFORNIA HAS BEEN ADVISED OF THE POSSIBILITY OF
+# SUCH DAMAGE. THE UNIVERSITY OF CALIFORNIA SPECIFICALLY DISCLAIMS ANY
+# WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF
+# MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE. THE SOFTWARE PROVIDED
+# HEREUNDER IS ON AN “AS IS” BASIS, AND THE UNIVERSITY OF CALIFORNIA HAS NO
+# OBLIGATIONS TO PROVIDE MAINTENANCE, SUPPORT, UPDATES, ENHANCEMENTS, OR
+# MODIFICATIONS.
+# 
+##################################################################################
+# Imports
+##################################################################################
+from utilities import *
+from utilities.StatStore import STORE_EXT, listColumns, listStats, loadStats
+
+##################################################################################
+# AGGREGATION DEFINITIONS
+##################################################################################
+# Sufficient statistics of each aggregated line type, where 'means' are
+# averaged weighted by TOTAL, or by DEN_TOTAL for the DEN_MEANS, and 'counts'
+# are summed
+AGG_SUMS = {
+        'sl1l2': {
+            'means': ['FBAR', 'OBAR', 'FOBAR', 'FFBAR', 'OOBAR', 'MAE'],
+            'counts': [],
+            },
+        'ctc': {
+            'means': [],
+            'counts': ['FY_OY', 'FY_ON', 'FN_OY', 'FN_ON'],
+            },
+        'nbrctc': {
+            'means': [],
+            'counts': ['FY_OY', 'FY_ON', 'FN_OY', 'FN_ON'],
+            },
+        'nbrcnt': {
+            'means': ['FBS', 'FSS_FBS', 'FSS_DEN', 'F_RATE', 'O_RATE'],
+            'counts': [],
+            },
+        }
+
+# Means of the NBRCNT rows where the FSS denominator is recovered, weighted by
+# their DEN_TOTAL, so that the FSS is pooled over one population of rows
+DEN_MEANS = ['FSS_FBS', 'FSS_DEN']
+
+# Statistics derived from the aggregated sufficient statistics
+AGG_STATS = {
+        'sl1l2': ['ME', 'MAE', 'MSE', 'RMSE', 'PR_CORR'],
+        'ctc': ['CSI', 'GSS', 'FBIAS', 'PODY', 'FAR'],
+        'nbrctc': ['CSI', 'GSS', 'FBIAS', 'PODY', 'FAR'],
+        'nbrcnt': ['FBS', 'FSS', 'AFSS', 'F_RATE', 'O_RATE'],
+        }
+
+# Columns of the season state, partial sums are kept in a partition file per
+# control flow, cycle, member and grid so that a rerun cycle replaces its
+# previous contribution, and INTERP_PNTS keeps the sums of the neighborhood
+# widths of the NBR* line types apart
+STATE_KEYS = [
+              'CTR_FLW',
+              'MEM',
+              'GRID',
+              'CYCLE',
+              'VX_MASK',
+              'FCST_LEAD',
+              'FCST_THRESH',
+              'INTERP_PNTS',
+             ]
+
+##################################################################################
+# METHODS
+##################################################################################
+
+def partialSums(data, stat_type, by):
+    """Returns the TOTAL weighted partial sums of a line type over groups
+
+    Inputs to the method are as follows:
+
+        data      -- data frame of the stat type with TOTAL and the columns of
+                     AGG_SUMS, e.g., loaded with loadStats
+        stat_type -- MET stat type, one of AGG_SUMS
+        by        -- list of columns defining the groups to aggregate
+
+    The 'means' of the stat type are weighted by TOTAL and summed, and the
+    'counts' are summed, in one groupby reduction, so that partial sums of
+    disjoint rows are added to combine them.  For NBRCNT the denominator of
+    the FSS, FSS_DEN = FBS / (1 - FSS), the mean of squared forecast and
+    observed fractions, is recovered from each row with FSS < 1.  FSS_DEN and
+    the FBS of the same rows, FSS_FBS, are weighted by their DEN_TOTAL, so
+    that the FSS is pooled over one population of rows, while FBS is
+    averaged over all rows.  The denominator of rows of a perfect FSS cannot
+    be recovered, and these are left out of the pooled FSS.  Rows of the NBR*
+    line types are also grouped by INTERP_PNTS if it is a column of data, so
+    that scores of different neighborhood widths are not pooled.  Returns a
+    data frame with a row per group of the columns of by, TOTAL and the summed
+    statistics.
+    """
+    stat_type = stat_type.lower()
+    if not stat_type in AGG_SUMS:
+        raise ValueError('Stat type ' + stat_type + ' has no partial sums,' +\
+                ' supported types are ' + ', '.join(AGG_SUMS) + '.')
+
+    if stat_type[:3] == 'nbr' and 'INTERP_PNTS' in data.columns and\
+            not 'INTERP_PNTS' in by:
+        by = list(by) + ['INTERP_PNTS']
+
+    means = AGG_SUMS[stat_type]['means']
+    counts = AGG_SUMS[stat_type]['counts']
+    sums = pd.DataFrame(data[by].reset_index(drop=True))
+    total = data['TOTAL'].astype('float64').to_numpy()
+    sums['TOTAL'] = total
+
+    if stat_type == 'nbrcnt':
+        fbs = data['FBS'].astype('float64').to_numpy()
+        fss = data['FSS'].astype('float64').to_numpy()
+        with np.errstate(divide='ignore', invalid='ignore'):
+            fss_den = np.where(fss < 1, fbs / (1 - fss), np.nan)
+
+        data = data.assign(FSS_DEN=fss_den,
+                FSS_FBS=np.where(np.isnan(fss_den), np.nan, fbs))
+
+        # weight the DEN_MEANS by the TOTAL of the rows where FSS_DEN is defined
+        sums['DEN_TOTAL'] = np.where(np.isnan(fss_den), 0, total)
+
+    for col in means:
+        weight = sums['DEN_TOTAL'] if col in DEN_MEANS else total
+        sums[col] = np.nan_to_num(data[col].astype('float64').to_numpy()) *\
+                weight
+
+    for col in counts:
+        sums[col] = data[col].astype('float64').to_numpy()
+
+    sums = sums.groupby(by, dropna=False, sort=True, observed=True).sum()
+    return sums.reset_index()
+
+def meanSums(sums, stat_type):
+    """Divides the weighted partial sums of a line type by their totals"""
+    sums = sums.copy()
+    for col in AGG_SUMS[stat_type.lower()]['means']:
+        weight = sums['DEN_TOTAL'] if col in DEN_MEANS else sums['TOTAL']
+        sums[col] = sums[col] / weight.where(weight > 0)
+
+    return sums.drop(columns=['DEN_TOTAL'], errors='ignore')
+
+def sumStats(data, stat_type, by):
+    """Aggregates the sufficient statistics of a line type over groups of rows
+
+    The partialSums of the groups are divided by the group totals, so that
+    'means' are TOTAL weighted averages and 'counts' are sums.  Returns a data
+    frame with a row per group of the columns of by, TOTAL and the aggregated
+    sufficient statistics.
+    """
+    return meanSums(partialSums(data, stat_type, by), stat_type)
+
+def deriveStats(sums, stat_type):
+    """Derives the AGG_STATS of a line type from aggregated partial sums
+
+    Continuous statistics follow from the SL1L2 means, with MSE = FFBAR -
+    2 FOBAR + OOBAR, categorical statistics from the CTC / NBRCTC counts and
+    neighborhood statistics from the NBRCNT means, with FSS = 1 - FSS_FBS /
+    FSS_DEN and AFSS = 2 F_RATE O_RATE / (F_RATE^2 + O_RATE^2).  Undefined
+    statistics, e.g., of zero denominators, are NaN.  Returns the data frame
+    of sums with the derived statistic columns.
+    """
+    stat_type = stat_type.lower()
+    sums = sums.copy()
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        if stat_type == 'sl1l2':
+            sums['ME'] = sums['FBAR'] - sums['OBAR']
+            sums['MSE'] = sums['FFBAR'] - 2 * sums['FOBAR'] + sums['OOBAR']
+            sums['RMSE'] = np.sqrt(sums['MSE'].clip(lower=0))
+            f_var = sums['FFBAR'] - sums['FBAR'] ** 2
+            o_var = sums['OOBAR'] - sums['OBAR'] ** 2
+            sums['PR_CORR'] = (sums['FOBAR'] - sums['FBAR'] * sums['OBAR']) /\
+                    np.sqrt(f_var * o_var)
+
+        elif stat_type in ['ctc', 'nbrctc']:
+            hits = sums['FY_OY']
+            f_yes = sums['FY_OY'] + sums['FY_ON']
+            o_yes = sums['FY_OY'] + sums['FN_OY']
+            union = f_yes + sums['FN_OY']
+            sums['CSI'] = hits / union
+            chance = f_yes * o_yes / sums['TOTAL']
+            sums['GSS'] = (hits - chance) / (union - chance)
+            sums['FBIAS'] = f_yes / o_yes
+            sums['PODY'] = hits / o_yes
+            sums['FAR'] = sums['FY_ON'] / f_yes
+
+        elif stat_type == 'nbrcnt':
+            sums['FSS'] = 1 - sums['FSS_FBS'] / sums['FSS_DEN']
+            sums['AFSS'] = 2 * sums['F_RATE'] * sums['O_RATE'] /\
+                    (sums['F_RATE'] ** 2 + sums['O_RATE'] ** 2)
+
+        else:
+            raise ValueError('Stat type ' + stat_type + ' has no derived' +\
+                    ' statistics, supported types are ' +\
+                    ', '.join(AGG_STATS) + '.')
+
+    # undefined ratios are missing rather than infinite
+    stats = [stat for stat in AGG_STATS[stat_type] if stat in sums.columns]
+    sums[stats] = sums[stats].replace([np.inf, -np.inf], np.nan)
+
+    return sums
+
+def aggregateStats(data, stat_type, by):
+    """Aggregates the statistics of a line type exactly over groups of rows
+
+    Inputs to the method are as follows:
+
+        data      -- data frame of the stat type, see sumStats
+        stat_type -- MET stat type, one of AGG_SUMS
+        by        -- list of columns defining the groups to aggregate, e.g.,
+                     ['VX_MASK', 'FCST_LEAD'] to aggregate over cycles
+
+    Returns a data frame with a row per group of the columns of by, TOTAL,
+    the aggregated sufficient statistics and the AGG_STATS of the stat type.
+    """
+    return deriveStats(sumStats(data, stat_type, by), stat_type)
+
+def statePath(state_dir, field, stat_type, labels):
+    """Returns the path of the partition file of a fold in the season state"""
+    return state_dir + '/' + field + '/' + stat_type + '/CTR_FLW=' +\
+            labels['CTR_FLW'] + '/CYCLE=' + labels['CYCLE'] + '/MEM=' +\
+            labels['MEM'] + '/GRID=' + labels['GRID'] + STORE_EXT
+
+def loadState(state_dir, field, stat_type, cycs=None):
+    """Loads the season state of a stat type, None if it does not exist
+
+    The partition files of the folds are read, only of the cycles in cycs if
+    given, and concatenated in the order of their labels.
+    """
+    in_glob = statePath(state_dir, field, stat_type, {'CTR_FLW': '*',
+        'CYCLE': '*', 'MEM': '*', 'GRID': '*'})
+    in_paths = sorted(glob.glob(in_glob))
+    if not cycs is None:
+        in_paths = [in_path for in_path in in_paths if
+                re.search(r'/CYCLE=([^/]*)/', in_path).group(1) in cycs]
+
+    if len(in_paths) == 0:
+        return None
+
+    return pd.concat([pd.read_parquet(in_path, engine='pyarrow')
+        for in_path in in_paths], axis=0, ignore_index=True)
+
+def foldCycle(state_dir, in_dir, field, labels, log_f=None):
+    """Folds the partial sums of a finished cycle into the season state
+
+    Inputs to the method are as follows:
+
+        state_dir -- full path to directory of the season state
+        in_dir    -- full path to directory of the stat store of the cycle
+        field     -- verification field, the store directory / binary name
+        labels    -- dictionary of the CTR_FLW, MEM, GRID and CYCLE labels of
+                     the store
+        log_f     -- optional full path to log file
+
+    The partialSums of each stat type of AGG_SUMS in the store are computed
+    by mask, lead, threshold and interpolation points, labelled and written to the partition file
+
+        state_dir/field/stat_type/CTR_FLW=ctr_flw/CYCLE=cycle/MEM=mem/GRID=grid.parquet
+
+    of the fold, replacing the file of a previous fold of the same labels
+    atomically, so that a rerun cycle is not counted twice.  The cost is the
+    size of the cycle, and tasks of concurrent cycles and flows write their
+    own partitions without locking the state.  Partitions of stat types no
+    longer in the store are removed.  Returns the list of folded stat types.
+    """
+    folded = []
+    stat_types = listStats(in_dir, field)
+    for stat_type in AGG_SUMS:
+        out_path = statePath(state_dir, field, stat_type, labels)
+        if not stat_type in stat_types:
+            if os.path.isfile(out_path):
+                print('Removing ' + out_path, file=log_f)
+                os.remove(out_path)
+
+            continue
+
+        cols = listColumns(in_dir, field, stat_type)
+        keys = [key for key in STATE_KEYS if key in cols]
+        stats = ['TOTAL'] + AGG_SUMS[stat_type]['means'] +\
+                AGG_SUMS[stat_type]['counts']
+        if stat_type == 'nbrcnt':
+            stats = [stat for stat in stats if not stat in DEN_MEANS] +\
+                    ['FSS']
+
+        data = loadStats(in_dir, field, stat_type, columns=keys + stats)
+        data = data.astype({key: object for key in keys})
+        sums = partialSums(data, stat_type, keys)
+        for i_col, key in enumerate(['CTR_FLW', 'MEM', 'GRID', 'CYCLE']):
+            sums.insert(i_col, key, labels[key])
+
+        print('Folding ' + stat_type + ' of ' + in_dir + '/' + field +\
+                ' into ' + out_path, file=log_f)
+        os.makedirs(os.path.dirname(out_path), exist_ok=True)
+        tmp_path = out_path + '.' + str(os.getpid())
+        sums.to_parquet(tmp_path, engine='pyarrow', index=False)
+        os.replace(tmp_path, out_path)
+        folded.append(stat_type)
+
+    return folded
+
+def seasonStats(state_dir, field, stat_type, by=None, cycs=None):
+    """Aggregates the season state of a stat type over its cycles
+
+    Inputs to the method are as follows:
+
+        state_dir -- full path to directory of the season state
+        field     -- verification field of the state
+        stat_type -- MET stat type, one of AGG_SUMS
+        by        -- optional list of columns defining the groups, the
+                     STATE_KEYS other than CYCLE by default
+        cycs      -- optional list of cycles in CYC_FMT to aggregate, all by
+                     default
+
+    The partitions of the folded partial sums are read, only of cycs if
+    given, the sums are added over the groups and the AGG_STATS are derived
+    from the totals, so that seasonal scores are current with the last
+    folded cycle without reloading the stores of previous cycles.  Returns a
+    data frame as in aggregateStats, None if no state exists.
+    """
+    state = loadState(state_dir, field, stat_type, cycs=cycs)
+    if state is None:
+        return None
+
+    if by is None:
+        by = [key for key in STATE_KEYS if key in state.columns and\
+                not key == 'CYCLE']
+
+    cols = [col for col in state.columns if not col in STATE_KEYS]
+    sums = state.groupby(by, dropna=False, sort=True)[cols].sum()
+    return deriveStats(meanSums(sums.reset_index(), stat_type), stat_type)
+
+##################################################################################
+# end
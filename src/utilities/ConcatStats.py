@@ -0,0 +1,576 @@
+##################################################################################
+# Description
+##################################################################################
+# This module concatenates the stat stores, or legacy grid_stat_*.bin files, of
+# a sweep of case studies, control flows, grids and GridStat output prefixes
+# into one data frame per MET stat type, labelled with the workflow parameters
+# for later statistical encoding.  The sweep is defined by a JSON configuration
+# file, see loadConfig, and the frames of all inputs are collected into lists
+# and concatenated once per stat type.
+#
+##################################################################################
+# License Statement:
+##################################################################################
+# This software is Copyright © 2024 The Regents of the University of California.
+# All Rights Reserved. Permission to copy, modify, and distribute this software
+# and its documentation for educational, research and non-profit purposes,
+# without fee, and without a written agreement is hereby granted, provided that
+# the above copyright notice, this paragraph and the following three paragraphs
+# appear in all copies. Permission to make commercial use of this software may
+# be obtained by contacting:
+#
+#     Office of Innovation and Commercialization
+#     9500 Gilman Drive, Mail Code 0910
+#     University of California
+#     La Jolla, CA 92093-0910
+#     innovation@ucsd.edu
+#
+# This software program and documentation are copyrighted by The Regents of the
+# University of California. The software program and documentation are supplied
+# "as is", without any accompanying services from The Regents. The Regents does
+# not warrant that the operation of the program will be uninterrupted or
+# error-free. The end-user understands that the program was developed for
+# research purposes and is advised not to rely exclusively on the program for
+# any reason.
+#
+# IN NO EVENT SHALL THE UNIVERSITY OF CALIFORNIA BE LIABLE TO ANY PARTY FOR
+# DIRECT, INDIRECT, SPECIAL, INCIDENTAL, OR CONSEQUENTIAL DAMAGES, INCLUDING
+# LOST PROFITS, ARISING OUT OF THE USE OF THIS SOFTWARE AND ITS DOCUMENTATION,
+# EVEN IF THE UNIVERSITY OF CALIFORNIA HAS BEEN ADVISED OF THE POSSIBILITY OF
+# SUCH DAMAGE. THE UNIVERSITY OF CALIFORNIA SPECIFICALLY DISCLAIMS ANY
+# WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF
+# MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE. THE SOFTWARE PROVIDED
+# HEREUNDER IS ON AN “AS IS” BASIS, AND THE UNIVERSITY OF CALIFORNIA HAS NO
+# OBLIGATIONS TO PROVIDE MAINTENANCE, SUPPORT, UPDATES, ENHANCEMENTS, OR
+# MODIFICATIONS.
+# 
+##################################################################################
+# Imports
+##################################################################################
+from utilities import *
+from utilities.LineTypes import applySchema, getColumns
+from utilities.StatStore import STORE_EXT, StreamWriter, loadStats, listColumns
+from utilities.StatCatalog import CATALOG, findStats
+from utilities.DataFrames import splitChunks
+from concurrent.futures import ProcessPoolExecutor
+import collections
+import copy
+import itertools
+import json
+
+##################################################################################
+# CONFIGURATION DEFINITIONS
+##################################################################################
+# Workflow parameter labels of the concatenated rows
+LABEL_COLS = [
+              'CASE',
+              'CTR_FLW',
+              'GRID',
+              'PRFX',
+             ]
+
+# Labels partitioning the out-of-core dataset into directories
+PARTITION_COLS = [
+                  'CASE',
+                  'CTR_FLW',
+                 ]
+
+# Summary metadata of the partitions of the out-of-core dataset
+SUMMARY = 'summary.json'
+
+# Maximum number of inputs loaded at once in the out-of-core mode
+CHUNK_INPUTS = 64
+
+# Maximum number of chunks per worker loaded ahead of the merge, bounding the
+# loaded frames held in memory
+WINDOW_CHUNKS = 2
+
+# Configuration keys without defaults
+CONFIG_REQUIRED = [
+                   'in_root',
+                   'out_root',
+                   'cses',
+                   'ctr_flws',
+                  ]
+
+# Configuration keys with defaults
+CONFIG_DEFAULTS = {
+                   # optional verification domain labels, '' if not needed
+                   'grds': [''],
+                   # optional GridStat output prefixes, '' if not needed
+                   'prfxs': [''],
+                   # Grid-Stat statistics types to access
+                   'types': ['cnt', 'nbrcnt'],
+                   # statistics to combine included in the above types
+                   'stats': ['RMSE', 'PR_CORR', 'FSS', 'AFSS'],
+                   # verification fields to be extracted across stats
+                   'flds': ['VX_MASK', 'FCST_VALID_END', 'FCST_LEAD',
+                            'FCST_THRESH'],
+                   # levels to be set as ordered categories, None for none
+                   'levs': None,
+                  }
+
+##################################################################################
+# METHODS
+##################################################################################
+
+def loadConfig(config_path):
+    """Loads the JSON configuration of a concatenation sweep
+
+    The configuration is a JSON object with the keys
+
+        in_root  -- root directory of the case study stat stores
+        out_root -- root directory of the concatenated output store
+        cses     -- list of case study sub-directories
+        ctr_flws -- list of control flows to concatenate
+
+    and the optional keys of CONFIG_DEFAULTS, grds, prfxs, types, stats, flds
+    and levs.  A ValueError is raised for missing or unknown keys.  Returns
+    the configuration dictionary with defaults filled in.
+    """
+    with open(config_path, 'r') as f:
+        config = json.load(f)
+
+    missing = [key for key in CONFIG_REQUIRED if not key in config]
+    if len(missing) > 0:
+        raise ValueError('Configuration ' + config_path + ' is missing' +\
+                ' required keys ' + ', '.join(missing) + '.')
+
+    unknown = [key for key in config if not key in CONFIG_REQUIRED and\
+            not key in CONFIG_DEFAULTS]
+    if len(unknown) > 0:
+        raise ValueError('Configuration ' + config_path + ' has unknown' +\
+                ' keys ' + ', '.join(unknown) + '.')
+
+    for key, val in CONFIG_DEFAULTS.items():
+        config.setdefault(key, copy.deepcopy(val))
+
+    return config
+
+def concatName(config):
+    """Returns the output name of the concatenation from the swept parameters"""
+    out_name = 'concat_df'
+    for cse in config['cses']:
+        out_name += '_' + cse
+
+    for ctr_flw in config['ctr_flws']:
+        out_name += '_' + ctr_flw
+
+    # include non-empty grid parameters
+    for grid in config['grds']:
+        if len(grid) > 0:
+            out_name += '_' + grid
+
+    # include non-empty prefixes used in Grid-Stat configurations
+    for prfx in config['prfxs']:
+        out_name += prfx
+
+    return out_name
+
+def findInputs(in_root, cse, ctr_flw, grid, prfx, types, log_f=None):
+    """Finds the grid_stat_* stat stores / legacy .bin files of a sweep entry
+
+    The catalog in_root/CATALOG is queried if it exists, otherwise the stores
+    and binaries are globbed below the control flow directory, with binaries
+    skipped where a store of the same name exists.  Returns a sorted list of
+    (in_dir, field) pairs.
+    """
+    # include underscore if grid / prefix is of nonzero length
+    grd = '_' + grid if len(grid) > 0 else ''
+    pfx = '_' + prfx if len(prfx) > 0 else ''
+
+    in_glob = in_root + '/' + cse + '/' + ctr_flw + '/*' + '/grid_stat' +\
+            pfx + grd + '*'
+    print('Searching in_paths for stored data frames:', file=log_f)
+    print(INDT + in_glob, file=log_f)
+
+    catalog = in_root + '/' + CATALOG
+    if os.path.isfile(catalog):
+        print(INDT + 'with catalog ' + catalog, file=log_f)
+        rows = findStats(catalog, cse=cse, ctr_flw=ctr_flw,
+                field_glob='grid_stat' + pfx + grd + '*', stat_type=types)
+        inputs = set(zip(rows['path'], rows['field']))
+
+    else:
+        inputs = set()
+        for in_path in glob.glob(in_glob):
+            if os.path.isdir(in_path):
+                inputs.add((os.path.dirname(in_path),
+                    os.path.basename(in_path)))
+
+            elif in_path[-4:] == '.bin' and not os.path.isdir(in_path[:-4]):
+                inputs.add((os.path.dirname(in_path),
+                    os.path.basename(in_path)[:-4]))
+
+    return sorted(inputs)
+
+def sweepTasks(config, cse, ctr_flw, workers, chunk_inputs=None, log_f=None):
+    """Returns the loadChunk tasks of the grids and prefixes of a case / flow
+
+    The inputs of each grid and prefix are split into contiguous chunks for
+    the workers, of at most chunk_inputs inputs if given.  Returns the list
+    of [inputs, labels, config] arguments of loadChunk in sweep order.
+    """
+    tasks = []
+    for grid in config['grds']:
+        for prfx in config['prfxs']:
+            inputs = findInputs(config['in_root'], cse, ctr_flw, grid, prfx,
+                    config['types'], log_f=log_f)
+            labels = {'CASE': cse, 'CTR_FLW': ctr_flw, 'GRID': grid,
+                      'PRFX': prfx}
+
+            n_chunks = workers
+            if not chunk_inputs is None:
+                n_chunks = max(n_chunks, -(-len(inputs) // chunk_inputs))
+
+            for chunk in splitChunks(inputs, n_chunks):
+                tasks.append([chunk, labels, config])
+
+    return tasks
+
+def loadChunk(inputs, labels, config):
+    """Loads the stat types of a chunk of inputs of a sweep entry
+
+    Inputs to the method are as follows:
+
+        inputs -- list of (in_dir, field) pairs of findInputs
+        labels -- dictionary of the LABEL_COLS parameters of the sweep entry
+        config -- configuration dictionary of the sweep, see loadConfig
+
+    The fields of flds and the statistics of stats present in each stat type
+    are loaded, projecting the columns at load, and labelled with the sweep
+    parameters.  The log is written to a buffer so that chunks can be loaded
+    by parallel workers.  Returns the dictionary of lists of frames keyed by
+    stat type and the log text.
+    """
+    log_f = io.StringIO()
+    frames = {}
+    for stat_type in config['types']:
+        frames[stat_type] = []
+
+    for in_dir, field in inputs:
+        print(INDT + in_dir + '/' + field, file=log_f)
+        found = []
+        for stat_type in config['types']:
+            try:
+                cols = listColumns(in_dir, field, stat_type)
+                flds = [fld for fld in config['flds'] if fld in cols]
+                stats = [stat for stat in config['stats'] if stat in cols]
+                data = loadStats(in_dir, field, stat_type,
+                        columns=flds + stats)
+
+            except (KeyError, OSError, pickle.PickleError):
+                print('WARNING: ' + stat_type + ' key not found in:',
+                        file=log_f)
+                print(INDT + in_dir + '/' + field, file=log_f)
+                continue
+
+            for i_col, col in enumerate(LABEL_COLS):
+                data.insert(i_col, col, labels[col])
+
+            frames[stat_type].append(data)
+            found += stats
+
+        for stat in config['stats']:
+            if not stat in found:
+                print('WARNING: ' + stat + ' not found in the stat types of:',
+                        file=log_f)
+                print(INDT + in_dir + '/' + field, file=log_f)
+
+    return frames, log_f.getvalue()
+
+def mapWindow(pool, func, tasks, window):
+    """Maps a function over argument lists with a bounded window of futures
+
+    Results are yielded in task order, and the next task is only submitted
+    to the pool when a result is consumed, so that at most window results
+    are held in memory at once.  Tasks are run in the calling process if
+    pool is None.
+    """
+    if pool is None:
+        for task in tasks:
+            yield func(*task)
+
+        return
+
+    tasks = iter(tasks)
+    futures = collections.deque()
+    for task in itertools.islice(tasks, window):
+        futures.append(pool.submit(func, *task))
+
+    while len(futures) > 0:
+        result = futures.popleft().result()
+        for task in itertools.islice(tasks, 1):
+            futures.append(pool.submit(func, *task))
+
+        yield result
+
+def concatStats(config, workers=1, log_f=None):
+    """Concatenates the stat types of a sweep into labelled data frames
+
+    Inputs to the method are as follows:
+
+        config  -- configuration dictionary of the sweep, see loadConfig
+        workers -- number of processes loading inputs in parallel, 1 by default
+        log_f   -- optional full path to log file
+
+    For every case, control flow, grid and prefix of the sweep, the inputs of
+    findInputs are split into contiguous chunks per worker and loaded with
+    loadChunk, in a process pool if workers is greater than one, with at most
+    WINDOW_CHUNKS chunks per worker loaded ahead of the merge.  Chunks are
+    merged in sweep order so that the output does not depend on the number
+    of workers, and frames are concatenated once per stat type, so that the
+    cost is linear in the number of inputs.  Returns a dictionary of data
+    frames keyed by stat type, sorted on the labels and flds, with
+    FCST_THRESH ordered by levs if given.
+    """
+    # check for a positive number of workers
+    if not (isinstance(workers, int) and workers > 0):
+        raise ValueError('Number of workers ' + str(workers) + ' is not a' +\
+                ' positive integer.')
+
+    # define loading tasks of contiguous input chunks in sweep order
+    tasks = []
+    for cse in config['cses']:
+        for ctr_flw in config['ctr_flws']:
+            tasks += sweepTasks(config, cse, ctr_flw, workers, log_f=log_f)
+
+    print('Processing stat stores at paths:', file=log_f)
+    pool = None
+    if workers > 1 and len(tasks) > 1:
+        print('Loading ' + str(len(tasks)) + ' chunks with ' + str(workers) +\
+                ' workers', file=log_f)
+        pool = ProcessPoolExecutor(max_workers=workers)
+
+    # merge the loaded chunks in sweep order as they complete
+    frames = {}
+    for stat_type in config['types']:
+        frames[stat_type] = []
+
+    try:
+        for chunk_frames, log_text in mapWindow(pool, loadChunk, tasks,
+                WINDOW_CHUNKS * workers):
+            print(log_text, end='', file=log_f)
+            for stat_type, stat_frames in chunk_frames.items():
+                frames[stat_type] += stat_frames
+
+    finally:
+        if not pool is None:
+            pool.shutdown(cancel_futures=True)
+
+    data_dict = {}
+    for stat_type, stat_frames in frames.items():
+        if len(stat_frames) == 0:
+            continue
+
+        data = pd.concat(stat_frames, axis=0, ignore_index=True)
+
+        # restore column types lost in concatenating across files
+        data = applySchema(data, stat_type)
+        for col in LABEL_COLS:
+            data[col] = data[col].astype('category')
+
+        # turn forecast thresholds into ordered categories
+        if not config['levs'] is None and 'FCST_THRESH' in data.columns:
+            data['FCST_THRESH'] = pd.Categorical(
+                    data['FCST_THRESH'].astype(object),
+                    categories=config['levs'], ordered=True)
+
+        sort_cols = LABEL_COLS + [fld for fld in config['flds']
+                                  if fld in data.columns]
+        data = data.sort_values(by=sort_cols, kind='stable')
+
+        # clean NAs including non-matching categories
+        data = data.dropna(axis=1, how='all')
+
+        # drop columns of empty strings
+        for col in data.columns:
+            if (data[col].astype(object) == '').all():
+                data = data.drop(columns=[col])
+
+        # convert statistics to float values
+        for stat in config['stats']:
+            if stat in data.columns:
+                data[stat] = data[stat].astype('float')
+
+        # re-index based on row values
+        data.index = range(1, len(data.index) + 1)
+        data_dict[stat_type] = data
+
+    return data_dict
+
+def partitionDir(out_dir, cse, ctr_flw):
+    """Returns the directory of a case / control flow partition of a dataset"""
+    return out_dir + '/CASE=' + cse + '/CTR_FLW=' + ctr_flw
+
+def loadSummary(in_dir):
+    """Loads the summary metadata of a partitioned dataset, empty if none"""
+    in_path = in_dir + '/' + SUMMARY
+    if os.path.isfile(in_path):
+        with open(in_path) as f:
+            return json.load(f)
+
+    return {'partitions': {}, 'columns': {}, 'levs': None}
+
+def writeSummary(summary, out_dir, log_f=None):
+    """Writes the summary metadata of a partitioned dataset atomically"""
+    out_path = out_dir + '/' + SUMMARY
+    print('Writing out summary to ' + out_path, file=log_f)
+    tmp_path = out_path + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(summary, f, indent=1, sort_keys=True)
+
+    os.replace(tmp_path, out_path)
+
+def streamConcat(config, out_dir, workers=1, log_f=None):
+    """Concatenates the stat types of a sweep out-of-core to a dataset
+
+    Inputs to the method are as follows:
+
+        config  -- configuration dictionary of the sweep, see loadConfig
+        out_dir -- full path to directory of the output dataset
+        workers -- number of processes loading inputs in parallel, 1 by default
+        log_f   -- optional full path to log file
+
+    Inputs are loaded in chunks of at most CHUNK_INPUTS with loadChunk and
+    the frames of each chunk are streamed as a row group to the Parquet file
+
+        out_dir/CASE=cse/CTR_FLW=ctr_flw/stat_type.parquet
+
+    of its case / control flow partition, with at most WINDOW_CHUNKS chunks
+    per worker loaded ahead of the writer, so that memory does not grow with
+    the size of the sweep.  Rows of a partition are in sweep order.  The
+    columns, row counts and levs of the partitions are recorded in the
+    SUMMARY metadata, which is merged with an existing summary so that the
+    dataset grows by rerunning with new cases or control flows, where the
+    partitions of the sweep are replaced.  Returns the summary dictionary.
+    """
+    # check for a positive number of workers
+    if not (isinstance(workers, int) and workers > 0):
+        raise ValueError('Number of workers ' + str(workers) + ' is not a' +\
+                ' positive integer.')
+
+    # fix the columns of the stat types so that partitions share a schema
+    columns = {}
+    for stat_type in config['types']:
+        cols = getColumns(stat_type)
+        if not cols is None:
+            columns[stat_type] = ['GRID', 'PRFX'] +\
+                    [fld for fld in config['flds'] if fld in cols] +\
+                    [stat for stat in config['stats'] if stat in cols]
+
+    os.makedirs(out_dir, exist_ok=True)
+    summary = loadSummary(out_dir)
+    summary['levs'] = config['levs']
+
+    pool = None
+    if workers > 1:
+        pool = ProcessPoolExecutor(max_workers=workers)
+
+    try:
+        for cse in config['cses']:
+            for ctr_flw in config['ctr_flws']:
+                tasks = sweepTasks(config, cse, ctr_flw, workers,
+                        chunk_inputs=CHUNK_INPUTS, log_f=log_f)
+                print('Processing stat stores at paths:', file=log_f)
+                if len(tasks) < 2:
+                    results = mapWindow(None, loadChunk, tasks, 1)
+                else:
+                    results = mapWindow(pool, loadChunk, tasks,
+                            WINDOW_CHUNKS * workers)
+
+                part_dir = partitionDir(out_dir, cse, ctr_flw)
+                writer = StreamWriter(os.path.dirname(part_dir),
+                        os.path.basename(part_dir), columns=columns,
+                        log_f=log_f)
+                rows = {}
+                for chunk_frames, log_text in results:
+                    print(log_text, end='', file=log_f)
+                    for stat_type, stat_frames in chunk_frames.items():
+                        if len(stat_frames) == 0:
+                            continue
+
+                        # write the frames of a chunk as one row group
+                        data = pd.concat(stat_frames, axis=0,
+                                ignore_index=True)
+                        data = data.drop(columns=PARTITION_COLS)
+                        writer.write(stat_type, data)
+                        rows[stat_type] = rows.get(stat_type, 0) + len(data)
+                        if not stat_type in summary['columns']:
+                            summary['columns'][stat_type] =\
+                                    writer.writers[stat_type][2]
+
+                writer.close()
+
+                # remove files of stat types no longer in the partition
+                for stat_type in config['types']:
+                    out_path = part_dir + '/' + stat_type + STORE_EXT
+                    if not stat_type in rows and os.path.isfile(out_path):
+                        os.remove(out_path)
+
+                key = cse + '/' + ctr_flw
+                if len(rows) > 0:
+                    summary['partitions'][key] = {'CASE': cse,
+                            'CTR_FLW': ctr_flw, 'rows': rows}
+                else:
+                    summary['partitions'].pop(key, None)
+
+    finally:
+        if not pool is None:
+            pool.shutdown(cancel_futures=True)
+
+    writeSummary(summary, out_dir, log_f=log_f)
+    return summary
+
+def loadConcat(in_dir, stat_type, cses=None, ctr_flws=None, columns=None,
+        filters=None):
+    """Loads a stat type from the partitions of an out-of-core dataset
+
+    Inputs to the method are as follows:
+
+        in_dir    -- full path to directory of the dataset of streamConcat
+        stat_type -- MET stat type to load, e.g., 'cnt'
+        cses      -- optional list of cases, all partitions by default
+        ctr_flws  -- optional list of control flows, all by default
+        columns   -- optional list of columns to load, all if None
+        filters   -- optional list of (column, operator, value) tuples
+
+    Only the files of the selected partitions are read, with the columns and
+    filters pushed down to the Parquet reader.  Returns a data frame labelled
+    with the PARTITION_COLS, with FCST_THRESH ordered by the levs of the
+    summary if given.
+    """
+    summary = loadSummary(in_dir)
+    frames = []
+    for part in summary['partitions'].values():
+        if not stat_type in part['rows'] or\
+                (not cses is None and not part['CASE'] in cses) or\
+                (not ctr_flws is None and not part['CTR_FLW'] in ctr_flws):
+            continue
+
+        in_path = partitionDir(in_dir, part['CASE'], part['CTR_FLW']) +\
+                '/' + stat_type + STORE_EXT
+        data = pd.read_parquet(in_path, engine='pyarrow', columns=columns,
+                filters=filters)
+        for i_col, col in enumerate(PARTITION_COLS):
+            data.insert(i_col, col, part[col])
+
+        frames.append(data)
+
+    if len(frames) == 0:
+        return pd.DataFrame(columns=PARTITION_COLS +\
+                summary['columns'].get(stat_type, []))
+
+    data = pd.concat(frames, axis=0, ignore_index=True)
+    for col in PARTITION_COLS:
+        data[col] = data[col].astype('category')
+
+    if not summary['levs'] is None and 'FCST_THRESH' in data.columns:
+        data['FCST_THRESH'] = pd.Categorical(
+                data['FCST_THRESH'].astype(object),
+                categories=summary['levs'], ordered=True)
+
+    return data
+
+##################################################################################
+# end
@@ -42,12 +42,462 @@
 # Imports
 ##################################################################################
 from utilities import *
+from utilities.LineTypes import *
+from utilities.StatStore import *
+from utilities.StatCatalog import findCatalog, updateCatalog
+from concurrent.futures import ProcessPoolExecutor
+import sqlite3
+
+##################################################################################
+# PARAMETERS
+##################################################################################
+# Number of rows per batch of streamed line types
+CHUNK_ROWS = 100000
+
+# Minimum number of files per parallel parsing chunk, as a file parses in
+# about a millisecond a worker only pays off for chunks of several hundred
+# files, so that small inputs are parsed serially
+MIN_CHUNK_FILES = 250
 
 ##################################################################################
 # METHODS
 ##################################################################################
 
-def makeDataFrames(field, in_dir, out_dir, log_f=None):
+def parseLines(fnames, line_type, log_f=None):
+    """Parses whitespace delimited MET ASCII files line by line
+
+    Inputs to the method are as follows:
+
+        fnames    -- list of full paths to MET ASCII files of a common stat type
+        line_type -- MET line type of the files, unused by this engine
+        log_f     -- optional full path to log file
+
+    This is the legacy pure Python parser, tokenizing every line and appending
+    values to lists of strings keyed by column name.  It is retained as a
+    reference engine for benchmarking and validating the bulk parser.  The
+    file name of each row is recorded in the SRC_FILE column.  Returns a data
+    frame of string / NaN values, or None if no data was parsed, and an error
+    flag for empty files.
+    """
+    error_check = 0
+    tmp_dict = {}
+
+    for fname in fnames:
+        print('Opening file ' + fname, file=log_f)
+        with open(fname) as f:
+            cols = f.readline()
+            cols = cols.split()
+
+            if len(cols) > 0:
+                for col in cols + ['SRC_FILE']:
+                    if not col in tmp_dict:
+                        tmp_dict[col] = []
+
+                # parse file by line, concatenating columns
+                for line in f:
+                    split_line = line.split()
+
+                    for i_v, val in enumerate(split_line):
+                        if val == 'NA':
+                            # filter NA vals
+                            val = np.nan
+                        tmp_dict[cols[i_v]].append(val)
+
+                    if len(split_line) > 0:
+                        tmp_dict['SRC_FILE'].append(os.path.basename(fname))
+
+            else:
+                print('ERROR: file ' + fname + ' is empty.', file=log_f)
+                error_check = 1
+
+        print('Closing file ' + fname, file=log_f)
+
+    if not tmp_dict:
+        return None, error_check
+
+    return pd.DataFrame.from_dict(tmp_dict, orient='columns'), error_check
+
+def readTable(text, line_type, names=None):
+    """Reads whitespace delimited MET table text with the Pandas C parser
+
+    Inputs to the method are as follows:
+
+        text      -- string of table rows, led by a header row if names is None
+        line_type -- MET line type of the rows, used to set column types
+        names     -- optional list of column names for text without a header
+
+    The MET missing value code NA is mapped to NaN, numeric columns of the line
+    type schema are parsed directly to their final types and the remaining
+    columns are read as strings.
+    """
+    if names is None:
+        cols = text[:text.index('\n')].split()
+        header = 0
+    else:
+        cols = names
+        header = None
+
+    return pd.read_csv(io.StringIO(text), sep=r'\s+', header=header,
+            names=names, dtype=getReadDtypes(cols, line_type),
+            na_values=['NA'], keep_default_na=False, engine='c')
+
+def parseASCII(fnames, line_type, log_f=None):
+    """Parses whitespace delimited MET ASCII files in one vectorized call
+
+    Inputs to the method are as follows:
+
+        fnames    -- list of full paths to MET ASCII files of a common stat type
+        line_type -- MET line type of the files, used to set column types
+        log_f     -- optional full path to log file
+
+    The raw text of all files sharing a header is joined and read with a single
+    call of the Pandas C parser, splitting on whitespace and mapping the MET
+    missing value code NA to NaN.  This avoids the per-call overhead of the
+    parser on many small files.  Numeric columns of the line type schema are
+    parsed directly to their final types, with the remaining columns read as
+    strings, and the file name of each row is recorded in the SRC_FILE column.
+    Returns a data frame, or None if no data was parsed, and an error flag for
+    empty files.
+    """
+    error_check = 0
+
+    # group file bodies by header, in the sorted order of the files
+    bodies = {}
+    sources = {}
+    for fname in fnames:
+        print('Opening file ' + fname, file=log_f)
+        with open(fname) as f:
+            header = f.readline()
+            body = f.read()
+
+        if len(header.split()) > 0:
+            if not body.endswith('\n'):
+                body += '\n'
+
+            # count the non-blank rows of the file for the SRC_FILE column
+            n_rows = sum(1 for line in body.splitlines() if line.strip())
+
+            if header in bodies:
+                bodies[header].append(body)
+                sources[header].append([os.path.basename(fname), n_rows])
+            else:
+                bodies[header] = [body]
+                sources[header] = [[os.path.basename(fname), n_rows]]
+
+        else:
+            print('ERROR: file ' + fname + ' is empty.', file=log_f)
+            error_check = 1
+
+        print('Closing file ' + fname, file=log_f)
+
+    if not bodies:
+        return None, error_check
+
+    frames = []
+    for header, body in bodies.items():
+        tmp_df = readTable(header + ''.join(body), line_type)
+        names, counts = zip(*sources[header])
+        tmp_df['SRC_FILE'] = pd.Categorical(np.repeat(names, counts))
+        frames.append(tmp_df)
+
+    return pd.concat(frames, axis=0, ignore_index=True), error_check
+
+def statKey(line, i_lt):
+    """Returns the line type and field count key of a .stat file row
+
+    The field count is only computed for line types with a variable number of
+    columns, and is None otherwise.  Returns None for blank rows.
+    """
+    split_line = line.split(None, i_lt + 1)
+    if len(split_line) <= i_lt:
+        return None
+
+    line_type = split_line[i_lt]
+    if 'var' in LINE_TYPES.get(line_type.lower(), {}):
+        return line_type, len(line.split())
+
+    return line_type, None
+
+def readStatRows(line_type, n_fields, lines, sources, log_f=None):
+    """Reads rows of a .stat file line type into a data frame, or None"""
+    cols = getColumns(line_type, n_fields=n_fields)
+    if cols is None:
+        print('WARNING: line type ' + line_type + ' is not registered' +\
+                ' in LineTypes.py, skipping these rows.', file=log_f)
+        return None
+
+    tmp_df = readTable('\n'.join(lines) + '\n', line_type, names=cols)
+    tmp_df['SRC_FILE'] = pd.Categorical(sources)
+    return tmp_df
+
+def parseStat(fnames, log_f=None, skip_streamed=False):
+    """Parses combined MET .stat files into data frames by line type
+
+    Inputs to the method are as follows:
+
+        fnames        -- list of full paths to MET .stat files
+        log_f         -- optional full path to log file
+        skip_streamed -- if True, skip rows of streamed line types, to be
+                         written in batches by streamStat
+
+    The .stat file header only names the common columns, with the rows of all
+    line types following it.  Rows are split on the LINE_TYPE column and the
+    rows of each type are joined and read in a single call of the C parser,
+    with column names taken from the LineTypes.py registry and the file name of
+    each row recorded in the SRC_FILE column.  Rows of line types with a
+    variable number of columns are read separately for each column count.
+    Rows of line types outside of the registry are skipped with a warning.
+    Returns a dictionary of data frames keyed by lower case line type, in the
+    order of appearance, an error flag for empty files and the list of files
+    with skipped rows of streamed line types.
+    """
+    error_check = 0
+    i_lt = HEADER_COLS.index('LINE_TYPE')
+
+    # group rows by line type, in the sorted order of the files
+    rows = {}
+    sources = {}
+    stream_fnames = []
+    for fname in fnames:
+        print('Opening file ' + fname, file=log_f)
+        with open(fname) as f:
+            header = f.readline()
+
+            if len(header.split()) > 0:
+                src_file = os.path.basename(fname)
+                for line in f:
+                    key = statKey(line, i_lt)
+                    if key is None:
+                        continue
+
+                    if skip_streamed and isStreamed(key[0]):
+                        if not fname in stream_fnames:
+                            stream_fnames.append(fname)
+                        continue
+
+                    if key in rows:
+                        rows[key].append(line.rstrip('\n'))
+                        sources[key].append(src_file)
+                    else:
+                        rows[key] = [line.rstrip('\n')]
+                        sources[key] = [src_file]
+
+            else:
+                print('ERROR: file ' + fname + ' is empty.', file=log_f)
+                error_check = 1
+
+        print('Closing file ' + fname, file=log_f)
+
+    type_frames = {}
+    for key, lines in rows.items():
+        line_type, n_fields = key
+        tmp_df = readStatRows(line_type, n_fields, lines, sources[key],
+                log_f=log_f)
+        if not tmp_df is None:
+            type_frames.setdefault(line_type.lower(), []).append(tmp_df)
+
+    data_dict = {}
+    for line_type, frames in type_frames.items():
+        tmp_df = pd.concat(frames, axis=0, ignore_index=True)
+        cols = [col for col in tmp_df.columns if not col == 'SRC_FILE']
+        data_dict[line_type] = tmp_df[cols + ['SRC_FILE']]
+
+    return data_dict, error_check, stream_fnames
+
+def streamASCII(fnames, line_type, writer, chunk_rows=CHUNK_ROWS, log_f=None):
+    """Streams MET _TYPE.txt files of a large line type to the stat store
+
+    Inputs to the method are as follows:
+
+        fnames     -- list of full paths to MET ASCII files of the line type
+        line_type  -- MET line type of the files, used to set column types
+        writer     -- StreamWriter of the output store
+        chunk_rows -- number of rows per batch
+        log_f      -- optional full path to log file
+
+    Each file is read by the C parser in batches of chunk_rows rows, which are
+    typed and written to the store as they are read, so that memory use does
+    not depend on the file size.  Returns an error flag for empty files.
+    """
+    error_check = 0
+    for fname in fnames:
+        print('Opening file ' + fname, file=log_f)
+        with open(fname) as f:
+            cols = f.readline().split()
+            if len(cols) > 0:
+                reader = pd.read_csv(f, sep=r'\s+', header=None, names=cols,
+                        dtype=getReadDtypes(cols, line_type),
+                        na_values=['NA'], keep_default_na=False, engine='c',
+                        chunksize=chunk_rows)
+
+                for batch in reader:
+                    batch['SRC_FILE'] = pd.Categorical(
+                            [os.path.basename(fname)] * len(batch))
+                    writer.write(line_type, applySchema(batch, line_type))
+
+            else:
+                print('ERROR: file ' + fname + ' is empty.', file=log_f)
+                error_check = 1
+
+        print('Closing file ' + fname, file=log_f)
+
+    return error_check
+
+def streamStat(fnames, writer, chunk_rows=CHUNK_ROWS, log_f=None):
+    """Streams rows of large line types in MET .stat files to the stat store
+
+    Inputs to the method are as follows:
+
+        fnames     -- list of full paths to MET .stat files
+        writer     -- StreamWriter of the output store
+        chunk_rows -- number of rows per batch
+        log_f      -- optional full path to log file
+
+    Rows of streamed line types are buffered by line type and column count,
+    and each buffer is read and written to the store when it reaches
+    chunk_rows rows, so that memory use does not depend on the file size.
+    """
+    i_lt = HEADER_COLS.index('LINE_TYPE')
+    rows = {}
+    sources = {}
+
+    def flush(key):
+        line_type, n_fields = key
+        tmp_df = readStatRows(line_type, n_fields, rows[key], sources[key],
+                log_f=log_f)
+        if not tmp_df is None:
+            line_type = line_type.lower()
+            writer.write(line_type, applySchema(tmp_df, line_type))
+
+        rows[key] = []
+        sources[key] = []
+
+    for fname in fnames:
+        print('Opening file ' + fname, file=log_f)
+        with open(fname) as f:
+            f.readline()
+            src_file = os.path.basename(fname)
+            for line in f:
+                key = statKey(line, i_lt)
+                if key is None or not isStreamed(key[0]):
+                    continue
+
+                if key in rows:
+                    rows[key].append(line.rstrip('\n'))
+                    sources[key].append(src_file)
+                else:
+                    rows[key] = [line.rstrip('\n')]
+                    sources[key] = [src_file]
+
+                if len(rows[key]) == chunk_rows:
+                    flush(key)
+
+        print('Closing file ' + fname, file=log_f)
+
+    for key in rows:
+        if len(rows[key]) > 0:
+            flush(key)
+
+# Supported engines for parsing MET ASCII files
+ENGINES = {
+           'c': parseASCII,
+           'python': parseLines,
+          }
+
+def parseChunk(engine, fnames, line_type, skip_streamed=False):
+    """Parses a chunk of MET files in a worker process
+
+    Inputs to the method are as follows:
+
+        engine        -- parsing engine in ENGINES
+        fnames        -- list of full paths to MET files of the chunk
+        line_type     -- MET line type of _TYPE.txt files, or None for .stat
+        skip_streamed -- if True, skip rows of streamed line types in .stat
+
+    Log messages are collected in a string so that the parent process can
+    write them in the sorted order of the chunks.  Returns a dictionary of data
+    frames keyed by line type, the error flag, the log text and the list of
+    .stat files with skipped rows of streamed line types.
+    """
+    log_f = io.StringIO()
+    if line_type is None:
+        parsed, error_check, stream_fnames = parseStat(fnames, log_f=log_f,
+                skip_streamed=skip_streamed)
+
+    else:
+        tmp_df, error_check = ENGINES[engine](fnames, line_type, log_f=log_f)
+        stream_fnames = []
+        parsed = {}
+        if not tmp_df is None:
+            parsed[line_type] = tmp_df
+
+    return parsed, error_check, log_f.getvalue(), stream_fnames
+
+def splitChunks(fnames, workers, min_size=1):
+    """Splits a sorted list of files into contiguous chunks for each worker
+
+    Chunks hold at least min_size files, so that fewer chunks than workers
+    are made of short lists.
+    """
+    if len(fnames) == 0:
+        return []
+
+    n_chunks = max(1, min(workers, len(fnames) // min_size))
+    chunks = []
+    for i_c in range(n_chunks):
+        chunks.append(fnames[i_c * len(fnames) // n_chunks:
+                             (i_c + 1) * len(fnames) // n_chunks])
+
+    return chunks
+
+def streamColumns(fnames, stat=False):
+    """Returns the full column lists of streamed line types in MET files
+
+    Inputs to the method are as follows:
+
+        fnames -- list of full paths to MET ASCII files of streamed line types
+        stat   -- if True, fnames are combined .stat files
+
+    The headers of _TYPE.txt files are joined in order of appearance, while
+    the rows of .stat files are scanned for the largest column count of each
+    line type, whose column list includes those of smaller counts.  Returns a
+    dictionary of column lists, with the SRC_FILE column, by line type.
+    """
+    columns = {}
+    if stat:
+        i_lt = HEADER_COLS.index('LINE_TYPE')
+        n_max = {}
+        for fname in fnames:
+            with open(fname) as f:
+                f.readline()
+                for line in f:
+                    key = statKey(line, i_lt)
+                    if key is None or not isStreamed(key[0]):
+                        continue
+
+                    n_max[key[0]] = max(n_max.get(key[0], 0), key[1] or 0)
+
+        for line_type, n_fields in n_max.items():
+            cols = getColumns(line_type, n_fields=n_fields or None)
+            if not cols is None:
+                columns[line_type.lower()] = cols + ['SRC_FILE']
+
+    else:
+        for fname in fnames:
+            postfix = os.path.basename(fname).split('_')[-1].split('.')[0]
+            with open(fname) as f:
+                cols = columns.setdefault(postfix, [])
+                for col in f.readline().split():
+                    if not col in cols:
+                        cols.append(col)
+
+        for cols in columns.values():
+            cols.append('SRC_FILE')
+
+    return columns
+
+def makeDataFrames(field, in_dir, out_dir, log_f=None, engine='c',
+        stat=False, out_fmt='parquet', workers=1, incremental=False):
 
     """Parses ASCII files of MET outputs into Pandas data frames
 
@@ -57,11 +507,45 @@ def makeDataFrames(field, in_dir, out_dir, log_f=None):
         in_dir  -- full path to directory of MET ASCII outputs
         out_dir -- full path to directory of output binary
         log_f   -- optional full path to log file
+        engine  -- parsing engine in ENGINES, vectorized 'c' by default
+        stat    -- if True, parse the combined .stat files in place of the
+                   per line type _TYPE.txt files
+        out_fmt -- 'parquet' for the columnar store in StatStore.py, or 'bin'
+                   for the legacy pickled dictionary
+        workers -- number of processes parsing files in parallel, 1 by default
+        incremental -- if True, parse only files that are new or changed
+                   since the last run and merge them into the existing store
 
     The method globs the input directory for patterns with the MET tool prefix
     and the forecast initialization date and converts all matching files into
-    data frames stored in a pickled dictionary at the output path.  Different
-    MET stat types are used as key names in the dictionary for the data frames.
+    data frames written to the stat store out_dir/field/stat_type.parquet, or
+    to a pickled dictionary at out_dir/field.bin, where different MET stat
+    types are used as key names in the dictionary for the data frames.
+    Columns are typed at parse time with the line type schema in LineTypes.py.
+    The combined .stat files are always parsed with the vectorized C parser.
+
+    With more than one worker, the sorted files of each type are split into
+    contiguous chunks parsed across a process pool, and the chunks are merged
+    in sorted order so that the outputs do not depend on the worker count.
+
+    Line types flagged as streamed in LineTypes.py, such as MPR, ORANK and
+    PCT, are not held in memory when writing to the columnar store.  These
+    are read in batches of CHUNK_ROWS rows that are written to the store file
+    of the line type as row groups, so that peak memory does not grow with
+    the size of the outputs.
+
+    Parquet stores are written with a manifest of the ingested files, with
+    their paths, sizes and mtimes, and content hashes in incremental mode,
+    which hashes files only when they are new or their size or mtime changed.
+    In incremental mode, only files that are not in the manifest or whose
+    contents changed are parsed, and rows of the existing store from changed
+    files are replaced by the newly parsed rows, in every stat type, including
+    those the files no longer produce.  Rows and manifest entries of files no
+    longer in the input directory are removed from the store.
+
+    If a catalog of StatCatalog.py exists at or above the output directory,
+    the entries of the written store or binary are updated in the catalog,
+    so that readers querying the catalog see newly parsed cycles.
     """
 
     # create trigger for handling errors
@@ -78,11 +562,39 @@ def makeDataFrames(field, in_dir, out_dir, log_f=None):
         print('ERROR: output data root directory ' + out_dir +\
                 ' does not exist.', file=log_f)
         error_check = 1
- 
+
+    # check for a supported output format
+    if not out_fmt in ['parquet', 'bin']:
+        print('ERROR: output format ' + out_fmt + ' is not supported.',
+                file=log_f)
+        return 1
+
+    # check for a supported parsing engine
+    if not engine in ENGINES:
+        print('ERROR: parsing engine ' + engine + ' is not supported.',
+                file=log_f)
+        return 1
+
+    # check for a columnar store in incremental mode
+    if incremental and not out_fmt == 'parquet':
+        print('ERROR: incremental mode requires the parquet output format.',
+                file=log_f)
+        return 1
+
+    # check for a positive number of workers
+    if not (isinstance(workers, int) and workers > 0):
+        print('ERROR: number of workers ' + str(workers) + ' is not a' +\
+                ' positive integer.', file=log_f)
+        return 1
+
     # initiate empty dictionary for storage of outputs by stat type
     data_dict = {}
 
-    in_glob = in_dir + '/*' + field + '*.txt'
+    if stat:
+        in_glob = in_dir + '/*' + field + '*.stat'
+    else:
+        in_glob = in_dir + '/*' + field + '*.txt'
+
     print('Searching path pattern:\n' + INDT + in_glob, file=log_f)
 
     # Sorting first on length to handle non-padded forecast hours in MET
@@ -95,65 +607,178 @@ def makeDataFrames(field, in_dir, out_dir, log_f=None):
         for fname in fnames:
             print(INDT + 'Found ' + fname, file=log_f)
 
-    for fname in fnames:
-        print('Opening file ' + fname, file=log_f)
+    # load the manifest of previously ingested files in incremental mode
+    old_manifest = {}
+    if out_fmt == 'parquet':
+        if incremental:
+            old_manifest = loadManifest(out_dir, field)
 
-        # cut the diagnostic type from file name
-        split_name = fname.split('/')[-1]
-        split_name = split_name.split('_')
-        postfix = split_name[-1].split('.')
-        postfix = postfix[0]
- 
-        # open file, load column names, then loop lines
-        with open(fname) as f:
-            cols = f.readline()
-            cols = cols.split()
- 
-            if len(cols) > 0:
-                tmp_dict = {}
- 
-                print(INDT + 'Loading columns:', file=log_f)
-                for col in cols:
-                    print(INDT * 2 + col, file=log_f)
-                    tmp_dict[col] = [] 
- 
-                # parse file by line, concatenating columns
-                for line in f:
-                    split_line = line.split()
- 
-                    for i_v, val in enumerate(split_line):
-                        if val == 'NA':
-                            # filter NA vals
-                            val = np.nan
-                        tmp_dict[cols[i_v]].append(val)
- 
-                if postfix in data_dict.keys():
-                    for col in tmp_dict.keys():
-                        data_dict[postfix][col] = data_dict[postfix][col] +\
-                                tmp_dict[col]
+        print('Checking files against the store manifest:', file=log_f)
+        in_files = [os.path.basename(fname) for fname in fnames]
+        fnames, manifest = checkManifest(fnames, old_manifest,
+                content_hash=incremental, log_f=log_f)
+        src_files = [os.path.basename(fname) for fname in fnames]
 
-                else:
-                    data_dict[postfix] = tmp_dict
+        # forget files removed from the input directory, unless none matched
+        removed = []
+        if len(in_files) > 0:
+            removed = [name for name in old_manifest if not name in in_files]
 
+        for name in removed:
+            print(INDT + 'Removed ' + name, file=log_f)
+            del manifest[name]
+
+        # rows of changed and removed files are dropped from every stat type
+        drop_files = src_files + removed
+
+        if incremental and len(fnames) == 0:
+            print(INDT + 'No new or changed files to parse.', file=log_f)
+            if len(removed) > 0:
+                dropStats(out_dir, field, removed, log_f=log_f)
+
+            writeManifest(manifest, out_dir, field, log_f=log_f)
+            return error_check
+
+    # large line types are streamed in batches into the columnar store
+    skip_streamed = out_fmt == 'parquet'
+    stream_types = {}
+
+    # define parsing tasks of contiguous file chunks in sorted order
+    tasks = []
+    if stat:
+        print('Parsing .stat files with c engine', file=log_f)
+        for chunk in splitChunks(fnames, workers, min_size=MIN_CHUNK_FILES):
+            tasks.append(['c', chunk, None, skip_streamed])
+
+    else:
+        # group file names by the diagnostic type cut from the file name
+        type_fnames = {}
+        for fname in fnames:
+            split_name = fname.split('/')[-1]
+            split_name = split_name.split('_')
+            postfix = split_name[-1].split('.')
+            postfix = postfix[0]
+
+            if postfix in type_fnames:
+                type_fnames[postfix].append(fname)
             else:
-                print('ERROR: file ' + in_path + ' is empty.', file=log_f)
-                error_check = 1
+                type_fnames[postfix] = [fname]
 
-        print('Closing file ' + fname, file=log_f)
+        for postfix, type_files in type_fnames.items():
+            if skip_streamed and isStreamed(postfix):
+                stream_types[postfix] = type_files
+                continue
+
+            print('Parsing ' + postfix + ' files with ' + engine + ' engine',
+                    file=log_f)
+            for chunk in splitChunks(type_files, workers,
+                    min_size=MIN_CHUNK_FILES):
+                tasks.append([engine, chunk, postfix, skip_streamed])
+
+    # parse small inputs serially, where the pool start-up and the transfer of
+    # the parsed frames cost more than the parallel parsing saves
+    if workers > 1 and len(tasks) > 1 and\
+            sum([len(task[1]) for task in tasks]) >= 2 * MIN_CHUNK_FILES:
+        print('Parsing ' + str(len(tasks)) + ' chunks with ' + str(workers) +\
+                ' workers', file=log_f)
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(parseChunk, *zip(*tasks)))
+    else:
+        results = [parseChunk(*task) for task in tasks]
+
+    # merge the parsed chunks in sorted order
+    type_frames = {}
+    stream_fnames = []
+    for parsed, parse_error, log_text, chunk_stream in results:
+        print(log_text, end='', file=log_f)
+        error_check = max(error_check, parse_error)
+        stream_fnames += chunk_stream
+        for postfix, tmp_df in parsed.items():
+            if postfix in type_frames:
+                type_frames[postfix].append(tmp_df)
+            else:
+                type_frames[postfix] = [tmp_df]
+
+    type_dfs = {}
+    for postfix, frames in type_frames.items():
+        if len(frames) > 1:
+            type_dfs[postfix] = pd.concat(frames, axis=0, ignore_index=True)
+        else:
+            type_dfs[postfix] = frames[0]
+
+    for postfix, tmp_df in type_dfs.items():
+        print(INDT + 'Loaded ' + postfix + ' columns:', file=log_f)
+        for col in tmp_df.columns:
+            print(INDT * 2 + col, file=log_f)
+
+        tmp_df = pd.DataFrame.dropna(tmp_df, axis=1, how='all')
+        data_dict[postfix] = applySchema(tmp_df, postfix)
     
-    if bool(data_dict):
-        # re-define the stored dictionaries as dataframes
-        for key in data_dict.keys():
-            data_dict[key] = pd.DataFrame.dropna(
-                    pd.DataFrame.from_dict(data_dict[key], orient='columns'),
-                    axis=1, how='all')
+    # stream large line types in batches of CHUNK_ROWS rows
+    streamed = len(stream_types) > 0 or len(stream_fnames) > 0
+    streamed_types = []
+    if streamed:
+        if stat:
+            columns = streamColumns(stream_fnames, stat=True)
+        else:
+            columns = streamColumns(sum(stream_types.values(), []))
+
+        writer = StreamWriter(out_dir, field, columns=columns,
+                drop_files=drop_files if bool(old_manifest) else None,
+                log_f=log_f)
+        for postfix, type_files in stream_types.items():
+            print('Streaming ' + postfix + ' files with c engine',
+                    file=log_f)
+            stream_error = streamASCII(type_files, postfix, writer,
+                    log_f=log_f)
+            error_check = max(error_check, stream_error)
+
+        if len(stream_fnames) > 0:
+            print('Streaming large line types of .stat files', file=log_f)
+            streamStat(stream_fnames, writer, log_f=log_f)
 
+        streamed_types = list(writer.writers)
+        writer.close()
+
+    if bool(data_dict) and out_fmt == 'parquet':
+        if bool(old_manifest):
+            print('Merging new rows into the existing store', file=log_f)
+            data_dict = mergeStats(data_dict, out_dir, field, drop_files,
+                    log_f=log_f)
+
+        writeStats(data_dict, out_dir, field, log_f=log_f)
+
+    if out_fmt == 'parquet' and bool(old_manifest):
+        # drop rows of changed files from stat types not rewritten above
+        dropStats(out_dir, field, drop_files,
+                skip=list(data_dict) + streamed_types, log_f=log_f)
+        writeManifest(manifest, out_dir, field, log_f=log_f)
+
+    elif (bool(data_dict) or streamed) and out_fmt == 'parquet':
+        # remove stat types of a previous run missing from a full rewrite
+        pruneStats(out_dir, field, list(data_dict) + streamed_types,
+                log_f=log_f)
+
+        writeManifest(manifest, out_dir, field, log_f=log_f)
+
+    elif bool(data_dict):
         # define the output binary file for pickled dataframe per date
         out_path = out_dir + '/' + field + '.bin'
         print('Writing out data to ' + out_path, file=log_f)
         with open(out_path, 'wb') as f:
             pickle.dump(data_dict, f)
 
+    # update the catalog of the verification tree with the written outputs
+    catalog = findCatalog(out_dir)
+    if not catalog is None and (bool(data_dict) or streamed or\
+            bool(old_manifest)):
+        try:
+            updateCatalog(catalog, out_dir, [field], log_f=log_f)
+        except sqlite3.Error as err:
+            print('WARNING: catalog ' + catalog + ' was not updated, run' +\
+                    ' build_catalog.py to index the outputs: ' + str(err),
+                    file=log_f)
+
     return error_check
 
 ##################################################################################
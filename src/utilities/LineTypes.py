@@ -0,0 +1,423 @@
+##################################################################################
+# Description
+##################################################################################
+# This module defines the column layout of MET ASCII line types and the schema
+# of data types assigned to these columns when parsing MET outputs into Pandas
+# data frames.  Column definitions follow the MET version 11.1 output tables.
+#
+##################################################################################
+# License Statement:
+##################################################################################
+##################################################################################
+# License Statement:
+##################################################################################
+# This software is Copyright © 2024 The Regents of the University of California.
+# All Rights Reserved. Permission to copy, modify, and distribute this software
+# and its documentation for educational, research and non-profit purposes,
+# without fee, and without a written agreement is hereby granted, provided that
+# the above copyright notice, this paragraph and the following three paragraphs
+# appear in all copies. Permission to make commercial use of this software may
+# be obtained by contacting:
+#
+#     Office of Innovation and Commercialization
+#     9500 Gilman Drive, Mail Code 0910
+#     University of California
+#     La Jolla, CA 92093-0910
+#     innovation@ucsd.edu
+#
+# This software program and documentation are copyrighted by The Regents of the
+# University of California. The software program and documentation are supplied
+# "as is", without any accompanying services from The Regents. The Regents does
+# not warrant that the operation of the program will be uninterrupted or
+# error-free. The end-user understands that the program was developed for
+# research purposes and is advised not to rely exclusively on the program for
+# any reason.
+#
+# IN NO EVENT SHALL THE UNIVERSITY OF CALIFORNIA BE LIABLE TO ANY PARTY FOR
+# DIRECT, INDIRECT, SPECIAL, INCIDENTAL, OR CONSEQUENTIAL DAMAGES, INCLUDING
+# LOST PROFITS, ARISING OUT OF THE USE OF THIS SOFTWARE AND ITS DOCUMENTATION,
+# EVEN IF THE UNIVERSITY OF CALIFORNIA HAS BEEN ADVISED OF THE POSSIBILITY OF
+# SUCH DAMAGE. THE UNIVERSITY OF CALIFORNIA SPECIFICALLY DISCLAIMS ANY
+# WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF
+# MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE. THE SOFTWARE PROVIDED
+# HEREUNDER IS ON AN “AS IS” BASIS, AND THE UNIVERSITY OF CALIFORNIA HAS NO
+# OBLIGATIONS TO PROVIDE MAINTENANCE, SUPPORT, UPDATES, ENHANCEMENTS, OR
+# MODIFICATIONS.
+# 
+##################################################################################
+# Imports
+##################################################################################
+from utilities import *
+
+##################################################################################
+# MET LINE TYPE DEFINITIONS
+##################################################################################
+# Common header columns written for every MET line type
+HEADER_COLS = [
+               'VERSION',
+               'MODEL',
+               'DESC',
+               'FCST_LEAD',
+               'FCST_VALID_BEG',
+               'FCST_VALID_END',
+               'OBS_LEAD',
+               'OBS_VALID_BEG',
+               'OBS_VALID_END',
+               'FCST_VAR',
+               'FCST_UNITS',
+               'FCST_LEV',
+               'OBS_VAR',
+               'OBS_UNITS',
+               'OBS_LEV',
+               'OBTYPE',
+               'VX_MASK',
+               'INTERP_MTHD',
+               'INTERP_PNTS',
+               'FCST_THRESH',
+               'OBS_THRESH',
+               'COV_THRESH',
+               'ALPHA',
+               'LINE_TYPE',
+              ]
+
+def ci_cols(stats, ncl=True, bcl=True):
+    """Expands statistic names with their normal / bootstrap CI columns"""
+    cols = []
+    for stat in stats:
+        cols.append(stat)
+        if ncl:
+            cols += [stat + '_NCL', stat + '_NCU']
+        if bcl:
+            cols += [stat + '_BCL', stat + '_BCU']
+
+    return cols
+
+# Contingency table statistics shared by CTS and NBRCTS
+CTS_COLS = ['TOTAL'] +\
+        ci_cols(['BASER', 'FMEAN', 'ACC']) +\
+        ci_cols(['FBIAS'], ncl=False) +\
+        ci_cols(['PODY', 'PODN', 'POFD', 'FAR', 'CSI']) +\
+        ci_cols(['GSS'], ncl=False) +\
+        ci_cols(['HK']) +\
+        ci_cols(['HSS'], ncl=False) +\
+        ci_cols(['ODDS', 'LODDS', 'ORSS', 'EDS', 'SEDS', 'EDI', 'SEDI']) +\
+        ci_cols(['BAGSS'], ncl=False)
+
+def pct_cols(n_cols):
+    """Returns the PCT columns for n_cols line type columns of a row"""
+    n_thresh = (n_cols - 3) // 3 + 1
+    cols = ['TOTAL', 'N_THRESH']
+    for i_t in range(1, n_thresh):
+        cols += ['THRESH_' + str(i_t), 'OY_' + str(i_t), 'ON_' + str(i_t)]
+
+    return cols + ['THRESH_' + str(n_thresh)]
+
+# ORANK columns before / after the variable number of ensemble member values
+ORANK_HEAD = ['TOTAL', 'INDEX', 'OBS_SID', 'OBS_LAT', 'OBS_LON', 'OBS_LVL',
+              'OBS_ELV', 'OBS', 'PIT', 'RANK', 'N_ENS_VLD', 'N_ENS']
+
+ORANK_TAIL = ['OBS_QC', 'ENS_MEAN', 'CLIMO_MEAN', 'SPREAD', 'ENS_MEAN_OERR',
+              'SPREAD_OERR', 'SPREAD_PLUS_OERR', 'CLIMO_STDEV']
+
+def orank_cols(n_cols):
+    """Returns the ORANK columns for n_cols line type columns of a row"""
+    n_ens = n_cols - len(ORANK_HEAD) - len(ORANK_TAIL)
+    cols = ['ENS_' + str(i_e) for i_e in range(1, n_ens + 1)]
+    return ORANK_HEAD + cols + ORANK_TAIL
+
+# Line type specific columns following the common header, keyed by the lower
+# case line type used as MET ASCII file postfix and data frame dictionary key,
+# with the floating point precision of the statistic columns.  Line types with
+# a variable number of columns define 'var' as a method of the number of line
+# type columns of a row, with 'var_dtypes' matching column names to types.
+# Line types with 'stream' set can have millions of rows per file and are
+# streamed to the output store in fixed size batches.
+LINE_TYPES = {
+        'fho': {
+            'cols': ['TOTAL', 'F_RATE', 'H_RATE', 'O_RATE'],
+            'dtype': 'float32',
+            },
+        'ctc': {
+            'cols': ['TOTAL', 'FY_OY', 'FY_ON', 'FN_OY', 'FN_ON', 'EC_VALUE'],
+            'dtype': 'float64',
+            },
+        'cts': {
+            'cols': CTS_COLS + ci_cols(['HSS_EC'], ncl=False) + ['EC_VALUE'],
+            'dtype': 'float32',
+            },
+        'cnt': {
+            'cols': ['TOTAL'] +\
+                    ci_cols(['FBAR', 'FSTDEV', 'OBAR', 'OSTDEV', 'PR_CORR']) +\
+                    ['SP_CORR', 'KT_CORR', 'RANKS', 'FRANK_TIES',
+                     'ORANK_TIES'] +\
+                    ci_cols(['ME', 'ESTDEV']) +\
+                    ci_cols(['MBIAS', 'MAE', 'MSE', 'BCMSE', 'RMSE', 'E10',
+                             'E25', 'E50', 'E75', 'E90', 'EIQR', 'MAD'],
+                             ncl=False) +\
+                    ci_cols(['ANOM_CORR']) +\
+                    ci_cols(['ME2', 'MSESS', 'RMSFA', 'RMSOA',
+                             'ANOM_CORR_UNCNTR', 'SI'], ncl=False),
+            'dtype': 'float32',
+            },
+        'sl1l2': {
+            'cols': ['TOTAL', 'FBAR', 'OBAR', 'FOBAR', 'FFBAR', 'OOBAR',
+                     'MAE'],
+            'dtype': 'float64',
+            },
+        'sal1l2': {
+            'cols': ['TOTAL', 'FABAR', 'OABAR', 'FOABAR', 'FFABAR', 'OOABAR',
+                     'MAE'],
+            'dtype': 'float64',
+            },
+        'nbrctc': {
+            'cols': ['TOTAL', 'FY_OY', 'FY_ON', 'FN_OY', 'FN_ON'],
+            'dtype': 'float64',
+            },
+        'nbrcts': {
+            'cols': CTS_COLS,
+            'dtype': 'float32',
+            },
+        'nbrcnt': {
+            'cols': ['TOTAL'] +\
+                    ci_cols(['FBS', 'FSS', 'AFSS', 'UFSS', 'F_RATE',
+                             'O_RATE'], ncl=False),
+            'dtype': 'float32',
+            },
+        'grad': {
+            'cols': ['TOTAL', 'FGBAR', 'OGBAR', 'MGBAR', 'EGBAR', 'S1',
+                     'S1_OG', 'FGOG_RATIO', 'DX', 'DY'],
+            'dtype': 'float32',
+            },
+        'pct': {
+            'cols': ['TOTAL', 'N_THRESH'],
+            'var': pct_cols,
+            'var_dtypes': [(r'^THRESH_\d+$', 'float64'),
+                           (r'^O[YN]_\d+$', 'Int64')],
+            'dtype': 'float64',
+            'stream': True,
+            },
+        'mpr': {
+            'cols': ['TOTAL', 'INDEX', 'OBS_SID', 'OBS_LAT', 'OBS_LON',
+                     'OBS_LVL', 'OBS_ELV', 'FCST', 'OBS', 'OBS_QC',
+                     'CLIMO_MEAN', 'CLIMO_STDEV', 'CLIMO_CDF'],
+            'dtype': 'float32',
+            'stream': True,
+            },
+        'orank': {
+            'cols': ORANK_HEAD + ORANK_TAIL,
+            'var': orank_cols,
+            'var_dtypes': [(r'^ENS_\d+$', 'float32')],
+            'dtype': 'float32',
+            'stream': True,
+            },
+        }
+
+##################################################################################
+# COLUMN SCHEMA
+##################################################################################
+# Columns of forecast / observation leads in MET HHMMSS format, stored as
+# integer seconds
+LEAD_COLS = [
+             'FCST_LEAD',
+             'OBS_LEAD',
+            ]
+
+# Columns of valid times in MET YYYYMMDD_HHMMSS format, stored as datetime64
+TIME_COLS = [
+             'FCST_VALID_BEG',
+             'FCST_VALID_END',
+             'OBS_VALID_BEG',
+             'OBS_VALID_END',
+            ]
+
+# Columns of labels with few unique values, stored as categoricals, including
+# the source file name of each row and the workflow parameter columns of
+# concatenated data frames
+CATEGORY_COLS = [
+                 'VERSION',
+                 'MODEL',
+                 'DESC',
+                 'FCST_VAR',
+                 'FCST_UNITS',
+                 'FCST_LEV',
+                 'OBS_VAR',
+                 'OBS_UNITS',
+                 'OBS_LEV',
+                 'OBTYPE',
+                 'VX_MASK',
+                 'INTERP_MTHD',
+                 'FCST_THRESH',
+                 'OBS_THRESH',
+                 'COV_THRESH',
+                 'LINE_TYPE',
+                 'OBS_SID',
+                 'OBS_QC',
+                 'SRC_FILE',
+                 'CASE',
+                 'CTR_FLW',
+                 'GRID',
+                 'PRFX',
+                ]
+
+# Columns of counts, stored as nullable integers
+COUNT_COLS = [
+              'INTERP_PNTS',
+              'TOTAL',
+              'FY_OY',
+              'FY_ON',
+              'FN_OY',
+              'FN_ON',
+              'RANKS',
+              'FRANK_TIES',
+              'ORANK_TIES',
+              'INDEX',
+              'RANK',
+              'N_ENS_VLD',
+              'N_ENS',
+              'N_THRESH',
+             ]
+
+# Format of MET valid time stamps
+TIME_FMT = '%Y%m%d_%H%M%S'
+
+def getSchema(line_type, cols=None):
+    """Returns a dictionary of column names to data types for a line type
+
+    Inputs to the method are as follows:
+
+        line_type -- MET line type, in upper or lower case
+        cols      -- optional column names, typing variable line type columns
+
+    Header columns are assigned the codes 'lead' for integer seconds, and
+    'datetime' for datetime64 values, with categorical / count columns
+    assigned 'category' / 'Int64'.  Statistic columns of registered line types
+    are assigned the floating point precision in LINE_TYPES, and variable
+    columns in cols are typed by the 'var_dtypes' patterns.  Line types not in
+    the registry are returned with the header schema only.
+    """
+    schema = {}
+    for col in HEADER_COLS + ['SRC_FILE', 'CASE', 'CTR_FLW', 'GRID', 'PRFX']:
+        if col in LEAD_COLS:
+            schema[col] = 'lead'
+        elif col in TIME_COLS:
+            schema[col] = 'datetime'
+        elif col in CATEGORY_COLS:
+            schema[col] = 'category'
+        elif col in COUNT_COLS:
+            schema[col] = 'Int64'
+        else:
+            schema[col] = 'float32'
+
+    line_type = line_type.lower()
+    if line_type in LINE_TYPES:
+        for col in LINE_TYPES[line_type]['cols']:
+            if col in CATEGORY_COLS:
+                schema[col] = 'category'
+            elif col in COUNT_COLS:
+                schema[col] = 'Int64'
+            else:
+                schema[col] = LINE_TYPES[line_type]['dtype']
+
+        if 'var_dtypes' in LINE_TYPES[line_type] and not cols is None:
+            for col in cols:
+                for pattern, dtype in LINE_TYPES[line_type]['var_dtypes']:
+                    if not col in schema and re.match(pattern, col):
+                        schema[col] = dtype
+
+    return schema
+
+def getColumns(line_type, n_fields=None):
+    """Returns the full column list of a registered line type, or None
+
+    Rows of the combined .stat file carry no line type specific header, so the
+    column names are taken from the common header and the LINE_TYPES registry.
+    Line types with a variable number of columns require the number of fields
+    n_fields of the row, including the common header.
+    """
+    line_type = line_type.lower()
+    if not line_type in LINE_TYPES:
+        return None
+
+    if 'var' in LINE_TYPES[line_type]:
+        if n_fields is None:
+            return None
+
+        return HEADER_COLS +\
+                LINE_TYPES[line_type]['var'](n_fields - len(HEADER_COLS))
+
+    return HEADER_COLS + LINE_TYPES[line_type]['cols']
+
+def isStreamed(line_type):
+    """Returns True if a line type is streamed to the store in batches"""
+    line_type = line_type.lower()
+    return line_type in LINE_TYPES and\
+            LINE_TYPES[line_type].get('stream', False)
+
+def getReadDtypes(cols, line_type):
+    """Returns data types for reading columns directly with the CSV parser
+
+    Numeric columns are parsed to their final type, while leads are read as
+    floating point HHMMSS values and times as strings to be converted after
+    concatenation.  Categoricals are parsed as categories and re-encoded after
+    concatenation.  Columns outside the schema are read as strings.
+    """
+    schema = getSchema(line_type, cols=cols)
+    dtypes = {}
+    for col in cols:
+        dtype = schema.get(col, 'str')
+        if dtype == 'lead':
+            dtype = 'float64'
+        elif dtype == 'datetime':
+            dtype = 'str'
+
+        dtypes[col] = dtype
+
+    return dtypes
+
+def convertLead(vals):
+    """Converts MET leads in HHMMSS format to integer seconds"""
+    vals = pd.to_numeric(vals, errors='coerce')
+    secs = (vals // 10000) * 3600 + ((vals // 100) % 100) * 60 + vals % 100
+    return secs.astype('Int64')
+
+def applySchema(data, line_type):
+    """Assigns typed columns to a parsed data frame of a MET line type
+
+    Inputs to the method are as follows:
+
+        data      -- data frame of a MET line type, string or typed columns
+        line_type -- MET line type, in upper or lower case
+
+    Columns are converted according to getSchema, where columns that already
+    have the target type are left unchanged so the method can be applied to
+    both newly parsed frames and legacy frames of string values.  Columns
+    outside the schema are not modified.  Returns the typed data frame.
+    """
+    schema = getSchema(line_type, cols=data.columns)
+    data = data.copy()
+
+    for col in data.columns:
+        if not col in schema:
+            continue
+
+        dtype = schema[col]
+        vals = data[col]
+        if dtype == 'lead':
+            if not pd.api.types.is_integer_dtype(vals):
+                data[col] = convertLead(vals)
+
+        elif dtype == 'datetime':
+            if not pd.api.types.is_datetime64_any_dtype(vals):
+                data[col] = pd.to_datetime(vals, format=TIME_FMT)
+
+        elif dtype == 'category':
+            if not isinstance(vals.dtype, pd.CategoricalDtype):
+                data[col] = vals.astype('category')
+
+        elif not vals.dtype == dtype:
+            data[col] = pd.to_numeric(vals, errors='coerce').astype(dtype)
+
+    return data
+
+##################################################################################
+# end
@@ -0,0 +1,412 @@
+##################################################################################
+# Description
+##################################################################################
+# This module defines the catalog of parsed MET statistics, an SQLite database
+# at the root of the verification tree indexing every stat store and legacy
+# .bin dictionary by case, control flow, MET tool, verification reference,
+# cycle, member, grid, verification field and stat type.  Readers resolve the
+# existing statistics with one indexed query in place of filesystem probes.
+#
+##################################################################################
+# License Statement:
+##################################################################################
+# This software is Copyright © 2024 The Regents of the University of California.
+# All Rights Reserved. Permission to copy, modify, and distribute this software
+# and its documentation for educational, research and non-profit purposes,
+# without fee, and without a written agreement is hereby granted, provided that
+# the above copyright notice, this paragraph and the following three paragraphs
+# appear in all copies. Permission to make commercial use of this software may
+# be obtained by contacting:
+#
+#     Office of Innovation and Commercialization
+#     9500 Gilman Drive, Mail Code 0910
+#     University of California
+#     La Jolla, CA 92093-0910
+#     innovation@ucsd.edu
+#
+# This software program and documentation are copyrighted by The Regents of the
+# University of California. The software program and documentation are supplied
+# "as is", without any accompanying services from The Regents. The Regents does
+# not warrant that the operation of the program will be uninterrupted or
+# error-free. The end-user understands that the program was developed for
+# research purposes and is advised not to rely exclusively on the program for
+# any reason.
+#
+# IN NO EVENT SHALL THE UNIVERSITY OF CALIFORNIA BE LIABLE TO ANY PARTY FOR
+# DIRECT, INDIRECT, SPECIAL, INCIDENTAL, OR CONSEQUENTIAL DAMAGES, INCLUDING
+# LOST PROFITS, ARISING OUT OF THE USE OF THIS SOFTWARE AND ITS DOCUMENTATION,
+# EVEN IF THE UNIVERSITY OF CALIFORNIA HAS BEEN ADVISED OF THE POSSIBILITY OF
+# SUCH DAMAGE. THE UNIVERSITY OF CALIFORNIA SPECIFICALLY DISCLAIMS ANY
+# WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF
+# MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE. THE SOFTWARE PROVIDED
+# HEREUNDER IS ON AN “AS IS” BASIS, AND THE UNIVERSITY OF CALIFORNIA HAS NO
+# OBLIGATIONS TO PROVIDE MAINTENANCE, SUPPORT, UPDATES, ENHANCEMENTS, OR
+# MODIFICATIONS.
+# 
+##################################################################################
+# Imports
+##################################################################################
+from utilities import *
+from utilities.StatStore import *
+import sqlite3
+
+##################################################################################
+# CATALOG DEFINITIONS
+##################################################################################
+# File name of the catalog database at the root of the verification tree
+CATALOG = 'stat_catalog.sqlite'
+
+# Columns of the catalog table, one row per stat type of a store or binary
+CATALOG_COLS = [
+                'path',
+                'field',
+                'stat_type',
+                'fmt',
+                'cse',
+                'ctr_flw',
+                'met_tool',
+                'vrf_ref',
+                'cycle',
+                'mem',
+                'grid',
+                'n_rows',
+                'columns',
+                'mtime',
+               ]
+
+CATALOG_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS stats (
+    path TEXT NOT NULL,
+    field TEXT NOT NULL,
+    stat_type TEXT NOT NULL,
+    fmt TEXT NOT NULL,
+    cse TEXT NOT NULL,
+    ctr_flw TEXT NOT NULL,
+    met_tool TEXT NOT NULL,
+    vrf_ref TEXT NOT NULL,
+    cycle TEXT NOT NULL,
+    mem TEXT NOT NULL,
+    grid TEXT NOT NULL,
+    n_rows INTEGER,
+    columns TEXT,
+    mtime REAL,
+    PRIMARY KEY (path, field, stat_type)
+);
+CREATE INDEX IF NOT EXISTS stats_query ON stats
+    (cse, ctr_flw, met_tool, vrf_ref, field, stat_type, mem, grid, cycle);
+'''
+
+# Seconds to wait on a locked catalog before raising
+TIMEOUT = 60
+
+##################################################################################
+# METHODS
+##################################################################################
+
+def openCatalog(cat_path):
+    """Opens the catalog database, creating the table if it does not exist"""
+    conn = sqlite3.connect(cat_path, timeout=TIMEOUT)
+    conn.executescript(CATALOG_SCHEMA)
+    return conn
+
+def parseStatPath(root, in_dir):
+    """Returns the workflow parameters of a directory in the verification tree
+
+    Directories are expected at root/cse/ctr_flw/met_tool/vrf_ref/cycle with
+    optional member and grid sub-directories, where grids are named as d01,
+    d02, etc.  For other layouts, the case and control flow are taken from the
+    first two sub-directories and the cycle from the first directory named as
+    CYC_FMT.  Parameters that are not found are empty strings.
+    """
+    parts = [part for part in os.path.relpath(in_dir, root).split('/')
+             if not part in ['', '.']]
+    params = dict.fromkeys(['cse', 'ctr_flw', 'met_tool', 'vrf_ref', 'cycle',
+        'mem', 'grid'], '')
+
+    if len(parts) >= 5 and re.match(r'^\d{10}$', parts[4]):
+        for key, part in zip(['cse', 'ctr_flw', 'met_tool', 'vrf_ref',
+            'cycle'], parts[:5]):
+            params[key] = part
+
+        for part in parts[5:]:
+            if re.match(r'^d\d{2}$', part):
+                params['grid'] = part
+            else:
+                params['mem'] = part
+
+    else:
+        for key, part in zip(['cse', 'ctr_flw'], parts[:2]):
+            params[key] = part
+
+        for part in parts[2:]:
+            if re.match(r'^\d{10}$', part):
+                params['cycle'] = part
+                break
+
+    return params
+
+def findCatalog(in_dir):
+    """Returns the path of the nearest catalog above a directory, or None"""
+    path = os.path.abspath(in_dir)
+    while True:
+        if os.path.isfile(path + '/' + CATALOG):
+            return path + '/' + CATALOG
+
+        parent = os.path.dirname(path)
+        if parent == path:
+            return None
+
+        path = parent
+
+def statMtime(in_dir, field, fmt):
+    """Returns the modification time of a stat store or binary
+
+    The time of a store is the latest of its stat type files, and 0.0 for a
+    store directory without them.  Raises OSError if a binary does not exist.
+    """
+    if fmt == 'parquet':
+        fnames = glob.glob(in_dir + '/' + field + '/*' + STORE_EXT)
+        mtimes = [os.path.getmtime(fname) for fname in fnames]
+        return max(mtimes) if len(mtimes) > 0 else 0.0
+
+    else:
+        return os.path.getmtime(in_dir + '/' + field + '.bin')
+
+def statEntries(root, in_dir, field, fmt, old_mtimes):
+    """Returns the catalog rows of a stat store or binary, None if unchanged
+
+    Rows are only re-read if the modification time of the store files or the
+    binary differs from the catalog entry in old_mtimes.
+    """
+    params = parseStatPath(root, in_dir)
+    rel_dir = os.path.relpath(in_dir, root)
+    mtime = statMtime(in_dir, field, fmt)
+    if old_mtimes.get((rel_dir, field)) == mtime:
+        return None
+
+    entries = []
+    if fmt == 'parquet':
+        fnames = sorted(glob.glob(in_dir + '/' + field + '/*' + STORE_EXT))
+        for fname in fnames:
+            stat_type = os.path.basename(fname)[:-len(STORE_EXT)]
+            meta = pq.ParquetFile(fname).metadata
+            cols = meta.schema.to_arrow_schema().names
+            entries.append([rel_dir, field, stat_type, fmt, meta.num_rows,
+                json.dumps(cols)])
+
+    else:
+        with open(in_dir + '/' + field + '.bin', 'rb') as f:
+            data_dict = pickle.load(f)
+
+        for stat_type, data in data_dict.items():
+            entries.append([rel_dir, field, stat_type, fmt, len(data),
+                json.dumps(list(data.columns))])
+
+    rows = []
+    for rel_dir, field, stat_type, fmt, n_rows, cols in entries:
+        rows.append([rel_dir, field, stat_type, fmt, params['cse'],
+            params['ctr_flw'], params['met_tool'], params['vrf_ref'],
+            params['cycle'], params['mem'], params['grid'], n_rows, cols,
+            mtime])
+
+    return rows
+
+def replaceEntries(conn, rel_dir, field, rows):
+    """Replaces the catalog rows of a stat store or binary in a transaction"""
+    conn.execute('DELETE FROM stats WHERE path = ? AND field = ?',
+            (rel_dir, field))
+    conn.executemany('INSERT INTO stats VALUES (' +\
+            ', '.join(['?'] * len(CATALOG_COLS)) + ')', rows)
+
+def updateCatalog(cat_path, in_dir, fields, log_f=None):
+    """Indexes the stat stores and binaries of fields in one directory
+
+    Inputs to the method are as follows:
+
+        cat_path -- full path to the catalog at the root of the tree
+        in_dir   -- full path to the directory of the stores, below the root
+        fields   -- list of verification fields, the store / binary names
+        log_f    -- optional full path to log file
+
+    This is the incremental counterpart of buildCatalog, run after writing
+    new stores so that catalog queries see them without walking the tree.
+    Stores are preferred over binaries of the same name, and the entries of
+    fields with neither are removed.  Returns the number of indexed rows.
+    """
+    root = os.path.dirname(os.path.abspath(cat_path))
+    in_dir = os.path.abspath(in_dir)
+    rel_dir = os.path.relpath(in_dir, root)
+    if rel_dir.split('/')[0] == '..':
+        raise ValueError('Directory ' + in_dir + ' is not below the' +\
+                ' catalog root ' + root + '.')
+
+    conn = openCatalog(cat_path)
+    n_rows = 0
+    try:
+        for field in fields:
+            if len(glob.glob(in_dir + '/' + field + '/*' + STORE_EXT)) > 0:
+                rows = statEntries(root, in_dir, field, 'parquet', {})
+            elif os.path.isfile(in_dir + '/' + field + '.bin'):
+                rows = statEntries(root, in_dir, field, 'bin', {})
+            else:
+                rows = []
+
+            print('Updating catalog ' + cat_path + ' with ' + in_dir + '/' +\
+                    field, file=log_f)
+            replaceEntries(conn, rel_dir, field, rows)
+            n_rows += len(rows)
+
+        conn.commit()
+
+    finally:
+        conn.close()
+
+    return n_rows
+
+def buildCatalog(root, cat_path=None, log_f=None):
+    """Indexes the stat stores and binaries of a verification tree
+
+    Inputs to the method are as follows:
+
+        root     -- full path to the root of the verification tree
+        cat_path -- optional full path to the catalog, root/CATALOG by default
+        log_f    -- optional full path to log file
+
+    The tree is walked once, registering each stat store directory and each
+    legacy .bin dictionary without a store of the same name.  Entries whose
+    files are unchanged since the last build are kept without reading the
+    files, and entries of files no longer in the tree are removed.  Paths are
+    stored relative to root, so that the catalog can be read from a container
+    with the tree bound to another path.  Returns the number of indexed rows.
+    """
+    if cat_path is None:
+        cat_path = root + '/' + CATALOG
+
+    conn = openCatalog(cat_path)
+    old_mtimes = {}
+    for rel_dir, field, mtime in conn.execute(
+            'SELECT DISTINCT path, field, mtime FROM stats'):
+        old_mtimes[(rel_dir, field)] = mtime
+
+    seen = set()
+    n_new = 0
+    for in_dir, dirs, files in os.walk(root):
+        stores = [name for name in dirs if len(glob.glob(in_dir + '/' + name +\
+                '/*' + STORE_EXT)) > 0]
+        bins = [name[:-4] for name in files if name[-4:] == '.bin' and\
+                not name[:-4] in stores]
+
+        for field, fmt in [(name, 'parquet') for name in stores] +\
+                [(name, 'bin') for name in bins]:
+            rel_dir = os.path.relpath(in_dir, root)
+            seen.add((rel_dir, field))
+            try:
+                rows = statEntries(root, in_dir, field, fmt, old_mtimes)
+            except Exception as err:
+                print('WARNING: ' + in_dir + '/' + field + ' is not' +\
+                        ' readable, skipping: ' + str(err), file=log_f)
+                continue
+
+            if rows is None:
+                continue
+
+            print('Indexing ' + in_dir + '/' + field, file=log_f)
+            replaceEntries(conn, rel_dir, field, rows)
+            n_new += 1
+
+        # stat stores are not walked further
+        dirs[:] = [name for name in dirs if not name in stores]
+
+    for rel_dir, field in set(old_mtimes) - seen:
+        print('Removing ' + rel_dir + '/' + field, file=log_f)
+        conn.execute('DELETE FROM stats WHERE path = ? AND field = ?',
+                (rel_dir, field))
+
+    conn.commit()
+    n_rows = conn.execute('SELECT COUNT(*) FROM stats').fetchone()[0]
+    conn.close()
+    print('Indexed ' + str(n_new) + ' new or changed stores, ' +\
+            str(n_rows) + ' catalog rows in ' + cat_path, file=log_f)
+
+    return n_rows
+
+def findStats(cat_path, **criteria):
+    """Queries the catalog for the statistics matching the criteria
+
+    Criteria are catalog columns with a value or a list of values, e.g.,
+    ctr_flw='WRF_9-3_WestCoast' or stat_type=['cnt', 'nbrcnt'], and the
+    criterion field_glob for a shell style pattern of the field name.  Returns
+    a data frame of catalog rows sorted by path, field and stat type, with the
+    path resolved relative to the directory of the catalog.
+
+    The matching stores and binaries are checked against the modification
+    times in the catalog, and those changed or removed since they were
+    indexed are re-indexed with a warning before the rows are returned, or
+    only warned about if the catalog is not writable.  Stores that are not
+    in the catalog at all are only found once they are indexed, by
+    updateCatalog after parsing or by buildCatalog.
+    """
+    clauses = []
+    params = []
+    for key, val in criteria.items():
+        if key == 'field_glob':
+            clauses.append('field GLOB ?')
+            params.append(val)
+
+        elif not key in CATALOG_COLS:
+            raise ValueError('Catalog column ' + key + ' is not supported.')
+
+        elif isinstance(val, (list, tuple, set)):
+            val = list(val)
+            clauses.append(key + ' IN (' + ', '.join(['?'] * len(val)) + ')')
+            params += val
+
+        else:
+            clauses.append(key + ' = ?')
+            params.append(val)
+
+    query = 'SELECT * FROM stats'
+    if len(clauses) > 0:
+        query += ' WHERE ' + ' AND '.join(clauses)
+
+    query += ' ORDER BY path, field, stat_type'
+
+    root = os.path.dirname(os.path.abspath(cat_path))
+    conn = sqlite3.connect(cat_path, timeout=TIMEOUT)
+    try:
+        rows = pd.read_sql_query(query, conn, params=params)
+
+        # re-index stores written since the catalog entries
+        stale = []
+        for (rel_dir, field, fmt), mtime in rows.groupby(['path', 'field',
+                'fmt'], sort=False)['mtime'].first().items():
+            try:
+                new_mtime = statMtime(root + '/' + rel_dir, field, fmt)
+            except OSError:
+                new_mtime = None
+
+            if new_mtime != mtime:
+                stale.append([rel_dir, field])
+
+        if len(stale) > 0:
+            print('WARNING: ' + str(len(stale)) + ' stores changed since' +\
+                    ' they were indexed in ' + cat_path + ', re-indexing.')
+            try:
+                for rel_dir, field in stale:
+                    updateCatalog(cat_path, root + '/' + rel_dir, [field])
+
+                rows = pd.read_sql_query(query, conn, params=params)
+            except sqlite3.OperationalError as err:
+                print('WARNING: catalog ' + cat_path + ' is not writable,' +\
+                        ' the changed stores are not re-indexed: ' +\
+                        str(err))
+
+    finally:
+        conn.close()
+
+    rows['path'] = [os.path.normpath(root + '/' + path)
+                    for path in rows['path']]
+    return rows
+
+##################################################################################
+# end
@@ -0,0 +1,249 @@
+##################################################################################
+# Description
+##################################################################################
+# This module builds cubes of MET statistics, labelled N-dimensional arrays of
+# a season of statistics with dimensions of control flow, member, grid,
+# verification mask, forecast cycle, lead, threshold and statistic.  Cubes are
+# persisted once as netCDF and queried by plotting as slices of the arrays in
+# place of filter passes over the stat stores of every cycle.
+#
+##################################################################################
+# License Statement:
+##################################################################################
+# This software is Copyright © 2024 The Regents of the University of California.
+# All Rights Reserved. Permission to copy, modify, and distribute this software
+# and its documentation for educational, research and non-profit purposes,
+# without fee, and without a written agreement is hereby granted, provided that
+# the above copyright notice, this paragraph and the following three paragraphs
+# appear in all copies. Permission to make commercial use of this software may
+# be obtained by contacting:
+#
+#     Office of Innovation and Commercialization
+#     9500 Gilman Drive, Mail Code 0910
+#     University of California
+#     La Jolla, CA 92093-0910
+#     innovation@ucsd.edu
+#
+# This software program and documentation are copyrighted by The Regents of the
+# University of California. The software program and documentation are supplied
+# "as is", without any accompanying services from The Regents. The Regents does
+# not warrant that the operation of the program will be uninterrupted or
+# error-free. The end-user understands that the program was developed for
+# research purposes and is advised not to rely exclusively on the program for
+# any reason.
+#
+# IN NO EVENT SHALL THE UNIVERSITY OF CALIFORNIA BE LIABLE TO ANY PARTY FOR
+# DIRECT, INDIRECT, SPECIAL, INCIDENTAL, OR CONSEQUENTIAL DAMAGES, INCLUDING
+# LOST PROFITS, ARISING OUT OF THE USE OF THIS SOFTWARE AND ITS DOCUMENTATION,
+# EVEN IF THE UNIVERSITY OF CALIFORNIA HAS BEEN ADVISED OF THE POSSIBILITY OF
+# SUCH DAMAGE. THE UNIVERSITY OF CALIFORNIA SPECIFICALLY DISCLAIMS ANY
+# WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF
+# MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE. THE SOFTWARE PROVIDED
+# HEREUNDER IS ON AN “AS IS” BASIS, AND THE UNIVERSITY OF CALIFORNIA HAS NO
+# OBLIGATIONS TO PROVIDE MAINTENANCE, SUPPORT, UPDATES, ENHANCEMENTS, OR
+# MODIFICATIONS.
+# 
+##################################################################################
+# Imports
+##################################################################################
+from utilities import *
+from utilities.StatStore import *
+from utilities.StatCatalog import findStats, parseStatPath
+
+##################################################################################
+# CUBE DEFINITIONS
+##################################################################################
+# Dimensions of the statistics cube
+CUBE_DIMS = [
+             'CTR_FLW',
+             'MEM',
+             'GRID',
+             'VX_MASK',
+             'CYCLE',
+             'FCST_LEAD',
+             'FCST_THRESH',
+             'STAT',
+            ]
+
+# Data variables of the statistics cube, the values and their CI bounds
+CUBE_VARS = [
+             'VALUE',
+             'VALUE_L',
+             'VALUE_U',
+            ]
+
+# Threshold label of line types without thresholds, e.g., cnt
+NA_THRESH = 'NA'
+
+##################################################################################
+# METHODS
+##################################################################################
+
+def findFlows(in_root, ctr_flw, met_tool, vrf_ref, field, catalog=None):
+    """Returns the sorted (member, grid) pairs of a control flow with stats
+
+    The pairs are resolved with the catalog if given, otherwise by globbing
+    the stat stores and binaries of the field below the cycle directories.
+    """
+    if not catalog is None:
+        rows = findStats(catalog, cse=os.path.basename(in_root.rstrip('/')),
+                ctr_flw=ctr_flw, met_tool=met_tool, vrf_ref=vrf_ref,
+                field=field)
+        return sorted(set(zip(rows['mem'], rows['grid'])))
+
+    data_root = in_root + '/' + ctr_flw + '/' + met_tool + '/' + vrf_ref
+    flows = set()
+    for depth in range(3):
+        in_glob = data_root + '/' + '[0-9]' * 10 + '/*' * depth + '/' + field
+        for in_path in glob.glob(in_glob) + glob.glob(in_glob + '.bin'):
+            params = parseStatPath(os.path.dirname(in_root.rstrip('/')),
+                    os.path.dirname(in_path))
+            flows.add((params['mem'], params['grid']))
+
+    return sorted(flows)
+
+def buildCube(in_root, ctr_flws, met_tool, vrf_ref, field, stats, masks=None,
+        leads=None, thresholds=None, cycs=None, ci=None, catalog=None,
+        log_f=None):
+    """Builds the statistics cube of control flows over a season
+
+    Inputs to the method are as follows:
+
+        in_root    -- full path to the case directory of the verification tree
+        ctr_flws   -- list of control flow names
+        met_tool   -- MET tool, e.g., 'GridStat'
+        vrf_ref    -- verification reference, e.g., 'StageIV'
+        field      -- verification field, the store directory / binary name
+        stats      -- dictionary of stat names to their MET stat types
+        masks      -- optional list of VX_MASK regions, all by default
+        leads      -- optional list of forecast leads in seconds
+        thresholds -- optional list of FCST_THRESH values
+        cycs       -- optional list of forecast cycle datetimes
+        ci         -- optional confidence interval suffix, e.g., 'NC'
+        catalog    -- optional full path to the catalog in StatCatalog.py
+        log_f      -- optional full path to log file
+
+    All members and grids of each control flow are queried with queryStats
+    and the values are arranged on the CUBE_DIMS dimensions, with NaN where a
+    combination has no statistic.  Line types without thresholds are labelled
+    with NA_THRESH.  If rows share all dimensions, e.g., neighborhood stats of
+    several widths, the first is kept with a warning.  Returns an xarray
+    Dataset with the VALUE variable, and the VALUE_L and VALUE_U bounds when
+    ci is given.
+    """
+    frames = []
+    for ctr_flw in ctr_flws:
+        flows = findFlows(in_root, ctr_flw, met_tool, vrf_ref, field,
+                catalog=catalog)
+        for mem, grd in flows:
+            print('Loading ' + ctr_flw + ' ' + mem + ' ' + grd, file=log_f)
+            frames.append(queryStats(in_root, ctr_flw, met_tool, vrf_ref,
+                field, stats, grd=grd, mem=mem, masks=masks, leads=leads,
+                thresholds=thresholds, cycs=cycs, ci=ci, catalog=catalog,
+                log_f=log_f))
+
+    frames = [frame for frame in frames if not frame.empty]
+    if len(frames) == 0:
+        raise ValueError('No statistics of ' + ', '.join(ctr_flws) +\
+                ' exist in ' + in_root + '.')
+
+    data = pd.concat(frames, axis=0, ignore_index=True)
+    data['FCST_LEAD'] = data['FCST_LEAD'].astype('int64')
+    data['CYCLE'] = data['FCST_VALID_END'] -\
+            pd.to_timedelta(data['FCST_LEAD'], unit='s')
+    data['FCST_THRESH'] = data['FCST_THRESH'].fillna(NA_THRESH).astype(str)
+
+    dups = data.duplicated(CUBE_DIMS)
+    if dups.any():
+        print('WARNING: ' + str(int(dups.sum())) + ' rows share all cube' +\
+                ' dimensions, keeping the first of each.', file=log_f)
+        data = data.loc[~dups]
+
+    cube_vars = [var for var in CUBE_VARS if var in data.columns]
+    cube = data.set_index(CUBE_DIMS)[cube_vars].to_xarray()
+    cube.attrs['met_tool'] = met_tool
+    cube.attrs['vrf_ref'] = vrf_ref
+    cube.attrs['field'] = field
+
+    return cube
+
+def writeCube(cube, out_path, log_f=None):
+    """Writes a statistics cube to netCDF with compressed float32 values"""
+    print('Writing out cube to ' + out_path, file=log_f)
+    encoding = {}
+    for var in cube.data_vars:
+        encoding[var] = {'dtype': 'float32', 'zlib': True}
+
+    tmp_path = out_path + '.tmp'
+    cube.to_netcdf(tmp_path, encoding=encoding)
+    os.replace(tmp_path, out_path)
+
+def loadCube(in_path):
+    """Loads a statistics cube from netCDF into memory"""
+    with xr.open_dataset(in_path) as cube:
+        return cube.load()
+
+def queryCube(cube, ctr_flw, stats, grd='', mem='', masks=None,
+        valid_range=None, leads=None, thresholds=None, cycs=None, ci=None):
+    """Queries a statistics cube with the arguments and output of queryStats
+
+    The cube is sliced on the control flow, member, grid, masks, leads,
+    thresholds, cycles and stats, so that the query costs a selection of the
+    arrays in place of reading stores.  Returns a tidy data frame as in
+    queryStats, with one row per existing stat value.
+    """
+    out_cols = QUERY_COLS + ['VALUE']
+    if not ci is None:
+        out_cols += ['VALUE_L', 'VALUE_U']
+
+    sel = {'CTR_FLW': [ctr_flw], 'MEM': [mem], 'GRID': [grd],
+           'STAT': list(stats)}
+    if not masks is None:
+        sel['VX_MASK'] = list(masks)
+
+    if not leads is None:
+        sel['FCST_LEAD'] = [int(lead) for lead in leads]
+
+    if not thresholds is None:
+        sel['FCST_THRESH'] = list(thresholds)
+
+    if not cycs is None:
+        sel['CYCLE'] = pd.to_datetime(list(cycs))
+
+    # keep the labels of the selection that exist in the cube
+    for dim, vals in sel.items():
+        index = cube.indexes[dim]
+        sel[dim] = [val for val in vals if val in index]
+        if len(sel[dim]) == 0:
+            return pd.DataFrame(columns=out_cols)
+
+    data = cube.sel(sel).to_dataframe().reset_index()
+    data = data.loc[data['VALUE'].notna()]
+    data['FCST_VALID_END'] = data['CYCLE'] +\
+            pd.to_timedelta(data['FCST_LEAD'], unit='s')
+
+    if not valid_range is None:
+        data = data.loc[(data['FCST_VALID_END'] >= valid_range[0]) &\
+                (data['FCST_VALID_END'] <= valid_range[1])]
+
+    data['FCST_LEAD'] = data['FCST_LEAD'].astype('Int64')
+    data['FCST_THRESH'] = data['FCST_THRESH'].astype(object).where(
+            data['FCST_THRESH'] != NA_THRESH, np.nan)
+    data['STAT_TYPE'] = [stats[stat] for stat in data['STAT']]
+
+    if not ci is None:
+        for var in ['VALUE_L', 'VALUE_U']:
+            if not var in data.columns:
+                data[var] = np.nan
+
+    for var in CUBE_VARS:
+        if var in data.columns:
+            data[var] = data[var].astype('float64')
+
+    data = data.sort_values(['CYCLE', 'STAT', 'VX_MASK', 'FCST_THRESH',
+        'FCST_LEAD'], kind='stable')
+
+    return data[out_cols].reset_index(drop=True)
+
+##################################################################################
+# end
@@ -0,0 +1,723 @@
+##################################################################################
+# Description
+##################################################################################
+# This module defines the columnar store of parsed MET statistics, with one
+# Parquet file per stat type in a directory named for the verification field.
+# Readers load only the requested columns and rows, with a compatibility reader
+# for the pickled .bin dictionaries written by earlier versions of the workflow.
+#
+##################################################################################
+# License Statement:
+##################################################################################
+# This software is Copyright © 2024 The Regents of the University of California.
+# All Rights Reserved. Permission to copy, modify, and distribute this software
+# and its documentation for educational, research and non-profit purposes,
+# without fee, and without a written agreement is hereby granted, provided that
+# the above copyright notice, this paragraph and the following three paragraphs
+# appear in all copies. Permission to make commercial use of this software may
+# be obtained by contacting:
+#
+#     Office of Innovation and Commercialization
+#     9500 Gilman Drive, Mail Code 0910
+#     University of California
+#     La Jolla, CA 92093-0910
+#     innovation@ucsd.edu
+#
+# This software program and documentation are copyrighted by The Regents of the
+# University of California. The software program and documentation are supplied
+# "as is", without any accompanying services from The Regents. The Regents does
+# not warrant that the operation of the program will be uninterrupted or
+# error-free. The end-user understands that the program was developed for
+# research purposes and is advised not to rely exclusively on the program for
+# any reason.
+#
+# IN NO EVENT SHALL THE UNIVERSITY OF CALIFORNIA BE LIABLE TO ANY PARTY FOR
+# DIRECT, INDIRECT, SPECIAL, INCIDENTAL, OR CONSEQUENTIAL DAMAGES, INCLUDING
+# LOST PROFITS, ARISING OUT OF THE USE OF THIS SOFTWARE AND ITS DOCUMENTATION,
+# EVEN IF THE UNIVERSITY OF CALIFORNIA HAS BEEN ADVISED OF THE POSSIBILITY OF
+# SUCH DAMAGE. THE UNIVERSITY OF CALIFORNIA SPECIFICALLY DISCLAIMS ANY
+# WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF
+# MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE. THE SOFTWARE PROVIDED
+# HEREUNDER IS ON AN “AS IS” BASIS, AND THE UNIVERSITY OF CALIFORNIA HAS NO
+# OBLIGATIONS TO PROVIDE MAINTENANCE, SUPPORT, UPDATES, ENHANCEMENTS, OR
+# MODIFICATIONS.
+# 
+##################################################################################
+# Imports
+##################################################################################
+from utilities import *
+from utilities.LineTypes import *
+import pyarrow as pa
+import pyarrow.parquet as pq
+import hashlib
+import json
+
+##################################################################################
+# STORE DEFINITIONS
+##################################################################################
+# File extension of the columnar store of a stat type
+STORE_EXT = '.parquet'
+
+# Rows are sorted on these columns so that Parquet row group statistics can be
+# used to skip row groups when filtering on these columns
+SORT_COLS = [
+             'VX_MASK',
+             'FCST_THRESH',
+             'FCST_LEAD',
+             'FCST_VALID_END',
+            ]
+
+# Maximum number of rows per Parquet row group
+ROW_GROUP_SIZE = 65536
+
+# File name of the manifest of ingested MET files in the store directory
+MANIFEST = 'manifest.json'
+
+# Directory name format of forecast cycles in the verification tree
+CYC_FMT = '%Y%m%d%H'
+
+# Index columns of the tidy output of queryStats
+QUERY_COLS = [
+              'CTR_FLW',
+              'GRID',
+              'MEM',
+              'STAT_TYPE',
+              'STAT',
+              'VX_MASK',
+              'FCST_THRESH',
+              'FCST_LEAD',
+              'FCST_VALID_END',
+             ]
+
+##################################################################################
+# METHODS
+##################################################################################
+
+def writeStats(data_dict, out_dir, field, sort=True, log_f=None):
+    """Writes a dictionary of MET data frames to the columnar stat store
+
+    Inputs to the method are as follows:
+
+        data_dict -- dictionary of data frames keyed by MET stat type
+        out_dir   -- full path to directory of the output store
+        field     -- verification field used as the store directory name
+        sort      -- sort rows on SORT_COLS, True by default
+        log_f     -- optional full path to log file
+
+    Each stat type is written to a Parquet file at the path
+
+        out_dir/field/stat_type.parquet
+
+    with rows sorted on the columns in SORT_COLS.  If sort is False, the rows
+    are written in the order of the data frame along with its index, which
+    loadStats restores.  Column types of the line type schema, including
+    categories, nullable counts and datetimes, are preserved in the file.
+    Files of other stat types in the store are left in place, see pruneStats.
+    Returns the path of the store directory.
+    """
+    store_dir = out_dir + '/' + field
+    os.makedirs(store_dir, exist_ok=True)
+
+    for stat_type, data in data_dict.items():
+        if sort:
+            sort_cols = [col for col in SORT_COLS if col in data.columns]
+            data = data.sort_values(by=sort_cols, kind='stable')
+            data = data.reset_index(drop=True)
+
+        out_path = store_dir + '/' + stat_type + STORE_EXT
+        print('Writing out data to ' + out_path, file=log_f)
+        data.to_parquet(out_path, engine='pyarrow', index=not sort,
+                row_group_size=ROW_GROUP_SIZE)
+
+    return store_dir
+
+def pruneStats(out_dir, field, stat_types, log_f=None):
+    """Removes the store files of stat types not in a list from the store
+
+    A full rewrite of a store only replaces the files of the stat types it
+    writes, so that the files of other stat types of a previous run are
+    removed with this method.  Returns the list of removed stat types.
+    """
+    removed = []
+    for stat_type in listStats(out_dir, field):
+        out_path = out_dir + '/' + field + '/' + stat_type + STORE_EXT
+        if not stat_type in stat_types and os.path.isfile(out_path):
+            print('Removing stale ' + out_path, file=log_f)
+            os.remove(out_path)
+            removed.append(stat_type)
+
+    return removed
+
+def arrowSchema(data):
+    """Returns the Arrow schema of a typed data frame for streamed writes
+
+    Categorical columns are stored as dictionaries of strings with 32 bit
+    indices, so that batches with different categories share one schema.
+    """
+    schema = pa.Schema.from_pandas(data, preserve_index=False)
+    fields = []
+    for fld in schema:
+        if pa.types.is_dictionary(fld.type):
+            fld = fld.with_type(pa.dictionary(pa.int32(), pa.string()))
+        fields.append(fld)
+
+    return pa.schema(fields, metadata=schema.metadata)
+
+class StreamWriter:
+    """Writes batches of MET data frames to the stat store by stat type
+
+    Inputs to the constructor are as follows:
+
+        out_dir    -- full path to directory of the output store
+        field      -- verification field used as the store directory name
+        columns    -- optional dictionary of full column lists by stat type,
+                      otherwise taken from the first batch of each stat type
+        drop_files -- optional list of base names of re-parsed files, in
+                      incremental mode, where rows of the existing store from
+                      other files are carried over into the new file
+        log_f      -- optional full path to log file
+
+    Each stat type is written to a temporary Parquet file one row group at a
+    time, so that only a single batch is held in memory, and the file replaces
+    the store file of the stat type on close.  Batches are aligned to the
+    column list of the stat type and cast to the schema of its first batch.
+    """
+    def __init__(self, out_dir, field, columns=None, drop_files=None,
+            log_f=None):
+        self.store_dir = out_dir + '/' + field
+        self.columns = columns if columns is not None else {}
+        self.drop_files = drop_files
+        self.log_f = log_f
+        self.writers = {}
+
+    def open(self, stat_type, data):
+        """Opens the writer of a stat type with the schema of a batch"""
+        cols = self.columns.get(stat_type, list(data.columns))
+        data = applySchema(data.reindex(columns=cols), stat_type)
+        schema = arrowSchema(data)
+
+        out_path = self.store_dir + '/' + stat_type + STORE_EXT
+        tmp_path = out_path + '.tmp'
+        print('Streaming data to ' + out_path, file=self.log_f)
+        os.makedirs(self.store_dir, exist_ok=True)
+        writer = pq.ParquetWriter(tmp_path, schema)
+        self.writers[stat_type] = [writer, schema, cols, tmp_path, out_path]
+
+        # carry over rows of unchanged files in incremental mode
+        if not self.drop_files is None and os.path.isfile(out_path):
+            print(INDT + 'Carrying over rows of unchanged files',
+                    file=self.log_f)
+            in_file = pq.ParquetFile(out_path)
+            for batch in in_file.iter_batches(batch_size=ROW_GROUP_SIZE):
+                batch = batch.to_pandas()
+                if 'SRC_FILE' in batch.columns:
+                    keep = ~batch['SRC_FILE'].isin(self.drop_files)
+                    batch = batch.loc[keep.to_numpy(dtype=bool)]
+
+                if len(batch) > 0:
+                    self.write(stat_type, batch)
+
+    def write(self, stat_type, data):
+        """Writes a batch of a stat type as row groups of the store file"""
+        if not stat_type in self.writers:
+            self.open(stat_type, data)
+
+        writer, schema, cols, _, _ = self.writers[stat_type]
+        extra = [col for col in data.columns if not col in cols]
+        if len(extra) > 0:
+            raise ValueError('Columns ' + ', '.join(extra) + ' of ' +\
+                    stat_type + ' are not in the streamed columns, rows' +\
+                    ' of a variable line type must share one column count.')
+
+        data = applySchema(data.reindex(columns=cols), stat_type)
+        table = pa.Table.from_pandas(data, schema=schema, preserve_index=False)
+        writer.write_table(table, row_group_size=ROW_GROUP_SIZE)
+
+    def close(self):
+        """Closes the writers and replaces the store files of stat types"""
+        for writer, _, _, tmp_path, out_path in self.writers.values():
+            writer.close()
+            os.replace(tmp_path, out_path)
+
+        self.writers = {}
+
+def filterStats(data, filters):
+    """Applies Parquet style filters to a data frame in memory
+
+    Filters are a list of (column, operator, value) tuples joined with AND,
+    with the operators '==', '!=', '<', '<=', '>', '>=', 'in' and 'not in'.
+    """
+    mask = np.ones(len(data), dtype=bool)
+    for col, op, val in filters:
+        vals = data[col]
+        if op in ['==', '=']:
+            cut = vals == val
+        elif op == '!=':
+            cut = vals != val
+        elif op == '<':
+            cut = vals < val
+        elif op == '<=':
+            cut = vals <= val
+        elif op == '>':
+            cut = vals > val
+        elif op == '>=':
+            cut = vals >= val
+        elif op == 'in':
+            cut = vals.isin(val)
+        elif op == 'not in':
+            cut = ~vals.isin(val)
+        else:
+            raise ValueError('Filter operator ' + op + ' is not supported.')
+
+        mask &= np.asarray(cut.fillna(False), dtype=bool)
+
+    return data.loc[mask]
+
+def loadStats(in_dir, field, stat_type, columns=None, filters=None):
+    """Loads a MET stat type from the columnar store or a legacy binary
+
+    Inputs to the method are as follows:
+
+        in_dir    -- full path to directory of the store or the .bin file
+        field     -- verification field, the store directory / binary name
+        stat_type -- MET stat type to load, e.g., 'cnt'
+        columns   -- optional list of columns to load, all if None
+        filters   -- optional list of (column, operator, value) tuples
+
+    The Parquet store at in_dir/field/stat_type.parquet is read first, loading
+    only the requested columns and skipping row groups excluded by filters.
+    If the store does not exist, the pickled dictionary in_dir/field.bin
+    written by older versions of makeDataFrames is read, typed with the line
+    type schema and cut to the same columns and rows.  A FileNotFoundError is
+    raised if neither exists and a KeyError if the stat type is not in the
+    binary.  Returns a data frame, with the index stored with the rows if
+    any, as by writeStats without sorting, and a range index otherwise.
+    """
+    store_path = in_dir + '/' + field + '/' + stat_type + STORE_EXT
+    bin_path = in_dir + '/' + field + '.bin'
+
+    if os.path.isfile(store_path):
+        return pd.read_parquet(store_path, engine='pyarrow', columns=columns,
+                filters=filters)
+
+    elif os.path.isfile(bin_path):
+        with open(bin_path, 'rb') as f:
+            data = pickle.load(f)[stat_type]
+
+        if not columns is None:
+            data = data[columns]
+
+        data = applySchema(data, stat_type)
+        if not filters is None:
+            data = filterStats(data, filters)
+
+    else:
+        raise FileNotFoundError('No stat store ' + store_path +\
+                ' or binary ' + bin_path + ' exists.')
+
+    return data.reset_index(drop=True)
+
+def listColumns(in_dir, field, stat_type):
+    """Returns the columns of a stat type without loading its values
+
+    The column names are read from the Parquet file schema, or from the legacy
+    binary if the store does not exist, raising as in loadStats.
+    """
+    store_path = in_dir + '/' + field + '/' + stat_type + STORE_EXT
+    bin_path = in_dir + '/' + field + '.bin'
+
+    if os.path.isfile(store_path):
+        return pq.read_schema(store_path).names
+
+    elif os.path.isfile(bin_path):
+        with open(bin_path, 'rb') as f:
+            return list(pickle.load(f)[stat_type].columns)
+
+    else:
+        raise FileNotFoundError('No stat store ' + store_path +\
+                ' or binary ' + bin_path + ' exists.')
+
+def listStats(in_dir, field):
+    """Returns the stat types available in the store or legacy binary"""
+    store_dir = in_dir + '/' + field
+    bin_path = in_dir + '/' + field + '.bin'
+
+    if os.path.isdir(store_dir):
+        fnames = sorted(glob.glob(store_dir + '/*' + STORE_EXT))
+        return [fname.split('/')[-1][:-len(STORE_EXT)] for fname in fnames]
+
+    elif os.path.isfile(bin_path):
+        with open(bin_path, 'rb') as f:
+            return list(pickle.load(f).keys())
+
+    return []
+
+def pruneCycles(cycs, valid_range=None, leads=None):
+    """Returns the forecast cycles that can match a query
+
+    Cycles are pruned to those with a valid time in valid_range for any of the
+    leads, given in seconds, or to those at or before the end of valid_range
+    if no leads are given.
+    """
+    pruned = []
+    for cyc in cycs:
+        if not valid_range is None:
+            strt, stop = valid_range
+            if leads is None:
+                if cyc > stop:
+                    continue
+
+            elif not any([strt <= cyc + td(seconds=int(lead)) <= stop
+                    for lead in leads]):
+                continue
+
+        pruned.append(cyc)
+
+    return pruned
+
+def queryStats(in_root, ctr_flw, met_tool, vrf_ref, field, stats, grd='',
+        mem='', masks=None, valid_range=None, leads=None, thresholds=None,
+        cycs=None, ci=None, catalog=None, loader=None, log_f=None):
+    """Queries statistics of a control flow with filters pushed to the store
+
+    Inputs to the method are as follows:
+
+        in_root     -- full path to the case directory of the verification tree
+        ctr_flw     -- control flow name
+        met_tool    -- MET tool, e.g., 'GridStat'
+        vrf_ref     -- verification reference, e.g., 'StageIV'
+        field       -- verification field, the store directory / binary name
+        stats       -- dictionary of stat names to their MET stat types, e.g.,
+                       {'RMSE': 'cnt', 'FSS': 'nbrcnt'}
+        grd         -- optional grid sub-directory, e.g., 'd01'
+        mem         -- optional member sub-directory, e.g., 'mean'
+        masks       -- optional list of VX_MASK regions
+        valid_range -- optional (start, stop) datetimes of FCST_VALID_END
+        leads       -- optional list of forecast leads in seconds
+        thresholds  -- optional list of FCST_THRESH values
+        cycs        -- optional list of forecast cycle datetimes, otherwise
+                       the cycle directories that can match the valid range
+        ci          -- optional confidence interval suffix, e.g., 'NC'
+        catalog     -- optional full path to the catalog in StatCatalog.py
+        loader      -- optional method with the arguments of loadStats, e.g.,
+                       a caching reader, loadStats by default
+        log_f       -- optional full path to log file
+
+    Data is read from in_root/ctr_flw/met_tool/vrf_ref/cycle/mem/grd/field and
+    the mask, valid time, lead and threshold filters are passed to loadStats,
+    so that only the requested columns of matching row groups are read from
+    Parquet stores.  If a catalog is given, the existing stores and their
+    columns are resolved with one catalog query, otherwise by probing the
+    cycle directories, where missing stores are skipped with a warning.
+    Returns a tidy data frame with one row per stat value, with the QUERY_COLS
+    index columns and the float VALUE column, and the VALUE_L and VALUE_U
+    columns of the confidence interval bounds when ci is given.
+    """
+    data_root = in_root + '/' + ctr_flw + '/' + met_tool + '/' + vrf_ref
+    if loader is None:
+        loader = loadStats
+
+    filters = []
+    if not masks is None:
+        filters.append(('VX_MASK', 'in', list(masks)))
+
+    if not valid_range is None:
+        filters.append(('FCST_VALID_END', '>=', valid_range[0]))
+        filters.append(('FCST_VALID_END', '<=', valid_range[1]))
+
+    if not leads is None:
+        filters.append(('FCST_LEAD', 'in', [int(lead) for lead in leads]))
+
+    if not thresholds is None:
+        filters.append(('FCST_THRESH', 'in', list(thresholds)))
+
+    # group the requested stats by stat type to read each table once
+    type_stats = {}
+    for stat_name, stat_type in stats.items():
+        type_stats.setdefault(stat_type, []).append(stat_name)
+
+    out_cols = QUERY_COLS + ['VALUE']
+    if not ci is None:
+        out_cols += ['VALUE_L', 'VALUE_U']
+
+    # define the sources of each stat type in cycle order and their columns
+    sources = []
+    if not catalog is None:
+        # imported here, as the catalog module is built on this module
+        from utilities.StatCatalog import findStats
+        rows = findStats(catalog, cse=os.path.basename(in_root.rstrip('/')),
+                ctr_flw=ctr_flw, met_tool=met_tool, vrf_ref=vrf_ref,
+                field=field, mem=mem, grid=grd, stat_type=list(type_stats))
+
+        if cycs is None:
+            cat_cycs = sorted(set([dt.strptime(cyc, CYC_FMT)
+                for cyc in rows['cycle'] if len(cyc) > 0]))
+            cycs = pruneCycles(cat_cycs, valid_range=valid_range, leads=leads)
+
+        for cyc in cycs:
+            cyc_rows = rows.loc[rows['cycle'] == cyc.strftime(CYC_FMT)]
+            for stat_type in type_stats:
+                for _, row in cyc_rows.loc[cyc_rows['stat_type'] ==
+                        stat_type].iterrows():
+                    sources.append([row['path'], stat_type,
+                        json.loads(row['columns'])])
+
+    else:
+        if cycs is None:
+            cyc_dirs = sorted(glob.glob(data_root + '/' + '[0-9]' * 10))
+            cycs = [dt.strptime(os.path.basename(cyc_dir), CYC_FMT)
+                    for cyc_dir in cyc_dirs]
+            cycs = pruneCycles(cycs, valid_range=valid_range, leads=leads)
+
+        for cyc in cycs:
+            in_dir = data_root + '/' + cyc.strftime(CYC_FMT) + '/' + mem +\
+                    '/' + grd
+            for stat_type in type_stats:
+                try:
+                    cols = listColumns(in_dir, field, stat_type)
+                except (FileNotFoundError, KeyError):
+                    print('WARNING: input data ' + in_dir + '/' + field +\
+                            ' statistics ' + stat_type + ' does not exist,' +\
+                            ' skipping this configuration.', file=log_f)
+                    continue
+
+                sources.append([in_dir, stat_type, cols])
+
+    frames = []
+    for in_dir, stat_type, cols in sources:
+        stat_names = type_stats[stat_type]
+        vals = [col for col in QUERY_COLS if col in cols]
+        for stat_name in stat_names:
+            if not stat_name in cols:
+                print('WARNING: statistic ' + stat_name + ' is not in ' +\
+                        in_dir + '/' + field + ' ' + stat_type + '.',
+                        file=log_f)
+                continue
+
+            vals.append(stat_name)
+            if not ci is None and stat_name + '_' + ci + 'L' in cols:
+                vals += [stat_name + '_' + ci + 'L',
+                        stat_name + '_' + ci + 'U']
+
+        data = loader(in_dir, field, stat_type, columns=vals,
+                filters=filters if len(filters) > 0 else None)
+
+        # melt the stat columns into one row per stat value
+        for stat_name in stat_names:
+            if not stat_name in data.columns:
+                continue
+
+            tmp_df = pd.DataFrame({
+                'VX_MASK': data['VX_MASK'].astype(str),
+                'FCST_THRESH': data['FCST_THRESH'].astype(object)\
+                        if 'FCST_THRESH' in data.columns else None,
+                'FCST_LEAD': data['FCST_LEAD'],
+                'FCST_VALID_END': data['FCST_VALID_END'],
+                'VALUE': data[stat_name].astype('float64'),
+                })
+
+            if not ci is None:
+                for bnd in ['L', 'U']:
+                    ci_col = stat_name + '_' + ci + bnd
+                    if ci_col in data.columns:
+                        tmp_df['VALUE_' + bnd] = \
+                                data[ci_col].astype('float64')
+                    else:
+                        tmp_df['VALUE_' + bnd] = np.nan
+
+            tmp_df['CTR_FLW'] = ctr_flw
+            tmp_df['GRID'] = grd
+            tmp_df['MEM'] = mem
+            tmp_df['STAT_TYPE'] = stat_type
+            tmp_df['STAT'] = stat_name
+            frames.append(tmp_df[out_cols])
+
+    if len(frames) == 0:
+        return pd.DataFrame(columns=out_cols)
+
+    return pd.concat(frames, axis=0, ignore_index=True)
+
+def fileEntry(fname, content_hash=True):
+    """Returns the manifest entry of a file, its path, size, mtime and hash
+
+    The content hash is only computed if content_hash is set, as it reads the
+    whole file, and is otherwise None.
+    """
+    stat = os.stat(fname)
+    entry = {
+             'path': fname,
+             'size': stat.st_size,
+             'mtime': stat.st_mtime,
+             'sha256': None,
+            }
+
+    if content_hash:
+        sha = hashlib.sha256()
+        with open(fname, 'rb') as f:
+            for block in iter(lambda: f.read(1048576), b''):
+                sha.update(block)
+
+        entry['sha256'] = sha.hexdigest()
+
+    return entry
+
+def loadManifest(in_dir, field):
+    """Loads the manifest of ingested files of a store, empty if none exists"""
+    in_path = in_dir + '/' + field + '/' + MANIFEST
+    if os.path.isfile(in_path):
+        with open(in_path) as f:
+            return json.load(f)
+
+    return {}
+
+def writeManifest(manifest, out_dir, field, log_f=None):
+    """Writes the manifest of ingested files to the store directory"""
+    out_path = out_dir + '/' + field + '/' + MANIFEST
+    print('Writing out manifest to ' + out_path, file=log_f)
+    os.makedirs(out_dir + '/' + field, exist_ok=True)
+    with open(out_path, 'w') as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+
+def checkManifest(fnames, manifest, content_hash=True, log_f=None):
+    """Finds the new or changed files relative to a manifest
+
+    Inputs to the method are as follows:
+
+        fnames       -- list of full paths to MET files
+        manifest     -- dictionary of entries of ingested files keyed by name
+        content_hash -- hash the contents of new or changed files, True by
+                        default
+        log_f        -- optional full path to log file
+
+    Files are keyed by their base name, as recorded in the SRC_FILE column.  A
+    file with the size and mtime of its entry is unchanged without reading it,
+    and otherwise its content hash is compared with the entry, if both are
+    hashed, so that files rewritten with identical content are not parsed
+    again.  Without content_hash the entries of new or changed files are made
+    from their size and mtime only, without reading the files.  Returns the
+    list of new or changed files, in the input order, and the updated manifest.
+    """
+    manifest = dict(manifest)
+    changed = []
+    for fname in fnames:
+        src_file = os.path.basename(fname)
+        stat = os.stat(fname)
+        if src_file in manifest:
+            entry = manifest[src_file]
+            if entry['size'] == stat.st_size and\
+                    entry['mtime'] == stat.st_mtime:
+                continue
+
+            new_entry = fileEntry(fname, content_hash=content_hash)
+            if not new_entry['sha256'] is None and\
+                    new_entry['sha256'] == entry.get('sha256'):
+                manifest[src_file] = new_entry
+                continue
+
+            print(INDT + 'Changed ' + fname, file=log_f)
+
+        else:
+            new_entry = fileEntry(fname, content_hash=content_hash)
+            print(INDT + 'New ' + fname, file=log_f)
+
+        manifest[src_file] = new_entry
+        changed.append(fname)
+
+    return changed, manifest
+
+def mergeStats(data_dict, in_dir, field, src_files, log_f=None):
+    """Merges newly parsed data frames into the existing store
+
+    Inputs to the method are as follows:
+
+        data_dict -- dictionary of newly parsed data frames by stat type
+        in_dir    -- full path to directory of the existing store
+        field     -- verification field, the store directory name
+        src_files -- list of base names of the newly parsed files
+        log_f     -- optional full path to log file
+
+    Rows of the existing store with a SRC_FILE in src_files are replaced by the
+    newly parsed rows, and stat types without new rows are carried over, except
+    for streamed stat types which are left to StreamWriter.  Stat types left
+    without rows are omitted, so that their files are removed by dropStats.
+    Returns the merged dictionary of data frames to be written.
+    """
+    merged = {}
+    for stat_type in listStats(in_dir, field):
+        # streamed stat types are merged in batches by StreamWriter
+        if isStreamed(stat_type):
+            continue
+
+        data = loadStats(in_dir, field, stat_type)
+        if 'SRC_FILE' in data.columns:
+            drop = data['SRC_FILE'].isin(src_files).to_numpy(dtype=bool)
+            print(INDT + 'Replacing ' + str(drop.sum()) + ' ' + stat_type +\
+                    ' rows of changed files', file=log_f)
+            data = data.loc[~drop]
+
+        if len(data) > 0:
+            merged[stat_type] = data
+
+    for stat_type, data in data_dict.items():
+        if stat_type in merged:
+            data = pd.concat([merged[stat_type], data], axis=0,
+                    ignore_index=True)
+
+        merged[stat_type] = applySchema(data, stat_type)
+
+    return merged
+
+def dropStats(out_dir, field, src_files, skip=[], log_f=None):
+    """Removes the rows of a list of source files from the stat store
+
+    Inputs to the method are as follows:
+
+        out_dir   -- full path to directory of the existing store
+        field     -- verification field, the store directory name
+        src_files -- list of base names of changed or removed files
+        skip      -- list of stat types already rewritten without these rows
+        log_f     -- optional full path to log file
+
+    Stat types other than those in skip are filtered one row group at a time
+    into a temporary file which replaces the store file, so that rows of files
+    which no longer produce a stat type, or which were removed from the input
+    directory, do not remain in the store.  Files of stat types left without
+    rows are removed.  Returns the list of stat types with dropped rows.
+    """
+    dropped = []
+    for stat_type in listStats(out_dir, field):
+        out_path = out_dir + '/' + field + '/' + stat_type + STORE_EXT
+        if stat_type in skip or\
+                not 'SRC_FILE' in pq.read_schema(out_path).names:
+            continue
+
+        # check the source column alone before rewriting the file
+        src_col = pq.read_table(out_path, columns=['SRC_FILE'])
+        drop = src_col['SRC_FILE'].to_pandas().isin(src_files)
+        if not drop.any():
+            continue
+
+        print(INDT + 'Dropping ' + str(drop.sum()) + ' ' + stat_type +\
+                ' rows of changed or removed files', file=log_f)
+        dropped.append(stat_type)
+        if drop.all():
+            print(INDT + 'Removing empty ' + out_path, file=log_f)
+            os.remove(out_path)
+            continue
+
+        in_file = pq.ParquetFile(out_path)
+        tmp_path = out_path + '.tmp'
+        with pq.ParquetWriter(tmp_path, in_file.schema_arrow) as writer:
+            for batch in in_file.iter_batches(batch_size=ROW_GROUP_SIZE):
+                keep = ~batch.column('SRC_FILE').to_pandas().isin(src_files)
+                batch = batch.filter(pa.array(keep.to_numpy(dtype=bool)))
+                if batch.num_rows > 0:
+                    writer.write_table(pa.Table.from_batches([batch]),
+                            row_group_size=ROW_GROUP_SIZE)
+
+        os.replace(tmp_path, out_path)
+
+    return dropped
+
+##################################################################################
+# end
@@ -0,0 +1,198 @@
+##################################################################################
+# Description
+##################################################################################
+# This module computes the differences of statistics of treatment versus control
+# flows in the concatenated data frames of ConcatStats.py.  Treatment and
+# control rows are joined on the case, grid, prefix, mask, lead, threshold and
+# valid time, so that the deltas of all statistics and all treatment / control
+# pairs are computed in one vectorized operation, returned as a tidy frame.
+# Bootstrap confidence intervals of the mean deltas of all cells are computed
+# in batches of replicates drawn as one matrix of resampling indices.
+#
+##################################################################################
+# License Statement:
+##################################################################################
+# This software is Copyright © 2024 The Regents of the University of California.
+# All Rights Reserved. Permission to copy, modify, and distribute this software
+# and its documentation for educational, research and non-profit purposes,
+# without fee, and without a written agreement is hereby granted, provided that
+# the above copyright notice, this paragraph and the following three paragraphs
+# appear in all copies. Permission to make commercial use of this software may
+# be obtained by contacting:
+#
+#     Office of Innovation and Commercialization
+#     9500 Gilman Drive, Mail Code 0910
+#     University of California
+#     La Jolla, CA 92093-0910
+#     innovation@ucsd.edu
+#
+# This software program and documentation are copyrighted by The Regents of the
+# University of California. The software program and documentation are supplied
+# "as is", without any accompanying services from The Regents. The Regents does
+# not warrant that the operation of the program will be uninterrupted or
+# error-free. The end-user understands that the program was developed for
+# research purposes and is advised not to rely exclusively on the program for
+# any reason.
+#
+# IN NO EVENT SHALL THE UNIVERSITY OF CALIFORNIA BE LIABLE TO ANY PARTY FOR
+# DIRECT, INDIRECT, SPECIAL, INCIDENTAL, OR CONSEQUENTIAL DAMAGES, INCLUDING
+# LOST PROFITS, ARISING OUT OF THE USE OF THIS SOFTWARE AND ITS DOCUMENTATION,
+# EVEN IF THE UNIVERSITY OF CALIFORNIA HAS BEEN ADVISED OF THE POSSIBILITY OF
+# SUCH DAMAGE. THE UNIVERSITY OF CALIFORNIA SPECIFICALLY DISCLAIMS ANY
+# WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF
+# MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE. THE SOFTWARE PROVIDED
+# HEREUNDER IS ON AN “AS IS” BASIS, AND THE UNIVERSITY OF CALIFORNIA HAS NO
+# OBLIGATIONS TO PROVIDE MAINTENANCE, SUPPORT, UPDATES, ENHANCEMENTS, OR
+# MODIFICATIONS.
+# 
+##################################################################################
+# Imports
+##################################################################################
+from utilities import *
+
+##################################################################################
+# DELTA DEFINITIONS
+##################################################################################
+# Cells of the bootstrap, the deltas of a cell are resampled together
+BOOT_CELLS = [
+              'TREAT',
+              'CNTRL',
+              'STAT',
+              'VX_MASK',
+              'FCST_LEAD',
+              'FCST_THRESH',
+             ]
+
+# Maximum number of resampled values drawn at once, bounding the memory
+BOOT_BLOCK = 10000000
+
+# Columns identifying the verification of a row, joining treatment to control
+DELTA_KEYS = [
+              'CASE',
+              'GRID',
+              'PRFX',
+              'VX_MASK',
+              'FCST_LEAD',
+              'FCST_THRESH',
+              'FCST_VALID_END',
+             ]
+
+##################################################################################
+# METHODS
+##################################################################################
+
+def computeDeltas(data, pairs, stats, masks=None):
+    """Computes the differences of statistics of treatment and control flows
+
+    Inputs to the method are as follows:
+
+        data  -- concatenated data frame with CTR_FLW and stat columns
+        pairs -- list of (treatment, control) control flow name pairs
+        stats -- list of stat columns to difference
+        masks -- optional dictionary of the VX_MASK region of each CASE, the
+                 rows of other regions are excluded
+
+    Rows are melted to one value per stat and the treatment rows of each pair
+    are joined to the control rows with the same DELTA_KEYS present in data,
+    so that the cost is linear in the number of rows.  A pandas MergeError is
+    raised if a control value is not unique.  Returns a tidy data frame with
+    the columns TREAT, CNTRL, the keys, STAT, TREAT_VALUE, CNTRL_VALUE and
+    DELTA = TREAT_VALUE - CNTRL_VALUE, with a row per matched value.
+    """
+    keys = [key for key in DELTA_KEYS if key in data.columns]
+    stats = [stat for stat in stats if stat in data.columns]
+    data = data[['CTR_FLW'] + keys + stats]
+
+    if not masks is None:
+        cse_msks = pd.DataFrame(list(masks.items()),
+                columns=['CASE', 'VX_MASK'])
+        keep = pd.MultiIndex.from_frame(data[['CASE', 'VX_MASK']].astype(str))
+        keep = keep.isin(pd.MultiIndex.from_frame(cse_msks))
+        data = data.loc[keep]
+
+    # labels are joined as objects, so categories may differ across flows
+    data = data.astype({col: object for col in ['CTR_FLW'] + keys
+                        if isinstance(data[col].dtype, pd.CategoricalDtype)})
+    values = data.melt(id_vars=['CTR_FLW'] + keys, value_vars=stats,
+            var_name='STAT', value_name='VALUE')
+
+    pairs = pd.DataFrame(pairs, columns=['TREAT', 'CNTRL'])
+    treat = values.merge(pairs, left_on='CTR_FLW', right_on='TREAT')
+    treat = treat.drop(columns='CTR_FLW')
+    cntrl = values.rename(columns={'CTR_FLW': 'CNTRL'})
+
+    deltas = treat.merge(cntrl, on=['CNTRL'] + keys + ['STAT'],
+            suffixes=('_TREAT', '_CNTRL'), validate='many_to_one')
+    deltas = deltas.rename(columns={'VALUE_TREAT': 'TREAT_VALUE',
+        'VALUE_CNTRL': 'CNTRL_VALUE'})
+    deltas['DELTA'] = deltas['TREAT_VALUE'] - deltas['CNTRL_VALUE']
+
+    out_cols = ['TREAT', 'CNTRL'] + keys + ['STAT', 'TREAT_VALUE',
+            'CNTRL_VALUE', 'DELTA']
+    return deltas[out_cols]
+
+def bootstrapDeltas(deltas, reps=1000, alpha=0.05, seed=None, by=None):
+    """Computes bootstrap confidence intervals of the mean deltas of cells
+
+    Inputs to the method are as follows:
+
+        deltas -- tidy data frame of deltas, e.g., the output of computeDeltas
+        reps   -- number of bootstrap replicates
+        alpha  -- significance level of the two-sided confidence intervals
+        seed   -- optional seed of the random number generator
+        by     -- optional list of columns defining the cells, BOOT_CELLS
+                  present in deltas by default
+
+    The DELTA values of all cells are sorted into contiguous blocks and every
+    replicate resamples each cell with replacement from one matrix of random
+    indices, offset into the block of the cell, so that the replicate means
+    of all cells are computed in one NumPy pass with np.add.reduceat.  The
+    replicates are drawn in blocks of at most BOOT_BLOCK values.  Results are
+    reproducible for a fixed seed.  Returns a data frame with a row per cell
+    of the columns of by, the sample size N, the MEAN delta, the percentile
+    interval DELTA_L / DELTA_U and the two-sided bootstrap P_VALUE of a zero
+    mean delta.
+    """
+    if by is None:
+        by = [col for col in BOOT_CELLS if col in deltas.columns]
+
+    deltas = deltas.loc[deltas['DELTA'].notna()]
+    if deltas.empty:
+        return pd.DataFrame(columns=by + ['N', 'MEAN', 'DELTA_L', 'DELTA_U',
+            'P_VALUE'])
+
+    cells = deltas.groupby(by, dropna=False, sort=True, observed=True)
+    codes = cells.ngroup().to_numpy()
+    order = np.argsort(codes, kind='stable')
+    vals = deltas['DELTA'].to_numpy(dtype='float64')[order]
+    codes = codes[order]
+
+    # sizes and offsets of the contiguous blocks of the cells
+    sizes = np.bincount(codes)
+    offsets = np.concatenate([[0], np.cumsum(sizes)[:-1]])
+    n_vals = len(vals)
+
+    rng = np.random.default_rng(seed)
+    means = np.empty([reps, len(sizes)])
+    block = max(1, BOOT_BLOCK // max(n_vals, 1))
+    for i_r in range(0, reps, block):
+        n_reps = min(block, reps - i_r)
+
+        # indices resampled within the block of the cell of each value
+        idx = rng.random([n_reps, n_vals]) * sizes[codes]
+        idx = offsets[codes] + idx.astype('int64')
+        means[i_r:i_r + n_reps] = np.add.reduceat(vals[idx], offsets,
+                axis=1) / sizes
+
+    boot = cells['DELTA'].agg(['size', 'mean']).reset_index()
+    boot = boot.rename(columns={'size': 'N', 'mean': 'MEAN'})
+    boot['DELTA_L'] = np.quantile(means, alpha / 2, axis=0)
+    boot['DELTA_U'] = np.quantile(means, 1 - alpha / 2, axis=0)
+    p_value = 2 * np.minimum((means <= 0).mean(axis=0),
+            (means >= 0).mean(axis=0))
+    boot['P_VALUE'] = np.minimum(p_value, 1.0)
+
+    return boot
+
+##################################################################################
+# end
@@ -48,6 +48,7 @@ import numpy as np
 import pandas as pd
 import pickle
 import glob
+import io
 import re
 import os
 import sys
@@ -0,0 +1,341 @@
+##################################################################################
+# Description
+##################################################################################
+# This script benchmarks the makeDataFrames parsing engines on a directory of
+# synthetic MET ASCII outputs, comparing the legacy line-by-line parser with the
+# vectorized bulk parser and verifying that both produce the same data frames.
+#
+# Usage: python benchmark_DataFrames.py [N_FILES] [N_ROWS]
+#
+##################################################################################
+# License Statement:
+##################################################################################
+##################################################################################
+# License Statement:
+##################################################################################
+# This software is Copyright © 2024 The Regents of the University of California.
+# All Rights Reserved. Permission to copy, modify, and distribute this software
+# and its documentation for educational, research and non-profit purposes,
+# without fee, and without a written agreement is hereby granted, provided that
+# the above copyright notice, this paragraph and the following three paragraphs
+# appear in all copies. Permission to make commercial use of this software may
+# be obtained by contacting:
+#
+#     Office of Innovation and Commercialization
+#     9500 Gilman Drive, Mail Code 0910
+#     University of California
+#     La Jolla, CA 92093-0910
+#     innovation@ucsd.edu
+#
+# This software program and documentation are copyrighted by The Regents of the
+# University of California. The software program and documentation are supplied
+# "as is", without any accompanying services from The Regents. The Regents does
+# not warrant that the operation of the program will be uninterrupted or
+# error-free. The end-user understands that the program was developed for
+# research purposes and is advised not to rely exclusively on the program for
+# any reason.
+#
+# IN NO EVENT SHALL THE UNIVERSITY OF CALIFORNIA BE LIABLE TO ANY PARTY FOR
+# DIRECT, INDIRECT, SPECIAL, INCIDENTAL, OR CONSEQUENTIAL DAMAGES, INCLUDING
+# LOST PROFITS, ARISING OUT OF THE USE OF THIS SOFTWARE AND ITS DOCUMENTATION,
+# EVEN IF THE UNIVERSITY OF CALIFORNIA HAS BEEN ADVISED OF THE POSSIBILITY OF
+# SUCH DAMAGE. THE UNIVERSITY OF CALIFORNIA SPECIFICALLY DISCLAIMS ANY
+# WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF
+# MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE. THE SOFTWARE PROVIDED
+# HEREUNDER IS ON AN “AS IS” BASIS, AND THE UNIVERSITY OF CALIFORNIA HAS NO
+# OBLIGATIONS TO PROVIDE MAINTENANCE, SUPPORT, UPDATES, ENHANCEMENTS, OR
+# MODIFICATIONS.
+# 
+##################################################################################
+# Imports
+##################################################################################
+from DataFrames import *
+import tempfile
+import shutil
+import time
+import tracemalloc
+
+##################################################################################
+# Synthetic MET ASCII table definitions
+##################################################################################
+STATS = {
+         'cnt': LINE_TYPES['cnt']['cols'],
+         'nbrcnt': LINE_TYPES['nbrcnt']['cols'],
+        }
+
+MSKS = ['CA_All', 'CA_Climate_Zone_01', 'CA_Climate_Zone_02', 'PNW_NorCal']
+LEVS = ['>=1.0', '>=10.0', '>=25.0', '>=50.0', '>=100.0']
+
+def write_synthetic(out_dir, field, n_files, n_rows):
+    """Writes n_files synthetic tables per stat type with n_rows each
+
+    The rows of all stat types are also written to a combined .stat file for
+    each lead and valid date, as in MET outputs.
+    """
+    rng = np.random.default_rng(0)
+    for i_f in range(n_files):
+        lead = str(24 * (i_f % 5 + 1)) + '0000'
+        fname = out_dir + '/grid_stat_' + field + '_' + lead + 'L_' +\
+                str(20210101 + i_f) + '_000000V'
+
+        stat_rows = []
+        for stat_type, stats in STATS.items():
+            type_rows = []
+            vals = rng.random([n_rows, len(stats) - 1])
+            for i_r in range(n_rows):
+                if stat_type == 'cnt':
+                    lev = 'NA'
+                else:
+                    lev = LEVS[i_r % len(LEVS)]
+                hdr = [
+                       'V11.1.0', 'WRF', 'NA', lead,
+                       '20210101_000000', '20210102_000000', lead,
+                       '20210101_000000', '20210102_000000', 'QPF_24hr',
+                       'NA', 'A24', 'precip_bkt', 'NA', 'A24', 'STAGEIV',
+                       MSKS[i_r % len(MSKS)], 'NEAREST', '1', lev, lev,
+                       'NA', '0.05', stat_type.upper(),
+                      ]
+                row = []
+                for col, val in zip(stats[1:], vals[i_r]):
+                    if val <= 0.05:
+                        row.append('NA')
+                    elif col in COUNT_COLS:
+                        row.append(str(int(100 * val)))
+                    else:
+                        row.append('%.5f'%val)
+
+                type_rows.append(' '.join(hdr + ['1000'] + row) + '\n')
+
+            with open(fname + '_' + stat_type + '.txt', 'w') as f:
+                f.write(' '.join(HEADER_COLS + stats) + '\n')
+                f.writelines(type_rows)
+
+            stat_rows += type_rows
+
+        with open(fname + '.stat', 'w') as f:
+            f.write(' '.join(HEADER_COLS) + '\n')
+            f.writelines(stat_rows)
+
+def write_mpr(out_dir, field, n_rows):
+    """Writes a single synthetic MPR table with n_rows matched pairs"""
+    rng = np.random.default_rng(0)
+    cols = LINE_TYPES['mpr']['cols']
+    hdr = ' '.join([
+                    'V11.1.0', 'WRF', 'NA', '240000', '20210101_000000',
+                    '20210102_000000', '000000', '20210101_000000',
+                    '20210102_000000', 'QPF_24hr', 'NA', 'A24', 'precip_bkt',
+                    'NA', 'A24', 'STAGEIV', 'CA_All', 'NEAREST', '1', 'NA',
+                    'NA', 'NA', '0.05', 'MPR',
+                   ])
+    fname = out_dir + '/point_stat_' + field + '_240000L_20210102_000000V_mpr.txt'
+    with open(fname, 'w') as f:
+        f.write(' '.join(HEADER_COLS + cols) + '\n')
+        vals = rng.random([n_rows, 8])
+        for i_r in range(n_rows):
+            row = [str(n_rows), str(i_r + 1), 'SID' + str(i_r % 100)] +\
+                    ['%.5f'%val for val in vals[i_r, :6]] + ['NA'] +\
+                    ['%.5f'%val for val in vals[i_r, 6:]] + ['NA']
+            f.write(hdr + ' ' + ' '.join(row) + '\n')
+
+def time_engine(field, in_dir, out_dir, engine, stat=False, workers=1):
+    """Times a single makeDataFrames call and returns the parsed dictionary"""
+    t0 = time.perf_counter()
+    with open(os.devnull, 'w') as log_f:
+        makeDataFrames(field, in_dir, out_dir, log_f=log_f, engine=engine,
+                stat=stat, workers=workers)
+    elapsed = time.perf_counter() - t0
+
+    data_dict = {}
+    for stat_type in listStats(out_dir, field):
+        data_dict[stat_type] = loadStats(out_dir, field, stat_type)
+
+    return elapsed, data_dict
+
+##################################################################################
+# Run benchmark
+##################################################################################
+if __name__ == '__main__':
+    N_FILES = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    N_ROWS = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    FIELD = 'QPF_24hr'
+
+    tmp_dir = tempfile.mkdtemp()
+    try:
+        print('Writing ' + str(N_FILES) + ' synthetic files per stat type' +\
+                ' with ' + str(N_ROWS) + ' rows to ' + tmp_dir)
+        write_synthetic(tmp_dir, FIELD, N_FILES, N_ROWS)
+
+        times = {}
+        data = {}
+        for engine in ['python', 'c']:
+            times[engine], data[engine] = time_engine(FIELD, tmp_dir,
+                    tmp_dir, engine)
+            print(INDT + engine + ' engine: ' + '%.3f'%times[engine] + ' s')
+
+        print('Speedup of c engine: ' +\
+                '%.1f'%(times['python'] / times['c']) + 'x')
+
+        for key in data['python']:
+            pd.testing.assert_frame_equal(data['python'][key], data['c'][key])
+        print('Parsed data frames are equal across engines.')
+
+        times['stat'], data['stat'] = time_engine(FIELD, tmp_dir, tmp_dir, 'c',
+                stat=True)
+        print(INDT + 'c engine on .stat files: ' + '%.3f'%times['stat'] + ' s')
+        for key in data['c']:
+            pd.testing.assert_frame_equal(
+                    data['c'][key].drop(columns='SRC_FILE'),
+                    data['stat'][key].drop(columns='SRC_FILE'))
+        print('Parsed data frames are equal across .stat and _TYPE.txt files.')
+
+        # compare memory of typed frames with the legacy string values
+        for key in data['c']:
+            fnames = sorted(glob.glob(tmp_dir + '/*_' + key + '.txt'))
+            with open(os.devnull, 'w') as log_f:
+                str_df, _ = parseLines(fnames, key, log_f=log_f)
+            str_mem = str_df.memory_usage(deep=True).sum() / 1e6
+            typ_mem = data['c'][key].memory_usage(deep=True).sum() / 1e6
+            print(INDT + key + ' memory: ' + '%.1f'%str_mem +\
+                    ' MB as strings, ' + '%.1f'%typ_mem + ' MB typed')
+
+        # scaling of the parallel parser with the number of workers
+        n_cpus = os.cpu_count()
+        workers = 2
+        while workers <= max(n_cpus, 2):
+            t_par, par_data = time_engine(FIELD, tmp_dir, tmp_dir, 'c',
+                    workers=workers)
+            print(INDT + 'c engine with ' + str(workers) + ' workers: ' +\
+                    '%.3f'%t_par + ' s, speedup ' +\
+                    '%.1f'%(times['c'] / t_par) + 'x')
+            for key in data['c']:
+                pd.testing.assert_frame_equal(data['c'][key], par_data[key])
+
+            workers *= 2
+
+        print('Parsed data frames are equal across worker counts.')
+
+        # ingest half of the files, then the late files incrementally
+        inc_dir = tmp_dir + '/incremental'
+        os.makedirs(inc_dir)
+        fnames = sorted(glob.glob(tmp_dir + '/*.txt'))
+        for fname in fnames[:len(fnames) // 2]:
+            shutil.copy2(fname, inc_dir)
+
+        with open(os.devnull, 'w') as log_f:
+            makeDataFrames(FIELD, inc_dir, inc_dir, log_f=log_f,
+                    incremental=True)
+            for fname in fnames[len(fnames) // 2:]:
+                shutil.copy2(fname, inc_dir)
+
+            t0 = time.perf_counter()
+            makeDataFrames(FIELD, inc_dir, inc_dir, log_f=log_f,
+                    incremental=True)
+            t_inc = time.perf_counter() - t0
+
+            # rerun with no new files, then with a changed file
+            t0 = time.perf_counter()
+            makeDataFrames(FIELD, inc_dir, inc_dir, log_f=log_f,
+                    incremental=True)
+            t_none = time.perf_counter() - t0
+
+        print(INDT + 'incremental run on half of the files: ' +\
+                '%.3f'%t_inc + ' s, with no new files: ' + '%.3f'%t_none + ' s')
+        for key in data['c']:
+            inc_data = loadStats(inc_dir, FIELD, key)
+            pd.testing.assert_frame_equal(data['c'][key], inc_data)
+        print('Parsed data frames are equal across full and incremental runs.')
+
+        # empty one nbrcnt file and remove another, then all nbrcnt files
+        nbr_files = sorted(glob.glob(inc_dir + '/*_nbrcnt.txt'))
+        with open(nbr_files[0]) as f:
+            header = f.readline()
+        with open(nbr_files[0], 'w') as f:
+            f.write(header)
+        os.remove(nbr_files[1])
+
+        with open(os.devnull, 'w') as log_f:
+            makeDataFrames(FIELD, inc_dir, inc_dir, log_f=log_f,
+                    incremental=True)
+
+        src_files = [os.path.basename(fname) for fname in nbr_files[:2]]
+        nbr_data = data['c']['nbrcnt']
+        nbr_data = nbr_data.loc[~nbr_data['SRC_FILE'].isin(src_files)]
+        pd.testing.assert_frame_equal(nbr_data.reset_index(drop=True),
+                loadStats(inc_dir, FIELD, 'nbrcnt'))
+        manifest = loadManifest(inc_dir, FIELD)
+        assert src_files[0] in manifest and not src_files[1] in manifest
+
+        for fname in nbr_files[:1] + nbr_files[2:]:
+            os.remove(fname)
+
+        with open(os.devnull, 'w') as log_f:
+            makeDataFrames(FIELD, inc_dir, inc_dir, log_f=log_f,
+                    incremental=True)
+
+        assert listStats(inc_dir, FIELD) == ['cnt']
+        pd.testing.assert_frame_equal(data['c']['cnt'],
+                loadStats(inc_dir, FIELD, 'cnt'))
+        manifest = loadManifest(inc_dir, FIELD)
+        assert not any([name.endswith('_nbrcnt.txt') for name in manifest])
+        print('Rows of emptied and removed files are dropped from the store.')
+
+        # compare projected loads from the store with unpickling a binary
+        with open(os.devnull, 'w') as log_f:
+            makeDataFrames(FIELD, tmp_dir, tmp_dir, log_f=log_f, out_fmt='bin')
+
+        t0 = time.perf_counter()
+        with open(tmp_dir + '/' + FIELD + '.bin', 'rb') as f:
+            stat_data = pickle.load(f)['cnt']
+        stat_data = stat_data[['VX_MASK', 'FCST_LEAD', 'FCST_VALID_END',
+            'RMSE']]
+        stat_data = stat_data.loc[stat_data['VX_MASK'] == 'CA_All']
+        t_bin = time.perf_counter() - t0
+
+        shutil.move(tmp_dir + '/' + FIELD + '.bin', tmp_dir + '/legacy.bin')
+        t0 = time.perf_counter()
+        stat_data = loadStats(tmp_dir, FIELD, 'cnt', columns=['VX_MASK',
+            'FCST_LEAD', 'FCST_VALID_END', 'RMSE'],
+            filters=[('VX_MASK', '==', 'CA_All')])
+        t_store = time.perf_counter() - t0
+        print('Load RMSE on CA_All from .bin: ' + '%.3f'%t_bin +\
+                ' s, from Parquet store: ' + '%.3f'%t_store + ' s')
+
+        # check the compatibility reader on the legacy binary
+        shutil.move(tmp_dir + '/' + FIELD, tmp_dir + '/store')
+        shutil.move(tmp_dir + '/legacy.bin', tmp_dir + '/' + FIELD + '.bin')
+        bin_data = loadStats(tmp_dir, FIELD, 'cnt', columns=['VX_MASK',
+            'FCST_LEAD', 'FCST_VALID_END', 'RMSE'],
+            filters=[('VX_MASK', '==', 'CA_All')])
+        sort_cols = ['FCST_LEAD', 'FCST_VALID_END']
+        pd.testing.assert_frame_equal(
+                stat_data.sort_values(sort_cols, kind='stable').reset_index(
+                    drop=True),
+                bin_data.sort_values(sort_cols, kind='stable').reset_index(
+                    drop=True),
+                check_categorical=False)
+        print('Projected loads are equal across store and legacy binary.')
+
+        # check that peak memory of streamed line types is bounded in size
+        peaks = []
+        for n_mpr in [CHUNK_ROWS, 4 * CHUNK_ROWS]:
+            mpr_dir = tmp_dir + '/mpr_' + str(n_mpr)
+            os.makedirs(mpr_dir)
+            write_mpr(mpr_dir, FIELD, n_mpr)
+            with open(os.devnull, 'w') as log_f:
+                tracemalloc.start()
+                makeDataFrames(FIELD, mpr_dir, mpr_dir, log_f=log_f)
+                peaks.append(tracemalloc.get_traced_memory()[1] / 1024**2)
+                tracemalloc.stop()
+
+            mpr_data = loadStats(mpr_dir, FIELD, 'mpr', columns=['INDEX'])
+            assert len(mpr_data) == n_mpr
+
+        print('Streamed mpr peak memory: %.1f MB at '%peaks[0] +\
+                str(CHUNK_ROWS) + ' rows, %.1f MB at '%peaks[1] +\
+                str(4 * CHUNK_ROWS) + ' rows')
+
+    finally:
+        shutil.rmtree(tmp_dir)
+
+##################################################################################
+# end
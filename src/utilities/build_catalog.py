@@ -0,0 +1,88 @@
+##################################################################################
+# Description
+##################################################################################
+# This script indexes the stat stores and legacy .bin dictionaries of a
+# verification tree in the catalog of StatCatalog.py, re-reading only stores
+# changed since the last build.  It is run after the GridStat workflows so that
+# plotting and concatenation resolve existing statistics with catalog queries,
+# or with --in-dir and --fields to index only the stores of one directory.
+#
+##################################################################################
+# License Statement:
+##################################################################################
+# This software is Copyright © 2024 The Regents of the University of California.
+# All Rights Reserved. Permission to copy, modify, and distribute this software
+# and its documentation for educational, research and non-profit purposes,
+# without fee, and without a written agreement is hereby granted, provided that
+# the above copyright notice, this paragraph and the following three paragraphs
+# appear in all copies. Permission to make commercial use of this software may
+# be obtained by contacting:
+#
+#     Office of Innovation and Commercialization
+#     9500 Gilman Drive, Mail Code 0910
+#     University of California
+#     La Jolla, CA 92093-0910
+#     innovation@ucsd.edu
+#
+# This software program and documentation are copyrighted by The Regents of the
+# University of California. The software program and documentation are supplied
+# "as is", without any accompanying services from The Regents. The Regents does
+# not warrant that the operation of the program will be uninterrupted or
+# error-free. The end-user understands that the program was developed for
+# research purposes and is advised not to rely exclusively on the program for
+# any reason.
+#
+# IN NO EVENT SHALL THE UNIVERSITY OF CALIFORNIA BE LIABLE TO ANY PARTY FOR
+# DIRECT, INDIRECT, SPECIAL, INCIDENTAL, OR CONSEQUENTIAL DAMAGES, INCLUDING
+# LOST PROFITS, ARISING OUT OF THE USE OF THIS SOFTWARE AND ITS DOCUMENTATION,
+# EVEN IF THE UNIVERSITY OF CALIFORNIA HAS BEEN ADVISED OF THE POSSIBILITY OF
+# SUCH DAMAGE. THE UNIVERSITY OF CALIFORNIA SPECIFICALLY DISCLAIMS ANY
+# WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF
+# MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE. THE SOFTWARE PROVIDED
+# HEREUNDER IS ON AN “AS IS” BASIS, AND THE UNIVERSITY OF CALIFORNIA HAS NO
+# OBLIGATIONS TO PROVIDE MAINTENANCE, SUPPORT, UPDATES, ENHANCEMENTS, OR
+# MODIFICATIONS.
+# 
+##################################################################################
+# Imports
+##################################################################################
+from StatCatalog import *
+import argparse
+
+##################################################################################
+# arguments for buildCatalog are taken from command line
+##################################################################################
+parser = argparse.ArgumentParser(description='Index the parsed MET statistics' +\
+        ' of a verification tree in an SQLite catalog.')
+parser.add_argument('root', help='root directory of the verification tree')
+parser.add_argument('--catalog',
+        help='path of the catalog database, root/' + CATALOG + ' by default')
+parser.add_argument('--in-dir',
+        help='index only the stores of --fields in this directory below root')
+parser.add_argument('--fields',
+        help='comma separated list of verification fields used with --in-dir')
+args = parser.parse_args()
+
+if args.catalog is None:
+    cat_path = args.root + '/' + CATALOG
+else:
+    cat_path = args.catalog
+
+# execute and exit with status
+if args.in_dir is None:
+    buildCatalog(args.root, cat_path=cat_path)
+
+elif args.fields is None:
+    parser.error('the argument --fields is required with --in-dir')
+
+elif not os.path.isfile(cat_path):
+    print('Catalog ' + cat_path + ' does not exist, run without --in-dir' +\
+            ' to build it.')
+
+else:
+    updateCatalog(cat_path, args.in_dir, args.fields.split(','))
+
+sys.exit(0)
+
+##################################################################################
+# end
@@ -0,0 +1,86 @@
+##################################################################################
+# Description
+##################################################################################
+# This script builds the statistics cube of StatCube.py for control flows of a
+# case study and writes it to netCDF, so that plotting loads a season of
+# statistics once and takes slices of it for each figure.
+#
+##################################################################################
+# License Statement:
+##################################################################################
+# This software is Copyright © 2024 The Regents of the University of California.
+# All Rights Reserved. Permission to copy, modify, and distribute this software
+# and its documentation for educational, research and non-profit purposes,
+# without fee, and without a written agreement is hereby granted, provided that
+# the above copyright notice, this paragraph and the following three paragraphs
+# appear in all copies. Permission to make commercial use of this software may
+# be obtained by contacting:
+#
+#     Office of Innovation and Commercialization
+#     9500 Gilman Drive, Mail Code 0910
+#     University of California
+#     La Jolla, CA 92093-0910
+#     innovation@ucsd.edu
+#
+# This software program and documentation are copyrighted by The Regents of the
+# University of California. The software program and documentation are supplied
+# "as is", without any accompanying services from The Regents. The Regents does
+# not warrant that the operation of the program will be uninterrupted or
+# error-free. The end-user understands that the program was developed for
+# research purposes and is advised not to rely exclusively on the program for
+# any reason.
+#
+# IN NO EVENT SHALL THE UNIVERSITY OF CALIFORNIA BE LIABLE TO ANY PARTY FOR
+# DIRECT, INDIRECT, SPECIAL, INCIDENTAL, OR CONSEQUENTIAL DAMAGES, INCLUDING
+# LOST PROFITS, ARISING OUT OF THE USE OF THIS SOFTWARE AND ITS DOCUMENTATION,
+# EVEN IF THE UNIVERSITY OF CALIFORNIA HAS BEEN ADVISED OF THE POSSIBILITY OF
+# SUCH DAMAGE. THE UNIVERSITY OF CALIFORNIA SPECIFICALLY DISCLAIMS ANY
+# WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF
+# MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE. THE SOFTWARE PROVIDED
+# HEREUNDER IS ON AN “AS IS” BASIS, AND THE UNIVERSITY OF CALIFORNIA HAS NO
+# OBLIGATIONS TO PROVIDE MAINTENANCE, SUPPORT, UPDATES, ENHANCEMENTS, OR
+# MODIFICATIONS.
+# 
+##################################################################################
+# Imports
+##################################################################################
+from StatCube import *
+from StatCatalog import CATALOG
+import argparse
+
+##################################################################################
+# arguments for buildCube are taken from command line
+##################################################################################
+parser = argparse.ArgumentParser(description='Build a netCDF cube of MET' +\
+        ' statistics of control flows of a case study.')
+parser.add_argument('in_root', help='case directory of the verification tree')
+parser.add_argument('out_path', help='path of the output netCDF cube')
+parser.add_argument('ctr_flws', help='comma separated list of control flows')
+parser.add_argument('stats',
+        help='comma separated list of STAT:type pairs, e.g., RMSE:cnt,FSS:nbrcnt')
+parser.add_argument('--met-tool', default='GridStat',
+        help='MET tool of the statistics, default GridStat')
+parser.add_argument('--vrf-ref', default='StageIV',
+        help='verification reference, default StageIV')
+parser.add_argument('--field', default='QPF_24hr',
+        help='verification field, default QPF_24hr')
+parser.add_argument('--ci', help='confidence interval suffix, e.g., NC')
+args = parser.parse_args()
+
+stats = {}
+for pair in args.stats.split(','):
+    stat_name, stat_type = pair.split(':')
+    stats[stat_name] = stat_type
+
+# use the catalog at the root of the verification tree if it exists
+catalog = os.path.dirname(args.in_root.rstrip('/')) + '/' + CATALOG
+if not os.path.isfile(catalog):
+    catalog = None
+
+cube = buildCube(args.in_root, args.ctr_flws.split(','), args.met_tool,
+        args.vrf_ref, args.field, stats, ci=args.ci, catalog=catalog)
+writeCube(cube, args.out_path)
+sys.exit(0)
+
+##################################################################################
+# end
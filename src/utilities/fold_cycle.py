@@ -0,0 +1,92 @@
+##################################################################################
+# Description
+##################################################################################
+# This script folds the partial sums of the stat stores of a finished GridStat
+# cycle into the season state of Aggregate.py, so that seasonal scores are
+# current as each cycle of a cycling campaign finishes, e.g.,
+#
+#     python fold_cycle.py 'QPF_24hr' in_dir state_dir --ctr-flw WRF_9-3_WestCoast \
+#         --cycle 2022122300 --mem mean --grid d01
+#
+# where the member and grid labels of the stores are passed by the GridStat
+# driver from the MEM_ID and GRD settings of the workflow task.
+#
+##################################################################################
+# License Statement:
+##################################################################################
+# This software is Copyright © 2024 The Regents of the University of California.
+# All Rights Reserved. Permission to copy, modify, and distribute this software
+# and its documentation for educational, research and non-profit purposes,
+# without fee, and without a written agreement is hereby granted, provided that
+# the above copyright notice, this paragraph and the following three paragraphs
+# appear in all copies. Permission to make commercial use of this software may
+# be obtained by contacting:
+#
+#     Office of Innovation and Commercialization
+#     9500 Gilman Drive, Mail Code 0910
+#     University of California
+#     La Jolla, CA 92093-0910
+#     innovation@ucsd.edu
+#
+# This software program and documentation are copyrighted by The Regents of the
+# University of California. The software program and documentation are supplied
+# "as is", without any accompanying services from The Regents. The Regents does
+# not warrant that the operation of the program will be uninterrupted or
+# error-free. The end-user understands that the program was developed for
+# research purposes and is advised not to rely exclusively on the program for
+# any reason.
+#
+# IN NO EVENT SHALL THE UNIVERSITY OF CALIFORNIA BE LIABLE TO ANY PARTY FOR
+# DIRECT, INDIRECT, SPECIAL, INCIDENTAL, OR CONSEQUENTIAL DAMAGES, INCLUDING
+# LOST PROFITS, ARISING OUT OF THE USE OF THIS SOFTWARE AND ITS DOCUMENTATION,
+# EVEN IF THE UNIVERSITY OF CALIFORNIA HAS BEEN ADVISED OF THE POSSIBILITY OF
+# SUCH DAMAGE. THE UNIVERSITY OF CALIFORNIA SPECIFICALLY DISCLAIMS ANY
+# WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF
+# MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE. THE SOFTWARE PROVIDED
+# HEREUNDER IS ON AN “AS IS” BASIS, AND THE UNIVERSITY OF CALIFORNIA HAS NO
+# OBLIGATIONS TO PROVIDE MAINTENANCE, SUPPORT, UPDATES, ENHANCEMENTS, OR
+# MODIFICATIONS.
+# 
+##################################################################################
+# Imports
+##################################################################################
+from Aggregate import *
+import argparse
+
+##################################################################################
+# arguments for foldCycle are taken from command line
+##################################################################################
+parser = argparse.ArgumentParser(description='Fold the partial sums of a' +\
+        ' GridStat cycle into the season state.')
+parser.add_argument('prfx', help='comma separated list of verification fields')
+parser.add_argument('in_dir', help='directory of the stat stores of the cycle')
+parser.add_argument('state_dir', help='directory of the season state')
+parser.add_argument('--ctr-flw', required=True, help='control flow name')
+parser.add_argument('--cycle', required=True,
+        help='forecast cycle in YYYYMMDDHH format')
+parser.add_argument('--mem', default='',
+        help='ensemble member or mean label of the stores, empty by default')
+parser.add_argument('--grid', default='',
+        help='model grid label of the stores, empty by default')
+args = parser.parse_args()
+
+labels = {'CTR_FLW': args.ctr_flw, 'MEM': args.mem, 'GRID': args.grid,
+          'CYCLE': args.cycle}
+
+error = 0
+for field in args.prfx.split(','):
+    try:
+        folded = foldCycle(args.state_dir, args.in_dir, field, labels)
+        if len(folded) == 0:
+            print('WARNING: no partial sums to fold in ' + args.in_dir + '/' +\
+                    field)
+
+    except (OSError, KeyError, ValueError) as err:
+        print('ERROR: folding ' + args.in_dir + '/' + field + ' failed:\n' +\
+                str(err))
+        error = 1
+
+sys.exit(error)
+
+##################################################################################
+# end
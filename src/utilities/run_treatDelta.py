@@ -51,6 +51,8 @@ import copy
 import matplotlib
 # use this setting on COMET / Skyriver for x forwarding
 import matplotlib.pyplot as plt
+from utilities.StatStore import loadStats
+from utilities.TreatDelta import bootstrapDeltas, computeDeltas
 
 ##################################################################################
 # Set Parameters
@@ -90,7 +92,7 @@ for cse in CSES:
 for flw in FLWS:
     FNAME += flw + '_' + CTR + '_' + flw + '_' + TRT + '_'
     
-FNAME = FNAME[:-1] + '.bin'
+FNAME = FNAME[:-1]
 
 TYPES = [
          'cnt',
@@ -107,95 +109,76 @@ STATS_1 = [
            'AFSS',
           ]
 
+# forecast leads in hours
 FCST_LEADS = [
-              '240000',
-              '480000',
-              '720000',
-              '960000',
+              24,
+              48,
+              72,
+              96,
              ]
 
-FCST_THRESH = '>=25.0'
+# threshold level of thresholded stat types, one of the levs of the
+# concatenation config, checked against the levels in the data
+FCST_THRESH = '>=25.4'
+
+# number of bootstrap replicates and seed for confidence intervals of the mean
+BOOT_REPS = 1000
+BOOT_SEED = 0
 
 
 ##################################################################################
 # Process data
 ##################################################################################
+# treatment / control flow pairs to difference
+PAIRS = []
+for flw in FLWS:
+    PAIRS.append((flw + '_' + TRT, flw + '_' + CTR))
 
-with open(FNAME, 'rb') as f:
-    tmp = pickle.load(f)
-
-# extract the stats from the saved dictionary
-types = []
-for typ in TYPES:
-    types.append(tmp[typ])
-
-# find lengths for looping
-N_cses = len(CSES)
-N_flws = len(FLWS)
-N_leds = len(FCST_LEADS)
-N_types = len(TYPES)
+# land mask of each case study
+MASKS = dict(zip(CSES, MSKS))
 
+# extract the stats from the concatenated store, or a legacy FNAME.bin
 all_deltas = []
+all_boots = []
+for i_ty, typ in enumerate(TYPES):
+    stats = [STATS_0, STATS_1][i_ty]
+    data = loadStats('.', FNAME, typ)
+
+    # leads are stored in seconds
+    data = data.loc[data['CASE'].isin(CSES) &\
+            data['FCST_LEAD'].isin([lead * 3600 for lead in FCST_LEADS])]
+
+    if 'FCST_THRESH' in data.columns and data['FCST_THRESH'].notna().any():
+        levs = [str(lev) for lev in data['FCST_THRESH'].dropna().unique()]
+        if not FCST_THRESH in levs:
+            raise ValueError('FCST_THRESH ' + FCST_THRESH + ' is not a' +\
+                    ' level of the ' + typ + ' data, levels are ' +\
+                    ', '.join(sorted(levs)) + '.')
+
+        data = data.loc[data['FCST_THRESH'].isna() |\
+                (data['FCST_THRESH'] == FCST_THRESH)]
+
+    deltas = computeDeltas(data, PAIRS, stats, masks=MASKS)
+
+    # confidence intervals of the mean delta over cases / flows by lead
+    boot = bootstrapDeltas(deltas, reps=BOOT_REPS, seed=BOOT_SEED,
+            by=['STAT', 'FCST_LEAD'])
+    print(boot.to_string(index=False))
+    for stat in stats:
+        print('Processing statistic: ' + stat)
+        stat_deltas = deltas.loc[deltas['STAT'] == stat]
+
+        # deltas of all case studies / control flows for box plots versus lead
+        all_deltas.append([stat_deltas.loc[stat_deltas['FCST_LEAD'] ==\
+                lead * 3600, 'DELTA'].to_numpy() for lead in FCST_LEADS])
+        stat_boot = boot.loc[boot['STAT'] == stat].set_index('FCST_LEAD')
+        all_boots.append(stat_boot.reindex([lead * 3600
+            for lead in FCST_LEADS]))
 
-for i_ty in range(N_types):
-    # loop gridstat types
-    typ = types[i_ty]
-    exec('stats = STATS_%s'%i_ty)
-    N_stats = len(stats)
-
-    for i_st in range(N_stats):
-        # process statistics within gridstat type
-        STAT = stats[i_st]
-        print('Processing statistic: ' + STAT)
-
-        # create storage for deltas versus leads
-        deltas = []
-
-        for i_ld in range(N_leds):
-            # loop on forecast leads
-            lead = FCST_LEADS[i_ld]
-            print(STR_INDT + 'Processing lead time: ' + lead)
-
-            lead_idx = np.array(typ['FCST_LEAD'] == lead)
-
-            # create storage for the stat differences for given lead
-            stat_delta = np.empty([N_cses, N_flws])
-
-            for i_cs in range(N_cses):
-                # loop on case studies
-                cse = CSES[i_cs]
-                msk = MSKS[i_cs]
-                print(STR_INDT * 2 + 'Processing case study: ' + cse)
-                print(STR_INDT * 2 + 'Case study landmask is defined: ' +  msk)
-
-                cse_idx = np.array(typ['CASE'] == cse)
-                for i_fl in range(N_flws):
-                    # loop on control flows
-                    flw = FLWS[i_fl]
-                    print(STR_INDT * 3 + 'Processing control flow: ' + flw)
-                    msk_idx = np.array(typ['VX_MASK'] == msk)
-
-                    # create a flow index for the treatment
-                    flw_idx = np.array(typ['CTR_FLW'] == flw + '_' + TRT)
-                    TREAT = typ.loc[cse_idx * flw_idx * msk_idx * lead_idx]
-                    TREAT = TREAT[STAT].values[0]
-    
-                    # create a flow index for the control
-                    flw_idx = np.array(typ['CTR_FLW'] == flw + '_' + CTR)
-                    CNTRL = typ.loc[cse_idx * flw_idx * msk_idx * lead_idx]
-                    CNTRL = CNTRL[STAT].values[0]
-    
-                    stat_delta[i_cs, i_fl] = TREAT - CNTRL
-
-            # flatten all statistics for box plots versus lead hour
-            deltas.append(stat_delta[:, :].flatten())
-
-        # reshape for plotting
-        all_deltas.append(np.array(deltas).transpose())
-
+N_leds = len(FCST_LEADS)
 fcst_leads = []
 for i_ld in range(N_leds):
-    fcst_leads.append(FCST_LEADS[i_ld][:-4])
+    fcst_leads.append(str(FCST_LEADS[i_ld]))
 
 # create a figure
 fig = plt.figure(figsize=(12,9.6))
@@ -209,6 +192,14 @@ for i_d in range(len(all_deltas)):
     exec('ax%s.boxplot(all_deltas[%s], showmeans=True)'%(i_d,i_d))
     exec('ax%s.axhline(0.0, color=\'#808080\', linestyle=\'--\')'%i_d)
 
+    # bootstrap confidence intervals of the mean deltas
+    ax = fig.axes[i_d]
+    boot = all_boots[i_d]
+    ax.errorbar(range(1, N_leds + 1), boot['MEAN'],
+            yerr=[boot['MEAN'] - boot['DELTA_L'],
+                  boot['DELTA_U'] - boot['MEAN']],
+            fmt='none', ecolor='#d62728', capsize=6, linewidth=2)
+
 
 ax3.set_xticks(range(1,N_leds+1))
 ax3.set_xticklabels(fcst_leads)